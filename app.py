@@ -8,12 +8,14 @@ import logging
 from pathlib import Path
 import sys
 import time
+import uuid
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import config
-from src.integrator import ContentIntegrator, ProcessingProgress
+from src.integrator import ContentIntegrator, IncompleteArticle, ProcessingProgress
+from src.run_journal import RunJournal
 
 # 配置日志
 logging.basicConfig(
@@ -161,6 +163,19 @@ def init_session_state():
         st.session_state.processed_content = None
     if 'processing' not in st.session_state:
         st.session_state.processing = False
+    if 'process_notice' not in st.session_state:
+        st.session_state.process_notice = None  # 上次处理结果的提示 (部分内容未重组等)
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:12]
+
+
+def note_key(file_name: str) -> str:
+    """
+    增量处理使用的笔记标识: 会话 ID 加文件名
+
+    只在同一会话内按文件名匹配上次的处理结果,不同会话上传的同名文件 (如 note.md) 互不覆盖。
+    """
+    return f"{st.session_state.session_id}:{file_name}"
 
 
 def render_sidebar():
@@ -239,6 +254,7 @@ def render_main_content(api_key: str, text_model: str, vision_model: str, max_wo
         type=['md', 'markdown'],
         help="支持包含图片链接和网页链接的 MD 文件"
     )
+    st.caption("同一会话中再次上传同名文件时按文件名匹配上次的结果,只重新处理新增或变化的图片和链接")
 
     if uploaded_file is not None:
         # 显示原始内容
@@ -253,12 +269,15 @@ def render_main_content(api_key: str, text_model: str, vision_model: str, max_wo
 
         with col2:
             st.subheader("✨ 优化后的文章")
+            result_area = st.empty()
 
             if st.session_state.processed_content:
-                with st.container(height=400):
+                with result_area.container(height=400):
                     st.markdown(st.session_state.processed_content)
+                if st.session_state.process_notice:
+                    st.warning(st.session_state.process_notice)
             else:
-                st.info("点击下方按钮开始处理")
+                result_area.info("点击下方按钮开始处理")
 
         # 处理按钮
         st.divider()
@@ -297,7 +316,9 @@ def render_main_content(api_key: str, text_model: str, vision_model: str, max_wo
                 api_key,
                 text_model,
                 vision_model,
-                max_workers
+                max_workers,
+                result_area,
+                note_key(uploaded_file.name)
             )
 
     else:
@@ -326,9 +347,17 @@ def process_markdown(
     api_key: str,
     text_model: str,
     vision_model: str,
-    max_workers: int
+    max_workers: int,
+    result_area,
+    note_id: str
 ):
-    """处理 Markdown 内容"""
+    """
+    处理 Markdown 内容,生成的文章会逐段渲染到 result_area 中
+
+    同一会话中同名的笔记再次处理时只重新处理新增或变化的图片和链接。
+    同一内容上次运行未完成时,恢复该运行,只重试缺失的部分。
+    文章生成中途失败时不保存不完整的结果;部分内容使用原始文本时保存结果并给出提示。
+    """
     st.session_state.processing = True
 
     # 更新配置
@@ -356,19 +385,37 @@ def process_markdown(
 
     try:
         # 创建整合器并处理
+        run_id = RunJournal.find_incomplete(content) if config.CACHE_ENABLED else None
+        if run_id:
+            st.info(f"🔁 检测到未完成的运行 ({run_id}),将复用已完成的图片和链接结果")
+
         integrator = ContentIntegrator(api_key, update_progress)
-        result = integrator.process_markdown(content, max_workers)
+        stream = integrator.process_markdown_stream(content, max_workers, note_id, run_id)
+
+        # 文章边生成边渲染
+        with result_area.container(height=400):
+            result = st.write_stream(stream)
 
         # 保存结果
         st.session_state.processed_content = result
+        st.session_state.process_notice = None if integrator.fully_reorganized else (
+            "部分内容重组失败,结果中使用了原始文本;再次处理该笔记会恢复本次运行,只重试失败的部分"
+        )
 
         # 完成
         progress_bar.progress(1.0)
         status_text.empty()
-        st.success("✅ 处理完成!")
-        time.sleep(1)
+        if integrator.fully_reorganized:
+            st.success("✅ 处理完成!")
+            time.sleep(1)
         st.rerun()
 
+    except IncompleteArticle as e:
+        # 已显示的部分内容不完整,不保存也不提示成功
+        result_area.warning("⚠️ 文章生成中途失败,不完整的结果未保存")
+        st.error(f"❌ {str(e)}")
+        logging.error(f"处理失败: {str(e)}", exc_info=True)
+
     except Exception as e:
         st.error(f"❌ 处理失败: {str(e)}")
         logging.error(f"处理失败: {str(e)}", exc_info=True)
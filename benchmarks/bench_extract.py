@@ -0,0 +1,150 @@
+"""
+正文提取引擎基准测试
+在本地保存的网页上比较各提取引擎 (见 src/extractor.py) 的耗时和提取质量:
+
+    python benchmarks/bench_extract.py [网页目录] [--repeat N] [--batch N --processes N]
+
+目录中每个 .html 文件为一个网页 (可以直接放入浏览器"另存为"的网页);
+同名 .txt 文件为人工整理的正文,用于按词计算准确率、召回率和 F1,
+没有 .txt 时只报告耗时和正文长度。默认使用 benchmarks/pages 下的示例网页。
+
+--batch 模拟批量抓取: 多个线程同时提取 N 个网页,比较在线程中提取和交给进程池提取的总耗时
+(只有一个 CPU 核心时进程池没有优势)。
+"""
+import sys
+import time
+import logging
+import argparse
+import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.extractor import EXTRACTORS, ExtractionPool  # noqa: E402
+from src.selector import tokenize  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "pages"
+
+
+def quality(output: Optional[str], reference: str) -> Tuple[float, float, float]:
+    """
+    按词 (中文为相邻两字) 计算提取结果相对参考正文的准确率、召回率和 F1
+
+    Args:
+        output: 提取结果,失败时为 None
+        reference: 参考正文
+
+    Returns:
+        (precision, recall, f1)
+    """
+    if not output:
+        return 0.0, 0.0, 0.0
+    extracted = Counter(tokenize(output))
+    expected = Counter(tokenize(reference))
+    overlap = sum((extracted & expected).values())
+    if not overlap:
+        return 0.0, 0.0, 0.0
+    precision = overlap / sum(extracted.values())
+    recall = overlap / sum(expected.values())
+    return precision, recall, 2 * precision * recall / (precision + recall)
+
+
+def bench_page(path: Path, repeat: int) -> List[Dict]:
+    """对一个网页运行所有引擎,返回每个引擎的结果"""
+    html = path.read_bytes()
+    reference_path = path.with_suffix('.txt')
+    reference = reference_path.read_text(encoding='utf-8') if reference_path.exists() else None
+
+    rows = []
+    for engine, extract in EXTRACTORS.items():
+        timings = []
+        output = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = extract(html, path.name)
+            timings.append(time.perf_counter() - start)
+        rows.append({
+            'page': path.stem,
+            'engine': engine,
+            'ms': statistics.median(timings) * 1000,
+            'chars': len(output) if output else 0,
+            'quality': quality(output, reference) if reference is not None else None,
+        })
+    return rows
+
+
+def bench_batch(pages: List[Path], count: int, processes: int, engine: str, threads: int = 8) -> float:
+    """
+    模拟批量抓取: threads 个线程同时提取 count 个网页 (循环使用语料),返回总耗时(秒)
+
+    processes 为 0 时在线程中提取,否则交给有 processes 个子进程的进程池。
+    """
+    documents = [pages[i % len(pages)].read_bytes() for i in range(count)]
+    pool = ExtractionPool(processes, engine, inline_bytes=0)
+    try:
+        pool.extract(documents[0], "warmup")  # 启动子进程不计入耗时
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda html: pool.extract(html, "batch"), documents))
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="比较正文提取引擎的耗时和质量")
+    parser.add_argument('corpus', nargs='?', default=str(DEFAULT_CORPUS), help="保存网页的目录")
+    parser.add_argument('--repeat', type=int, default=20, help="每个网页每个引擎的运行次数 (取中位数)")
+    parser.add_argument('--batch', type=int, default=0, help="批量提取的网页数,0 表示跳过批量测试")
+    parser.add_argument('--processes', type=int, default=4, help="批量测试的进程池子进程数")
+    args = parser.parse_args(argv)
+
+    # 提取失败的警告不影响结果
+    logging.basicConfig(level=logging.ERROR)
+
+    pages = sorted(Path(args.corpus).glob('*.html'))
+    if not pages:
+        print(f"目录中没有 .html 文件: {args.corpus}")
+        return 1
+
+    print(f"{'网页':<24}{'引擎':<14}{'耗时(ms)':>10}{'字数':>8}{'准确率':>8}{'召回率':>8}{'F1':>8}")
+    totals: Dict[str, Dict[str, List[float]]] = {}
+    for path in pages:
+        for row in bench_page(path, max(1, args.repeat)):
+            summary = totals.setdefault(row['engine'], {'ms': [], 'f1': []})
+            summary['ms'].append(row['ms'])
+            line = f"{row['page'][:22]:<24}{row['engine']:<14}{row['ms']:>10.2f}{row['chars']:>8}"
+            if row['quality'] is not None:
+                precision, recall, f1 = row['quality']
+                summary['f1'].append(f1)
+                line += f"{precision:>8.3f}{recall:>8.3f}{f1:>8.3f}"
+            print(line)
+
+    print()
+    baseline = sum(totals['readability']['ms']) if 'readability' in totals else None
+    for engine, summary in totals.items():
+        total_ms = sum(summary['ms'])
+        line = f"{engine:<14}总耗时 {total_ms:>9.2f} ms"
+        if baseline:
+            line += f"  (readability 的 {total_ms / baseline:.0%})"
+        if summary['f1']:
+            line += f"  平均 F1 {statistics.mean(summary['f1']):.3f}"
+        print(line)
+
+    if args.batch > 0:
+        print()
+        for engine in EXTRACTORS:
+            threaded = bench_batch(pages, args.batch, 0, engine)
+            pooled = bench_batch(pages, args.batch, args.processes, engine)
+            print(
+                f"{engine:<14}批量 {args.batch} 页: 线程中提取 {threaded:.2f} s,"
+                f"{args.processes} 个子进程 {pooled:.2f} s ({threaded / pooled:.1f}x)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
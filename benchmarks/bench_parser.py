@@ -0,0 +1,112 @@
+"""
+Markdown 笔记解析基准测试
+生成包含大量链接和图片 (部分重复) 的合成笔记,测量 MarkdownParser.parse 的耗时随笔记规模的变化:
+
+    python benchmarks/bench_parser.py [--sizes 1000 2000 4000 8000] [--repeat N] [--legacy]
+
+每一行的"每项耗时"基本不变即说明解析耗时与链接、图片数量成线性关系。
+--legacy 同时运行旧版的图片/链接提取 (逐项线性查重、图片和链接分两次扫描) 作为对照。
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.parser import MarkdownParser, ParsedContent  # noqa: E402
+
+# 重复出现的链接和图片所占比例
+DUPLICATE_EVERY = 10
+
+
+def make_note(items: int) -> str:
+    """
+    生成包含 items 个链接和 items 个图片的合成笔记,其中每 DUPLICATE_EVERY 个重复引用一次已出现的地址
+
+    Args:
+        items: 链接 (以及图片) 数量
+
+    Returns:
+        str: Markdown 文本
+    """
+    lines = ["---", "title: 合成笔记", "tags: [基准测试]", "---", "", "# 合成笔记", ""]
+    for i in range(items):
+        n = i // 2 if i % DUPLICATE_EVERY == DUPLICATE_EVERY - 1 else i
+        lines.append(
+            f"第 {i} 段介绍 **一个话题**,参考 [文章 {n}](https://example.com/posts/{n}) "
+            f"和截图 ![截图 {n}](https://img.example.com/{n}.png) #标签{i % 50}"
+        )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_extract(parser: MarkdownParser, markdown_text: str) -> ParsedContent:
+    """旧版的图片/链接提取: 图片和链接各扫描一次,每个匹配与已有结果逐项比较查重"""
+    result = ParsedContent()
+    for match in re.finditer(r'!\[([^\]]*)\]\(([^)]+)\)', markdown_text):
+        alt, url = match.groups()
+        if not any(img['url'] == url for img in result.images):
+            result.images.append({
+                'url': url, 'alt': alt,
+                'context': parser._get_surrounding_text(markdown_text, match.start()),
+            })
+    for match in re.finditer(r'\[([^\]]+)\]\(([^)]+)\)', markdown_text):
+        title, url = match.groups()
+        if parser._is_webpage_url(url) and not any(link['url'] == url for link in result.links):
+            result.links.append({
+                'url': url, 'title': title,
+                'context': parser._get_surrounding_text(markdown_text, match.start()),
+            })
+    return result
+
+
+def timed(func, repeat: int) -> float:
+    """运行 repeat 次,返回耗时中位数 (秒)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="测量 Markdown 笔记解析耗时随规模的变化")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 4000, 8000],
+                        help="每篇笔记的链接数 (图片数相同)")
+    parser.add_argument('--repeat', type=int, default=3, help="每个规模的运行次数 (取中位数)")
+    parser.add_argument('--legacy', action='store_true', help="同时运行旧版提取作为对照")
+    args = parser.parse_args(argv)
+
+    markdown_parser = MarkdownParser()
+    header = f"{'链接数':>8}{'大小(KB)':>10}{'解析(ms)':>12}{'每项(us)':>10}{'提取(ms)':>12}"
+    if args.legacy:
+        header += f"{'旧版提取(ms)':>14}"
+    print(header)
+
+    for size in args.sizes:
+        note = make_note(size)
+        repeat = max(1, args.repeat)
+        parse_seconds = timed(lambda: markdown_parser.parse(note), repeat)
+        result = markdown_parser.parse(note)
+        media_seconds = timed(lambda: markdown_parser._extract_media(note, ParsedContent()), repeat)
+
+        line = (
+            f"{size:>8}{len(note.encode('utf-8')) / 1024:>10.0f}{parse_seconds * 1000:>12.1f}"
+            f"{parse_seconds / size * 1e6:>10.1f}{media_seconds * 1000:>12.2f}"
+        )
+        if args.legacy:
+            legacy = legacy_extract(markdown_parser, note)
+            assert [img['url'] for img in legacy.images] == [img['url'] for img in result.images]
+            assert [link['url'] for link in legacy.links] == [link['url'] for link in result.links]
+            line += f"{timed(lambda: legacy_extract(markdown_parser, note), 1) * 1000:>14.1f}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
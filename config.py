@@ -15,10 +15,90 @@ class Config:
     ZHIPU_API_KEY: str = os.getenv("ZHIPU_API_KEY", "")
     TEXT_MODEL: str = os.getenv("TEXT_MODEL", "glm-4.6")
     VISION_MODEL: str = os.getenv("VISION_MODEL", "glm-4.5v")
+    ZHIPU_API_BASE: str = os.getenv("ZHIPU_API_BASE", "https://open.bigmodel.cn/api/paas/v4")
 
     # 请求配置
     REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
-    MAX_RETRIES: int = 3
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))  # 可重试错误的最多重试次数
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "1"))  # 首次退避上限(秒),之后逐次翻倍
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "30"))  # 单次退避上限(秒)
+    MODEL_RETRY_DEADLINE: float = float(os.getenv("MODEL_RETRY_DEADLINE", "600"))  # 单次模型调用含重试的总时间预算(秒)
+    SCRAPE_RETRY_DEADLINE: float = float(os.getenv("SCRAPE_RETRY_DEADLINE", "60"))  # 单次网页请求含重试的总时间预算(秒)
+    MODEL_TIMEOUT: int = int(os.getenv("MODEL_TIMEOUT", "300"))  # 模型调用超时(秒)
+
+    # 网页/图片抓取的 HTTP 连接池 (进程内共享,复用 keep-alive 连接)
+    HTTP_POOL_HOSTS: int = int(os.getenv("HTTP_POOL_HOSTS", "50"))  # 保留连接池的主机数
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # 每个主机保留的空闲连接数
+    HTTP_MAX_PER_HOST: int = int(os.getenv("HTTP_MAX_PER_HOST", "8"))  # 每个主机同时进行中的请求上限
+    FETCH_CONCURRENCY: int = int(os.getenv("FETCH_CONCURRENCY", "16"))  # 批量抓取 (fetch_multiple) 的并发网页数
+
+    # 网页抓取竞速: readability 迟迟没有结果时同时请求 Jina AI,先返回可用正文的一方胜出
+    FETCH_RACE_ENABLED: bool = os.getenv("FETCH_RACE_ENABLED", "True").lower() == "true"
+    JINA_RACE_DELAY: float = float(os.getenv("JINA_RACE_DELAY", "3"))  # readability 超过该时间(秒)未成功时发出 Jina 请求
+    JINA_PREFERRED_DOMAINS: str = os.getenv("JINA_PREFERRED_DOMAINS", "")  # 立即发出 Jina 请求的域名,逗号分隔 (另按历史胜出情况自动学习)
+    PAGE_MAX_DOWNLOAD_MB: float = float(os.getenv("PAGE_MAX_DOWNLOAD_MB", "5"))  # 单个网页最多下载的字节数(MB),超过时截断;声明更大的响应直接跳过
+    EXTRACTOR: str = os.getenv("EXTRACTOR", "lxml")  # 正文提取引擎: lxml (单次解析) / readability (readability + BeautifulSoup)
+    EXTRACT_PROCESSES: int = int(os.getenv("EXTRACT_PROCESSES", str(min(4, (os.cpu_count() or 1) - 1))))  # 正文提取子进程数,0 表示在抓取线程中提取
+
+    # 模型调用限流 (所有智谱 API 调用共享)
+    MODEL_RPS_LIMIT: float = float(os.getenv("MODEL_RPS_LIMIT", "10"))  # 每秒最多请求数
+    MODEL_TPM_LIMIT: int = int(os.getenv("MODEL_TPM_LIMIT", "0"))  # 每分钟最多 token 数,0 表示不限制
+    MODEL_MAX_CONCURRENCY: int = int(os.getenv("MODEL_MAX_CONCURRENCY", "20"))  # 自适应并发上限
+    MODEL_MIN_CONCURRENCY: int = int(os.getenv("MODEL_MIN_CONCURRENCY", "1"))  # 限流退避时的最小并发
+
+    # 图片预处理: 在本地读取/下载图片,缩小后以 base64 发送给视觉模型
+    IMAGE_PREPROCESS_ENABLED: bool = os.getenv("IMAGE_PREPROCESS_ENABLED", "True").lower() == "true"
+    IMAGE_MAX_EDGE: int = int(os.getenv("IMAGE_MAX_EDGE", "1568"))  # 图片最长边像素上限
+    IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))  # 重新压缩的 JPEG 质量
+    IMAGE_MAX_DOWNLOAD_MB: float = float(os.getenv("IMAGE_MAX_DOWNLOAD_MB", "20"))  # 单张网络图片最多下载的大小(MB),超过时改由模型服务端获取
+    IMAGE_BASE_DIR: str = os.getenv("IMAGE_BASE_DIR", "")  # 没有笔记目录时本地图片的根目录,为空时不读取本地图片
+
+    # 图片去重: 按感知哈希 (dHash) 识别近似重复的图片,只调用一次视觉模型
+    IMAGE_DEDUP_ENABLED: bool = os.getenv("IMAGE_DEDUP_ENABLED", "True").lower() == "true"
+    IMAGE_HASH_DISTANCE: int = int(os.getenv("IMAGE_HASH_DISTANCE", "40"))  # 视为近似重复的最大汉明距离 (共 1024 位)
+
+    # 多图分析: 多张图片合并为一次视觉模型调用
+    VISION_BATCH_ENABLED: bool = os.getenv("VISION_BATCH_ENABLED", "True").lower() == "true"
+    VISION_BATCH_MAX_IMAGES: int = int(os.getenv("VISION_BATCH_MAX_IMAGES", "4"))  # 每组最多图片数
+
+    # 网页去重: 去掉跟踪参数、识别 rel=canonical,并按正文 SimHash 识别转载/镜像页面,只总结一次
+    PAGE_DEDUP_ENABLED: bool = os.getenv("PAGE_DEDUP_ENABLED", "True").lower() == "true"
+    PAGE_SIMHASH_DISTANCE: int = int(os.getenv("PAGE_SIMHASH_DISTANCE", "3"))  # 视为近似重复的最大汉明距离 (共 64 位)
+    PAGE_DEDUP_MIN_TERMS: int = int(os.getenv("PAGE_DEDUP_MIN_TERMS", "50"))  # 去掉导航等样板后正文至少有多少个不同的词才参与去重
+
+    # 链接总结输入: 按与上下文的相关度挑选正文段落,总量不超过该 token 数
+    SUMMARY_INPUT_TOKENS: int = int(os.getenv("SUMMARY_INPUT_TOKENS", "1500"))
+
+    # 批量总结: 多个链接合并为一次模型调用
+    SUMMARY_BATCH_ENABLED: bool = os.getenv("SUMMARY_BATCH_ENABLED", "True").lower() == "true"
+    SUMMARY_BATCH_TOKENS: int = int(os.getenv("SUMMARY_BATCH_TOKENS", "6000"))  # 每批正文的 token 预算
+    SUMMARY_BATCH_MAX_ITEMS: int = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", "8"))  # 每批最多链接数
+
+    # 长笔记分段重组: 文本超过该字数时按标题切分,各段并行重组后拼接
+    REORGANIZE_SECTION_CHARS: int = int(os.getenv("REORGANIZE_SECTION_CHARS", "4000"))
+
+    # 对冲请求 (图片分析和文本总结,仅同步客户端): 单次请求超过近期延迟分位数仍未返回时发出副本请求
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "False").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))  # 触发对冲的延迟分位
+    HEDGE_BUDGET: float = float(os.getenv("HEDGE_BUDGET", "0.05"))  # 额外请求数占总调用数的上限比例
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # 样本数达到后才开始对冲
+
+    # 异步引擎配置
+    ASYNC_MAX_CONCURRENCY: int = int(os.getenv("ASYNC_MAX_CONCURRENCY", "200"))  # 同时进行中的请求总数
+    ASYNC_MODEL_CONCURRENCY: int = int(os.getenv("ASYNC_MODEL_CONCURRENCY", "20"))  # 同时进行中的模型请求数
+
+    # 缓存配置
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+    VISION_CACHE_MAX_ENTRIES: int = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "5000"))
+    VISION_CACHE_MAX_MB: int = int(os.getenv("VISION_CACHE_MAX_MB", "50"))
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+    SUMMARY_CACHE_MAX_MB: int = int(os.getenv("SUMMARY_CACHE_MAX_MB", "20"))
+    PAGE_CACHE_TTL: int = int(os.getenv("PAGE_CACHE_TTL", "86400"))  # 网页缓存默认有效期(秒)
+    PAGE_CACHE_DOMAIN_TTL: str = os.getenv("PAGE_CACHE_DOMAIN_TTL", "")  # 按域名覆盖,如 "github.com=3600,docs.python.org=604800"
+    PAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+    PAGE_CACHE_MAX_MB: int = int(os.getenv("PAGE_CACHE_MAX_MB", "200"))
+    RUN_JOURNAL_RETENTION_DAYS: int = int(os.getenv("RUN_JOURNAL_RETENTION_DAYS", "7"))  # 运行日志保留天数
 
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")  # DEBUG/INFO/WARNING/ERROR
@@ -0,0 +1,274 @@
+"""
+持久化缓存模块
+基于 SQLite 的磁盘 LRU 缓存,供视觉识别、网页抓取等耗时调用复用结果
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from dataclasses import dataclass
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """缓存统计信息"""
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class DiskCache:
+    """
+    磁盘 LRU 缓存
+
+    每个条目记录最后访问时间,写入后若条目数或总字节数超过上限,
+    按最久未访问的顺序淘汰。值以 JSON 形式保存,可被多个线程共享。
+    条目可以带一个标签 (如提示词版本),用于按标签批量失效。
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            path: SQLite 数据库文件路径
+            max_entries: 最多保留的条目数
+            max_bytes: 最多占用的字节数 (按值的 JSON 长度计算),None 表示不限制
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL, tag TEXT)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if 'tag' not in columns:
+            # 兼容没有 tag 列的旧缓存文件
+            self._conn.execute("ALTER TABLE entries ADD COLUMN tag TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON entries (accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由任意可 JSON 序列化的组成部分生成缓存键"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存,命中时刷新访问时间"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None):
+        """写入缓存并按需淘汰旧条目"""
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed, tag) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), time.time(), tag)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """删除单个条目"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def retain_tag(self, tag: str) -> int:
+        """
+        删除标签不等于 tag 的所有条目
+
+        Args:
+            tag: 需要保留的标签
+
+        Returns:
+            int: 删除的条目数
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE tag IS NULL OR tag != ?", (tag,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> CacheStats:
+        """获取统计信息"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return CacheStats(hits=self.hits, misses=self.misses, entries=entries, size_bytes=size)
+
+    def __len__(self) -> int:
+        return self.stats().entries
+
+    def _evict(self):
+        """淘汰最久未访问的条目 (调用方需持有锁)"""
+        entries, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+        excess = max(0, entries - self.max_entries)
+        if excess:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed ASC LIMIT ?)",
+                (excess,)
+            )
+            size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            logger.debug(f"缓存淘汰 {excess} 条 (超过条目上限): {self.path}")
+
+        if self.max_bytes is None or size <= self.max_bytes:
+            return
+
+        removed = 0
+        for key, item_size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            size -= item_size
+            removed += 1
+        logger.debug(f"缓存淘汰 {removed} 条 (超过容量上限): {self.path}")
+
+
+def image_fingerprint(image_url: str, image_bytes: Optional[bytes] = None) -> str:
+    """
+    生成图片标识: 有图片内容时按内容哈希,否则按 URL
+
+    Args:
+        image_url: 图片 URL
+        image_bytes: 图片二进制内容 (可选)
+
+    Returns:
+        str: 图片标识
+    """
+    if image_bytes is not None:
+        return "sha256:" + hashlib.sha256(image_bytes).hexdigest()
+    return "url:" + image_url
+
+
+def content_fingerprint(text: str) -> str:
+    """生成文本内容哈希,内容相同的页面即使 URL 不同也得到相同结果"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+_retained_versions = set()  # 已清理过旧版本条目的 (缓存路径, 版本)
+
+
+def get_cache(name: str, max_entries: int = 10000, max_bytes: Optional[int] = None) -> DiskCache:
+    """
+    获取进程内共享的命名缓存 (位于 CACHE_DIR 下)
+
+    同名缓存只会打开一次,多个整合器实例以及 Streamlit 重新运行时共用同一个实例。
+
+    Args:
+        name: 缓存名称
+        max_entries: 最多保留的条目数
+        max_bytes: 最多占用的字节数
+
+    Returns:
+        DiskCache: 缓存实例
+    """
+    path = os.path.join(config.CACHE_DIR, f"{name}.sqlite3")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = DiskCache(path, max_entries=max_entries, max_bytes=max_bytes)
+            _caches[path] = cache
+        return cache
+
+
+def get_vision_cache() -> Optional[DiskCache]:
+    """获取视觉识别结果缓存,缓存被禁用时返回 None"""
+    if not config.CACHE_ENABLED:
+        return None
+    return get_cache(
+        "vision",
+        max_entries=config.VISION_CACHE_MAX_ENTRIES,
+        max_bytes=config.VISION_CACHE_MAX_MB * 1024 * 1024
+    )
+
+
+def get_page_cache() -> Optional[DiskCache]:
+    """获取网页正文缓存,缓存被禁用时返回 None"""
+    if not config.CACHE_ENABLED:
+        return None
+    return get_cache(
+        "pages",
+        max_entries=config.PAGE_CACHE_MAX_ENTRIES,
+        max_bytes=config.PAGE_CACHE_MAX_MB * 1024 * 1024
+    )
+
+
+def get_summary_cache(prompt_version: str) -> Optional[DiskCache]:
+    """
+    获取链接总结缓存,缓存被禁用时返回 None
+
+    首次打开时会清除其他提示词版本生成的条目。
+
+    Args:
+        prompt_version: 当前总结提示词版本
+
+    Returns:
+        Optional[DiskCache]: 缓存实例
+    """
+    if not config.CACHE_ENABLED:
+        return None
+
+    cache = get_cache(
+        "summaries",
+        max_entries=config.SUMMARY_CACHE_MAX_ENTRIES,
+        max_bytes=config.SUMMARY_CACHE_MAX_MB * 1024 * 1024
+    )
+    with _caches_lock:
+        if (cache.path, prompt_version) not in _retained_versions:
+            removed = cache.retain_tag(prompt_version)
+            if removed:
+                logger.info(f"总结提示词已变化,清除 {removed} 条旧缓存")
+            _retained_versions.add((cache.path, prompt_version))
+    return cache
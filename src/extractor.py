@@ -0,0 +1,429 @@
+"""
+网页正文提取模块
+lxml 引擎在同一棵树上完成候选节点打分和文本整理,只解析一次,不生成中间 HTML;
+readability + BeautifulSoup 作为可选的备用引擎保留。提取可以放到进程池中并行执行
+"""
+import re
+import codecs
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from readability import Document
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 正文少于该字数视为提取失败
+MIN_TEXT_LENGTH = 100
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 类名/ID 命中时大概率不是正文 (除非同时命中 _MAYBE_RE)
+_UNLIKELY_RE = re.compile(
+    r'combx|comment|community|disqus|extra|foot|header|menu|remark|rss|shoutbox|sidebar|sponsor|'
+    r'ad-break|agegate|pagination|pager|popup|tweet|twitter|share|related|breadcrumb|banner|cookie',
+    re.IGNORECASE
+)
+_MAYBE_RE = re.compile(r'and|article|body|column|main|shadow|content', re.IGNORECASE)
+_POSITIVE_RE = re.compile(r'article|body|content|entry|hentry|main|page|post|text|blog|story', re.IGNORECASE)
+_NEGATIVE_RE = re.compile(
+    r'combx|comment|com-|contact|foot|footer|footnote|masthead|media|meta|outbrain|promo|related|'
+    r'scroll|shoutbox|sidebar|sponsor|shopping|tags|tool|widget|share|nav|menu',
+    re.IGNORECASE
+)
+
+# 整体删除的标签 (保留其后的文本)。<form> 本身保留: ASP.NET 等 CMS 把整个页面包在表单中,
+# 只删除其中的表单控件,表单由 _TAG_SCORES 减分
+_JUNK_TAGS = (
+    'script', 'style', 'noscript', 'nav', 'footer', 'aside', 'iframe', 'svg', 'input',
+    'button', 'select', 'textarea', 'template', 'object', 'embed', 'canvas', 'head',
+)
+# 不会因为类名/ID 被删除的标签
+_KEEP_TAGS = {'html', 'body', 'article', 'main'}
+# 文本中另起一行的标签
+_BLOCK_TAGS = {
+    'address', 'article', 'blockquote', 'caption', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section',
+    'table', 'td', 'th', 'tr', 'ul',
+}
+# 参与打分的段落标签 (不含块级子元素的 div/section 也按段落处理)
+_PARAGRAPH_TAGS = ('p', 'pre', 'td', 'blockquote', 'div', 'section')
+_TAG_SCORES = {
+    'div': 5, 'article': 5, 'main': 5, 'section': 3, 'pre': 3, 'td': 3, 'blockquote': 3,
+    'address': -3, 'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5,
+}
+
+
+def _lookup_encoding(name: Optional[str]) -> Optional[str]:
+    """规范化编码名称 (GB2312/GBK 按超集 GB18030 解码),无法识别时返回 None"""
+    if not name:
+        return None
+    encoding = name.strip().lower()
+    if encoding in ('gb2312', 'gbk'):
+        encoding = 'gb18030'
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        return None
+    return encoding
+
+
+def _parse(html: bytes, charset: Optional[str] = None) -> Optional[lxml_html.HtmlElement]:
+    """
+    解析 HTML,去掉注释
+
+    编码依次取响应头 Content-Type 声明的 charset、<meta charset> 声明的编码,都没有时按 UTF-8。
+    """
+    encoding = _lookup_encoding(charset)
+    if encoding is None:
+        match = _META_CHARSET_RE.search(html[:4096])
+        encoding = _lookup_encoding(match.group(1).decode('ascii', errors='ignore')) if match else None
+
+    parser = lxml_html.HTMLParser(encoding=encoding or 'utf-8', remove_comments=True, remove_pis=True)
+    try:
+        return lxml_html.document_fromstring(html, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _text(node: lxml_html.HtmlElement) -> str:
+    return _WHITESPACE_RE.sub(' ', node.text_content()).strip()
+
+
+def _class_weight(node: lxml_html.HtmlElement) -> int:
+    """按类名和 ID 加减分"""
+    weight = 0
+    for value in (node.get('class'), node.get('id')):
+        if value:
+            if _NEGATIVE_RE.search(value):
+                weight -= 25
+            if _POSITIVE_RE.search(value):
+                weight += 25
+    return weight
+
+
+def _link_density(node: lxml_html.HtmlElement, text: str) -> float:
+    """链接文字占全部文字的比例"""
+    if not text:
+        return 0.0
+    link_length = sum(len(_text(link)) for link in node.iter('a'))
+    return min(1.0, link_length / len(text))
+
+
+def _remove_boilerplate(doc: lxml_html.HtmlElement):
+    """删除脚本、导航等标签,以及类名/ID 表明不是正文的元素"""
+    etree.strip_elements(doc, *_JUNK_TAGS, with_tail=False)
+    unlikely = []
+    for node in doc.iter(etree.Element):
+        if node.tag in _KEEP_TAGS:
+            continue
+        if node.get('hidden') is not None or 'display:none' in (node.get('style') or '').replace(' ', ''):
+            unlikely.append(node)
+            continue
+        attributes = f"{node.get('class') or ''} {node.get('id') or ''}"
+        if attributes.strip() and _UNLIKELY_RE.search(attributes) and not _MAYBE_RE.search(attributes):
+            unlikely.append(node)
+    for node in unlikely:
+        node.drop_tree()
+
+
+def _has_block_child(node: lxml_html.HtmlElement) -> bool:
+    return any(child.tag in _BLOCK_TAGS for child in node.iterchildren(etree.Element))
+
+
+def _score_candidates(doc: lxml_html.HtmlElement) -> Dict[lxml_html.HtmlElement, float]:
+    """按段落的长度和标点为父节点 (全额) 和祖父节点 (一半) 打分"""
+    scores: Dict[lxml_html.HtmlElement, float] = {}
+    for node in doc.iter(*_PARAGRAPH_TAGS):
+        if node.tag in ('div', 'section') and _has_block_child(node):
+            continue
+        text = _text(node)
+        if len(text) < 25:
+            continue
+
+        score = 1 + text.count(',') + text.count('，') + text.count('。') + min(len(text) // 100, 3)
+        parent = node.getparent()
+        for ancestor, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+            if ancestor is None:
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = _TAG_SCORES.get(ancestor.tag, 0) + _class_weight(ancestor)
+            scores[ancestor] += score * share
+    return scores
+
+
+def _select_content(doc: lxml_html.HtmlElement) -> List[lxml_html.HtmlElement]:
+    """选出得分最高的节点,以及与它相邻、同样像正文的兄弟节点和标题"""
+    scores = _score_candidates(doc)
+    if not scores:
+        body = doc.find('body')
+        return [body if body is not None else doc]
+
+    adjusted = {node: score * (1 - _link_density(node, _text(node))) for node, score in scores.items()}
+    top = max(adjusted, key=adjusted.get)
+    parent = top.getparent()
+    if parent is None:
+        return [top]
+
+    threshold = max(10.0, adjusted[top] * 0.2)
+    selected = []
+    for sibling in parent.iterchildren(etree.Element):
+        if sibling is top or adjusted.get(sibling, float('-inf')) >= threshold:
+            selected.append(sibling)
+        elif sibling.tag in ('h1', 'h2'):
+            # 与正文同级的标题 (文章标题通常在这里)
+            selected.append(sibling)
+        elif sibling.tag == 'p':
+            text = _text(sibling)
+            density = _link_density(sibling, text)
+            if (len(text) > 80 and density < 0.25) or (text.endswith(('.', '。')) and density == 0):
+                selected.append(sibling)
+    return selected
+
+
+def _render_lines(root: lxml_html.HtmlElement, lines: List[str]):
+    """
+    把节点渲染为文本行
+
+    块级元素另起一行,行内元素 (链接、强调等) 与相邻文字合并为一行,
+    <pre> 保留原有换行和缩进。使用显式栈遍历,不受嵌套深度限制。
+    """
+    buffer: List[str] = []
+
+    def flush():
+        line = _WHITESPACE_RE.sub(' ', ''.join(buffer)).strip()
+        if line:
+            lines.append(line)
+        buffer.clear()
+
+    stack = [(root, False)]
+    while stack:
+        node, closing = stack.pop()
+        if closing:
+            if node.tag in _BLOCK_TAGS:
+                flush()
+            if node.tail and node is not root:
+                buffer.append(node.tail)
+            continue
+
+        if node.tag in _BLOCK_TAGS or node.tag == 'br':
+            flush()
+        if node.tag == 'pre':
+            lines.extend(line.rstrip() for line in node.text_content().split('\n') if line.strip())
+        elif node.tag != 'br':
+            if node.text:
+                buffer.append(node.text)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node) if isinstance(child.tag, str))
+            continue
+        if node.tail and node is not root:
+            buffer.append(node.tail)
+    flush()
+
+
+def extract_with_lxml(html: bytes, url: str, charset: Optional[str] = None) -> Optional[str]:
+    """
+    使用 lxml 单次解析提取正文
+
+    解析一次后在同一棵树上删除无关元素、为候选节点打分 (与 readability 的算法思路相同),
+    直接从选出的节点生成文本行。
+
+    Args:
+        html: 原始 HTML 字节
+        url: 网页 URL (仅用于日志)
+        charset: 响应头声明的字符集,优先于 <meta charset>
+
+    Returns:
+        Optional[str]: 正文内容,过短时返回 None
+    """
+    doc = _parse(html, charset)
+    if doc is None:
+        logger.warning(f"无法解析网页: {url}")
+        return None
+
+    _remove_boilerplate(doc)
+    lines: List[str] = []
+    for node in _select_content(doc):
+        _render_lines(node, lines)
+    clean_text = '\n'.join(lines)
+
+    if len(clean_text) < MIN_TEXT_LENGTH:
+        logger.warning(f"提取的内容过短 ({len(clean_text)} 字): {url}")
+        return None
+
+    return clean_text
+
+
+def extract_with_readability(html: bytes, url: str, charset: Optional[str] = None) -> Optional[str]:
+    """
+    使用 readability + BeautifulSoup 从 HTML 中提取正文
+
+    Args:
+        html: 原始 HTML 字节
+        url: 网页 URL (仅用于日志)
+        charset: 响应头声明的字符集,没有时由 readability 自行识别编码
+
+    Returns:
+        Optional[str]: 正文内容,过短时返回 None
+    """
+    # 使用 readability 提取正文 (响应头声明了字符集时先按其解码)
+    encoding = _lookup_encoding(charset)
+    doc = Document(html.decode(encoding, errors='replace') if encoding else html)
+    html_content = doc.summary()
+
+    # 使用 BeautifulSoup 清洗 HTML
+    soup = BeautifulSoup(html_content, 'lxml')
+
+    # 移除脚本和样式
+    for tag in soup(['script', 'style', 'nav', 'footer', 'aside']):
+        tag.decompose()
+
+    # 提取文本
+    text = soup.get_text(separator='\n', strip=True)
+
+    # 清洗空行
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    clean_text = '\n'.join(lines)
+
+    if len(clean_text) < MIN_TEXT_LENGTH:
+        logger.warning(f"提取的内容过短 ({len(clean_text)} 字): {url}")
+        return None
+
+    return clean_text
+
+
+EXTRACTORS: Dict[str, Callable[[bytes, str, Optional[str]], Optional[str]]] = {
+    'lxml': extract_with_lxml,
+    'readability': extract_with_readability,
+}
+
+
+def extract_text(html: bytes, url: str, engine: str = 'lxml', charset: Optional[str] = None) -> Optional[str]:
+    """
+    使用指定引擎提取正文
+
+    Args:
+        html: 原始 HTML 字节
+        url: 网页 URL (仅用于日志)
+        engine: 提取引擎名称 (lxml / readability),未知名称时使用 lxml
+        charset: 响应头声明的字符集
+
+    Returns:
+        Optional[str]: 正文内容,过短时返回 None
+    """
+    extractor = EXTRACTORS.get(engine)
+    if extractor is None:
+        logger.warning(f"未知的正文提取引擎 {engine},使用 lxml")
+        extractor = extract_with_lxml
+    return extractor(html, url, charset)
+
+
+class ExtractionPool:
+    """
+    正文提取进程池
+
+    正文打分和文本清洗是纯 Python 的 CPU 工作,在抓取线程中执行会争抢 GIL,
+    下载完成后增加线程数不再提速。抓取线程只负责下载,把原始字节交给子进程提取、取回正文,
+    批量抓取时提取可以利用多个 CPU 核心。子进程按需启动 (spawn),进程池损坏时
+    (如子进程被系统终止) 重新创建,本次改在调用线程中提取。
+    小于 inline_bytes 的网页提取很快,进程间传输反而更慢,直接在调用线程中提取。
+    """
+
+    def __init__(self, processes: int, engine: str = 'lxml', inline_bytes: int = 32 * 1024):
+        """
+        初始化进程池
+
+        Args:
+            processes: 子进程数,小于等于 0 时在调用线程中直接提取
+            engine: 提取引擎名称
+            inline_bytes: 小于该字节数的网页在调用线程中提取
+        """
+        self.processes = processes
+        self.engine = engine
+        self.inline_bytes = inline_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """丢弃损坏的进程池,下次提取时重新创建"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, html: bytes, url: str, charset: Optional[str] = None) -> Optional[str]:
+        """
+        提取正文 (在子进程中执行,阻塞等待结果)
+
+        Args:
+            html: 原始 HTML 字节
+            url: 网页 URL (仅用于日志)
+            charset: 响应头声明的字符集
+
+        Returns:
+            Optional[str]: 正文内容,过短时返回 None
+        """
+        executor = self._get_executor() if len(html) >= self.inline_bytes else None
+        if executor is None:
+            return extract_text(html, url, self.engine, charset)
+        try:
+            return executor.submit(extract_text, html, url, self.engine, charset).result()
+        except BrokenProcessPool:
+            logger.warning(f"正文提取进程池已损坏,重新创建: {url}")
+            self._discard(executor)
+            return extract_text(html, url, self.engine, charset)
+
+    async def extract_async(self, html: bytes, url: str, charset: Optional[str] = None) -> Optional[str]:
+        """异步版 extract,进程池被禁用时在线程中提取,不阻塞事件循环"""
+        executor = self._get_executor() if len(html) >= self.inline_bytes else None
+        if executor is None:
+            return await asyncio.to_thread(extract_text, html, url, self.engine, charset)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, extract_text, html, url, self.engine, charset
+            )
+        except BrokenProcessPool:
+            logger.warning(f"正文提取进程池已损坏,重新创建: {url}")
+            self._discard(executor)
+            return await asyncio.to_thread(extract_text, html, url, self.engine, charset)
+
+    def shutdown(self):
+        """关闭子进程"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_pool: Optional[ExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """获取进程内共享的正文提取进程池 (按 EXTRACT_PROCESSES 和 EXTRACTOR 配置)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool(config.EXTRACT_PROCESSES, config.EXTRACTOR)
+        return _pool
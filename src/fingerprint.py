@@ -0,0 +1,319 @@
+"""
+近似重复检测模块
+为图片计算感知哈希 (dHash)、为网页正文计算 SimHash,按汉明距离查找近似重复的条目,
+索引保存在 SQLite 中,跨笔记复用已有的识别和总结结果
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from config import config
+from src.selector import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Markdown 链接/图片 (Jina 输出中的导航、目录、相关文章多为链接列表)
+_MD_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_LIST_MARK_RE = re.compile(r'^(?:[-*+>|#]+|\d+[.)])\s*')
+# Jina Reader 输出开头的元信息行
+_JINA_META_RE = re.compile(r'^(?:Title|URL Source|Published Time|Markdown Content|Warning):')
+# 去掉链接后短于该字数的行 (菜单项、按钮、面包屑) 不计入正文
+_MIN_BODY_LINE = 20
+
+
+def dhash(image: Image.Image, size: int = 32) -> int:
+    """
+    计算图片的差值哈希 (dHash)
+
+    缩小为 (size+1) x size 的灰度图,逐行比较相邻像素的明暗,
+    得到 size*size 位的哈希。对缩放、重新压缩和轻微调色不敏感。
+    8x8 的哈希区分不了文字不同的深色终端/代码截图,默认使用 32x32。
+
+    Args:
+        image: 图片
+        size: 哈希边长,默认得到 1024 位哈希
+
+    Returns:
+        int: 哈希值
+    """
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """
+    计算文本的 64 位 SimHash
+
+    以相邻 shingle 个词 (中文为相邻两字) 为特征、出现次数为权重。
+    转载、AMP 页面等正文基本相同的网页得到的哈希只相差少数几位。
+
+    Args:
+        text: 网页正文
+        shingle: 每个特征包含的词数
+
+    Returns:
+        int: 哈希值
+    """
+    terms = tokenize(text)
+    if len(terms) > shingle:
+        features = Counter(' '.join(terms[i:i + shingle]) for i in range(len(terms) - shingle + 1))
+    else:
+        features = Counter(terms)
+
+    weights = [0] * 64
+    for feature, count in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += count if digest >> bit & 1 else -count
+
+    value = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def page_body(text: str) -> str:
+    """
+    去掉样板行后的网页正文
+
+    跳过 Jina 的元信息行、以链接为主的行 (导航、侧边栏、目录、相关文章) 和过短的行,
+    同一站点不同页面共有的这些内容不参与 SimHash。
+    """
+    lines = []
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if not line or _JINA_META_RE.match(line):
+            continue
+        link_chars = sum(len(label) for label in _MD_LINK_RE.findall(line))
+        plain = _LIST_MARK_RE.sub('', _MD_LINK_RE.sub(r'\1', line)).strip()
+        if len(plain) < _MIN_BODY_LINE or link_chars * 2 >= len(plain):
+            continue
+        lines.append(plain)
+    return '\n'.join(lines)
+
+
+def page_title(text: str) -> str:
+    """网页标题: Jina 输出的 Title 行,否则为正文第一行"""
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if line.startswith('Title:'):
+            return line[len('Title:'):].strip()
+        if line:
+            return _LIST_MARK_RE.sub('', _MD_LINK_RE.sub(r'\1', line)).strip()[:200]
+    return ''
+
+
+def titles_match(a: str, b: str) -> bool:
+    """标题是否指向同一篇文章: 较短标题的大部分词出现在另一个标题中 (允许转载页附加站点名等)"""
+    terms_a, terms_b = set(tokenize(a)), set(tokenize(b))
+    if not terms_a or not terms_b:
+        return False
+    return len(terms_a & terms_b) >= 0.6 * min(len(terms_a), len(terms_b))
+
+
+@dataclass(frozen=True)
+class PageSignature:
+    """网页的近似重复签名"""
+    simhash: int  # 去掉样板行后正文的 SimHash
+    title: str  # 标题,SimHash 相近时再核对标题
+
+
+def page_signature(text: str, min_terms: Optional[int] = None) -> Optional[PageSignature]:
+    """
+    计算网页的近似重复签名
+
+    Args:
+        text: 抓取的网页正文
+        min_terms: 正文至少包含的不同词数,默认 PAGE_DEDUP_MIN_TERMS
+
+    Returns:
+        Optional[PageSignature]: 签名;去掉样板后正文过少 (SimHash 不可靠) 时返回 None,不参与去重
+    """
+    body = page_body(text)
+    if len(set(tokenize(body))) < (config.PAGE_DEDUP_MIN_TERMS if min_terms is None else min_terms):
+        return None
+    return PageSignature(simhash(body), page_title(text))
+
+
+def hamming(a: int, b: int) -> int:
+    """两个哈希的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+class HashIndex:
+    """
+    近似重复索引
+
+    每个条目为 (命名空间, 哈希, 值),命名空间用于区分模型等。
+    查询时在内存中线性扫描同一命名空间下的哈希,返回距离不超过阈值的最近条目;
+    条目同时写入 SQLite,重启后仍可复用。超过上限时淘汰最早写入的条目。
+    """
+
+    def __init__(self, path: Optional[str], max_distance: int, max_entries: int = 20000):
+        """
+        初始化索引
+
+        Args:
+            path: SQLite 数据库文件路径,None 表示只保存在内存中
+            max_distance: 视为近似重复的最大汉明距离
+            max_entries: 最多保留的条目数
+        """
+        self.path = path
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._entries: Deque[Tuple[str, int, Any]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path is None:
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, "
+            "hash TEXT NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        for namespace, value_hash, value in self._conn.execute(
+            "SELECT namespace, hash, value FROM hashes ORDER BY id"
+        ):
+            # 哈希以十六进制文本保存,避免超出 SQLite 有符号整数范围
+            self._entries.append((namespace, int(value_hash, 16), json.loads(value)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(
+        self,
+        namespace: str,
+        value_hash: int,
+        accept: Optional[Callable[[Any], bool]] = None
+    ) -> Optional[Any]:
+        """
+        查找近似重复的条目
+
+        Args:
+            namespace: 命名空间
+            value_hash: 哈希值
+            accept: 二次核对条目的值,返回 False 的条目不参与匹配
+
+        Returns:
+            Optional[Any]: 距离最近且不超过阈值的条目的值,没有时返回 None
+        """
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            for known_namespace, known, value in self._entries:
+                if known_namespace != namespace:
+                    continue
+                if accept is not None and not accept(value):
+                    continue
+                distance = hamming(known, value_hash)
+                if distance < best_distance:
+                    best, best_distance = value, distance
+            return best
+
+    def add(self, namespace: str, value_hash: int, value: Any):
+        """写入一个条目"""
+        with self._lock:
+            self._entries.append((namespace, value_hash, value))
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT INTO hashes (namespace, hash, value) VALUES (?, ?, ?)",
+                (namespace, format(value_hash, 'x'), json.dumps(value, ensure_ascii=False))
+            )
+            if len(self._entries) == self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM hashes WHERE id NOT IN (SELECT id FROM hashes ORDER BY id DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+
+class InflightHashes:
+    """
+    一次运行中正在识别的图片 (或正在总结的网页)
+
+    第一个出现的条目成为负责处理的一方,之后出现的近似重复条目
+    等待它的结果 (Future,线程中用 result(),协程中用 asyncio.wrap_future)。
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._items: List[Tuple[int, Any, Future]] = []
+        self._lock = threading.Lock()
+
+    def claim(
+        self,
+        value_hash: int,
+        tag: Any = None,
+        accept: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Future, bool]:
+        """
+        登记一个条目
+
+        Args:
+            value_hash: 条目的哈希 (图片的感知哈希、网页的 SimHash)
+            tag: 随条目登记的附加信息 (如网页标题)
+            accept: 哈希相近时再用已登记条目的 tag 核对,返回 False 时不视为重复
+
+        Returns:
+            (future, is_owner): is_owner 为 True 时调用方负责处理并设置 future 的结果,
+                否则等待 future 即可得到近似重复条目的结果
+        """
+        with self._lock:
+            for known, known_tag, future in self._items:
+                if hamming(known, value_hash) <= self.max_distance and (accept is None or accept(known_tag)):
+                    return future, False
+            future = Future()
+            self._items.append((value_hash, tag, future))
+            return future, True
+
+
+_indexes: Dict[str, HashIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(name: str, max_distance: int) -> Optional[HashIndex]:
+    """获取进程内共享的命名索引 (位于 CACHE_DIR 下),缓存被禁用时返回 None"""
+    if not config.CACHE_ENABLED:
+        return None
+
+    path = os.path.join(config.CACHE_DIR, f"{name}.sqlite3")
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = HashIndex(path, max_distance)
+            _indexes[path] = index
+        return index
+
+
+def get_image_hash_index() -> Optional[HashIndex]:
+    """获取图片感知哈希索引,缓存被禁用时返回 None"""
+    # 哈希从 64 位改为 1024 位后使用新的索引文件
+    return _get_index("image_dhash", config.IMAGE_HASH_DISTANCE)
+
+
+def get_page_hash_index() -> Optional[HashIndex]:
+    """获取网页正文 SimHash 索引,缓存被禁用时返回 None"""
+    return _get_index("page_hashes", config.PAGE_SIMHASH_DISTANCE)
@@ -0,0 +1,182 @@
+"""
+对冲请求模块
+请求耗时超过近期延迟的指定分位数时再发一个相同的请求,采用先返回的结果,
+用少量额外请求削减长尾延迟
+"""
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+    """记录最近若干次调用的耗时,计算分位数"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一次成功调用的耗时"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        计算耗时分位数
+
+        Args:
+            p: 分位 (0-100)
+
+        Returns:
+            Optional[float]: 分位数耗时(秒),没有样本时返回 None
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * p / 100))
+        return samples[index]
+
+
+class Hedger:
+    """
+    对冲请求执行器
+
+    每类调用 (如图片分析、文本总结) 分别统计延迟。调用超过该类延迟的
+    percentile 分位数仍未返回时,在预算允许的情况下发出一个副本请求,
+    先成功的结果胜出,另一个能取消则取消,否则忽略其结果。
+    额外请求数不超过总调用数的 budget 比例。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        max_workers: int = 32
+    ):
+        """
+        初始化对冲执行器
+
+        Args:
+            percentile: 触发对冲的延迟分位 (0-100)
+            budget: 额外请求数占总调用数的上限比例
+            min_samples: 样本数达到该值后才开始对冲
+            max_workers: 执行请求的线程数
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def tracker(self, key: str) -> LatencyTracker:
+        """获取某类调用的延迟统计"""
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = LatencyTracker()
+            return tracker
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """触发对冲前等待的时间,样本不足时返回 None (不对冲)"""
+        tracker = self.tracker(key)
+        if len(tracker) < self.min_samples:
+            return None
+        return tracker.percentile(self.percentile)
+
+    def _take_budget(self) -> bool:
+        """预算允许时占用一次对冲名额"""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def _submit(self, func: Callable[[], T], key: str) -> Future:
+        """提交一次请求,成功时记录其耗时"""
+        start = time.monotonic()
+        tracker = self.tracker(key)
+
+        def record(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                tracker.record(time.monotonic() - start)
+
+        future = self._executor.submit(func)
+        future.add_done_callback(record)
+        return future
+
+    def call(self, func: Callable[[], T], key: str) -> T:
+        """
+        执行 func,超过对冲阈值仍未返回时发出副本请求
+
+        Args:
+            func: 无参数的调用,可以被安全地重复执行
+            key: 调用类别,用于分别统计延迟
+
+        Returns:
+            先成功返回的结果;全部失败时抛出原始请求的异常
+        """
+        with self._lock:
+            self.calls += 1
+
+        primary = self._submit(func, key)
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+
+        logger.info(f"{key} 超过 {delay:.1f}s 未返回,发出对冲请求")
+        hedge = self._submit(func, key)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                for other in pending:
+                    other.cancel()
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                    logger.info(f"{key} 对冲请求先返回")
+                return future.result()
+
+        return primary.result()
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """获取进程内共享的对冲执行器 (延迟统计跨客户端实例累积)"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger(
+                percentile=config.HEDGE_PERCENTILE,
+                budget=config.HEDGE_BUDGET,
+                min_samples=config.HEDGE_MIN_SAMPLES,
+                max_workers=config.MODEL_MAX_CONCURRENCY * 2
+            )
+        return _hedger
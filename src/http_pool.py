@@ -0,0 +1,170 @@
+"""
+HTTP 连接池模块
+进程内共享的 requests 会话: 按主机复用 keep-alive 连接,限制每个主机的并发请求数,
+并统计连接复用情况。多个整合器实例以及 Streamlit 重新运行时共用同一个连接池
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    """连接池统计信息"""
+    requests: int = 0  # 发出的请求数
+    connections: int = 0  # 当前各主机连接池累计新建的连接数
+    pool_requests: int = 0  # 当前各主机连接池累计处理的请求数
+    hosts: int = 0  # 当前保留连接池的主机数
+    host_waits: int = 0  # 因主机并发已满而等待的次数
+    wait_seconds: float = 0.0  # 等待主机并发名额的总时间
+
+    @property
+    def reuse_rate(self) -> float:
+        """请求复用已有连接的比例"""
+        if not self.pool_requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.pool_requests)
+
+
+class HttpPool:
+    """
+    共享的 HTTP 会话
+
+    所有请求通过同一个 requests.Session 发出,底层 urllib3 按主机维护连接池
+    (最多 pool_hosts 个主机,每个主机保留 pool_maxsize 个空闲连接)。
+    每个主机另有一个信号量,同时进行中的请求不超过 max_per_host,
+    例如大量 Jina 后备请求不会同时打到 r.jina.ai。
+    重试由调用方的 RetryPolicy 负责,连接池本身不重试。
+    """
+
+    def __init__(self, pool_hosts: int = 50, pool_maxsize: int = 10, max_per_host: int = 8):
+        """
+        初始化连接池
+
+        Args:
+            pool_hosts: 保留连接池的主机数上限
+            pool_maxsize: 每个主机保留的空闲连接数
+            max_per_host: 每个主机同时进行中的请求上限
+        """
+        self.max_per_host = max_per_host
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._host_waits = 0
+        self._wait_seconds = 0.0
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        """获取 URL 所属主机的并发名额"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    @contextmanager
+    def _acquire(self, url: str) -> Iterator[None]:
+        """占用 URL 所属主机的并发名额,并统计等待情况"""
+        slot = self._slot(url)
+        if not slot.acquire(blocking=False):
+            start = time.monotonic()
+            slot.acquire()
+            with self._lock:
+                self._host_waits += 1
+                self._wait_seconds += time.monotonic() - start
+        try:
+            with self._lock:
+                self._requests += 1
+            yield
+        finally:
+            slot.release()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        发出 GET 请求
+
+        Args:
+            url: 请求地址
+            **kwargs: 传给 requests.Session.get 的参数 (headers、timeout 等)
+
+        Returns:
+            requests.Response: 响应 (响应体已读取完毕)
+        """
+        with self._acquire(url):
+            return self.session.get(url, **kwargs)
+
+    @contextmanager
+    def stream(self, url: str, **kwargs) -> Iterator[requests.Response]:
+        """
+        发出流式 GET 请求,在 with 块内按需读取响应体
+
+        读取期间一直占用该主机的并发名额;退出 with 块时关闭响应,
+        没有读完的连接直接丢弃,不会放回连接池。
+
+        Args:
+            url: 请求地址
+            **kwargs: 传给 requests.Session.get 的参数 (headers、timeout 等)
+
+        Yields:
+            requests.Response: 尚未读取响应体的响应
+        """
+        with self._acquire(url):
+            response = self.session.get(url, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def stats(self) -> PoolStats:
+        """获取统计信息"""
+        connections = 0
+        pool_requests = 0
+        pools = self.adapter.poolmanager.pools
+        keys = pools.keys()
+        for key in keys:
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        with self._lock:
+            return PoolStats(
+                requests=self._requests,
+                connections=connections,
+                pool_requests=pool_requests,
+                hosts=len(keys),
+                host_waits=self._host_waits,
+                wait_seconds=self._wait_seconds
+            )
+
+
+_pool: Optional[HttpPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    """获取进程内共享的 HTTP 连接池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HttpPool(
+                pool_hosts=config.HTTP_POOL_HOSTS,
+                pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                max_per_host=config.HTTP_MAX_PER_HOST
+            )
+        return _pool
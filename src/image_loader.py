@@ -0,0 +1,260 @@
+"""
+图片预处理模块
+在本地读取或下载图片,缩小到指定最长边并重新压缩,
+以 base64 data URL 发送给视觉模型,同时支持笔记中的本地相对路径图片
+"""
+import io
+import mmap
+import base64
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import List, Optional, Union
+from urllib.parse import urlsplit, unquote
+from urllib.request import url2pathname
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image, UnidentifiedImageError
+
+from config import config
+from src.fingerprint import dhash
+from src.http_pool import get_http_pool
+from src.retry import RetryPolicy
+from src.web_scraper import CHUNK_SIZE, BodyReader, UnsupportedContent, check_response_headers
+
+logger = logging.getLogger(__name__)
+
+IMAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/png,image/jpeg,*/*;q=0.8',
+}
+
+# 无法解码时可以原样发送的格式
+PASSTHROUGH_TYPES = {'image/png', 'image/jpeg'}
+
+
+def is_remote_url(url: str) -> bool:
+    """判断是否为网络图片"""
+    return urlsplit(url).scheme in ('http', 'https')
+
+
+def _data_url(data: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+@dataclass
+class LoadedImage:
+    """预处理后的图片"""
+    url: str  # 发送给视觉模型的地址 (通常为 data URL)
+    phash: Optional[int] = None  # 感知哈希,没有拿到图片内容时为 None
+    digest: Optional[str] = None  # 原始图片内容的 SHA-256,跨笔记复用描述前核对
+
+
+def prepare_image(data: bytes, max_edge: int, quality: int) -> Optional[LoadedImage]:
+    """
+    缩小并重新压缩图片,同时计算感知哈希
+
+    最长边超过 max_edge 时等比缩小;不透明的图片 (包括大部分 PNG 截图) 转为 JPEG,
+    带透明区域的图片保留 PNG。重新压缩后反而更大且无需缩小时使用原图。
+
+    Args:
+        data: 图片原始字节
+        max_edge: 最长边像素上限
+        quality: JPEG 压缩质量 (1-95)
+
+    Returns:
+        Optional[LoadedImage]: 预处理结果,无法解码时返回 None
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        logger.warning(f"无法解码图片: {str(e)}")
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()
+    original_type = Image.MIME.get(image.format or '')
+    resized = max(image.size) > max_edge
+    if resized:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    phash = dhash(image)
+
+    transparent = False
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        transparent = image.getchannel('A').getextrema()[0] < 255
+
+    buffer = io.BytesIO()
+    if transparent:
+        image.save(buffer, format='PNG', optimize=True)
+        mime_type = 'image/png'
+    else:
+        image.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+        mime_type = 'image/jpeg'
+    encoded = buffer.getvalue()
+
+    if not resized and original_type in PASSTHROUGH_TYPES and len(data) <= len(encoded):
+        return LoadedImage(_data_url(data, original_type), phash, digest)
+    return LoadedImage(_data_url(encoded, mime_type), phash, digest)
+
+
+def encode_image(data: bytes, max_edge: int, quality: int) -> Optional[str]:
+    """缩小并重新压缩图片,返回 data URL,无法解码时返回 None"""
+    prepared = prepare_image(data, max_edge, quality)
+    return prepared.url if prepared else None
+
+
+class ImageLoader:
+    """
+    图片加载器
+
+    网络图片下载一次,本地图片通过 mmap 读取 (相对路径相对于笔记所在目录),
+    预处理后得到可以直接发送给视觉模型的 data URL。本地图片只能位于笔记目录之内,
+    不知道笔记目录时 (如 Web 界面上传的笔记) 不读取本地图片。
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[Union[str, Path]] = None,
+        max_edge: int = config.IMAGE_MAX_EDGE,
+        quality: int = config.IMAGE_JPEG_QUALITY,
+        max_workers: int = 8
+    ):
+        """
+        初始化图片加载器
+
+        Args:
+            base_dir: 笔记所在目录,默认 IMAGE_BASE_DIR;都为空时不读取本地图片
+            max_edge: 图片最长边像素上限
+            quality: JPEG 压缩质量
+            max_workers: load_many 并发加载的线程数
+        """
+        base_dir = base_dir or config.IMAGE_BASE_DIR
+        self.base_dir = Path(base_dir).resolve() if base_dir else None
+        self.max_edge = max_edge
+        self.quality = quality
+        self.max_workers = max_workers
+        self.timeout = config.REQUEST_TIMEOUT
+        self.max_bytes = int(config.IMAGE_MAX_DOWNLOAD_MB * 1024 * 1024)
+        self.http = get_http_pool()
+        self.retry_policy = RetryPolicy(deadline=config.SCRAPE_RETRY_DEADLINE)
+
+    def resolve_path(self, url: str) -> Optional[Path]:
+        """
+        把本地图片地址 (相对路径、绝对路径或 file:// URL) 解析为文件路径
+
+        Returns:
+            Optional[Path]: 解析后的绝对路径;不知道笔记目录,或路径 (包括 .. 和符号链接)
+                指向笔记目录之外时返回 None
+        """
+        if self.base_dir is None:
+            return None
+        parts = urlsplit(url)
+        if parts.scheme == 'file':
+            path = Path(url2pathname(parts.path))
+        else:
+            path = Path(unquote(parts.path if parts.scheme == '' else url))
+        path = (self.base_dir / path).resolve()
+        return path if path.is_relative_to(self.base_dir) else None
+
+    def source_id(self, url: str) -> str:
+        """
+        图片来源标识,用作缓存键
+
+        网络图片和 data URL 为原地址;本地图片为解析后的绝对路径加修改时间和大小,
+        替换图片文件或不同目录下的同名图片不会得到相同标识。
+        """
+        if url.startswith('data:') or is_remote_url(url):
+            return url
+        path = self.resolve_path(url)
+        if path is None:
+            return url
+        try:
+            stat = path.stat()
+        except OSError:
+            return path.as_uri()
+        return f"{path.as_uri()}#{stat.st_mtime_ns}-{stat.st_size}"
+
+    def load(self, url: str) -> Optional[LoadedImage]:
+        """
+        加载并预处理一张图片
+
+        Args:
+            url: 笔记中的图片地址
+
+        Returns:
+            Optional[LoadedImage]: 发送给视觉模型的图片。通常为 data URL;
+                网络图片下载失败时为原 URL (交给模型服务端获取,没有感知哈希);
+                本地图片不存在、无法读取或不在笔记目录内时返回 None
+        """
+        if url.startswith('data:'):
+            return LoadedImage(url)
+
+        if is_remote_url(url):
+            data = self._download(url)
+            if data is None:
+                return LoadedImage(url)
+            return prepare_image(data, self.max_edge, self.quality) or LoadedImage(url)
+
+        path = self.resolve_path(url)
+        if path is None:
+            logger.warning(f"跳过笔记目录之外的本地图片 (或未知笔记目录): {url}")
+            return None
+        data = self._read_local(path)
+        if data is None:
+            return None
+        prepared = prepare_image(data, self.max_edge, self.quality)
+        if prepared is None:
+            mime_type = mimetypes.guess_type(path.name)[0]
+            if mime_type not in PASSTHROUGH_TYPES:
+                logger.warning(f"不支持的本地图片格式: {path}")
+                return None
+            prepared = LoadedImage(_data_url(data, mime_type))
+        return prepared
+
+    def load_many(self, urls: List[str]) -> List[Optional[LoadedImage]]:
+        """并发加载多张图片,结果与输入顺序一致"""
+        if len(urls) <= 1:
+            return [self.load(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(self.load, urls))
+
+    def _read_local(self, path: Path) -> Optional[bytes]:
+        """通过 mmap 读取本地图片"""
+        try:
+            with open(path, 'rb') as f:
+                if path.stat().st_size == 0:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return bytes(mapped)
+        except OSError as e:
+            logger.warning(f"无法读取本地图片 ({path}): {str(e)}")
+            return None
+
+    def _download(self, url: str) -> Optional[bytes]:
+        """
+        流式下载网络图片
+
+        声明的长度或实际读到的字节数超过 IMAGE_MAX_DOWNLOAD_MB 时放弃下载
+        (截断的图片无法解码),改由模型服务端获取。
+        """
+        def attempt(timeout: float) -> bytes:
+            with self.http.stream(url, headers=IMAGE_HEADERS, timeout=timeout) as response:
+                response.raise_for_status()
+                check_response_headers(response.headers, self.max_bytes, allowed_types=None)
+                reader = BodyReader(url, self.max_bytes, stop_at_html_end=False)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if reader.feed(chunk):
+                        break
+                if reader.truncated:
+                    raise UnsupportedContent(f"图片超过 {self.max_bytes} 字节")
+                return reader.getvalue()
+
+        try:
+            return self.retry_policy.call(attempt, f"下载图片 {url[:50]}", self.timeout)
+        except Exception as e:
+            logger.warning(f"图片下载失败,改由模型服务端获取 ({url}): {str(e)}")
+            return None
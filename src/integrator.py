@@ -3,16 +3,205 @@
 协调各模块,完成笔记到文章的转换流程
 """
 import logging
-from typing import Optional, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+import asyncio
+import threading
+from pathlib import Path
+from typing import Optional, Callable, Dict, Tuple, List, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
 
+import aiohttp
+
+from config import config
+from src.cache import (
+    DiskCache, image_fingerprint, content_fingerprint, get_vision_cache, get_summary_cache
+)
+from src.fingerprint import (
+    HashIndex, InflightHashes, PageSignature, get_image_hash_index, get_page_hash_index, page_signature, hamming,
+    titles_match
+)
+from src.image_loader import ImageLoader, LoadedImage
+from src.manifest import NoteManifest
+from src.run_journal import RunJournal
 from src.parser import MarkdownParser, ParsedContent
-from src.zhipu_client import ZhipuClient
-from src.web_scraper import WebScraper
+from src.selector import select_relevant, estimate_text_tokens
+from src.sections import Section, split_sections, normalize_section, stitch_sections
+from src.zhipu_client import (
+    ZhipuClient, AsyncZhipuClient, IMAGE_FAILURE_PREFIX, SUMMARY_FAILURE_PREFIX, SUMMARY_PROMPT_VERSION
+)
+from src.web_scraper import WebScraper, AsyncWebScraper
 
 logger = logging.getLogger(__name__)
 
+# 链接处理失败时的占位总结
+LINK_FETCH_FAILED = '[内容抓取失败]'
+LINK_PROCESS_FAILED = '[内容获取失败]'
+
+
+def _build_image_prompt(img: dict) -> str:
+    """构建单张图片的分析提示词"""
+    context = img.get('context', '')
+    return f"""请描述这张图片的内容,要求:
+1. 简洁专业,100字以内
+2. 适合作为图片说明插入文章
+3. 如果图片与上下文相关,请结合上下文理解
+
+上下文: {context[:100] if context else '无'}
+"""
+
+
+def _vision_cache_lookup(
+    cache: Optional[DiskCache],
+    img: dict,
+    prompt: str,
+    model: str,
+    loader: Optional[ImageLoader] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    查询视觉缓存
+
+    本地图片按解析后的路径、修改时间和大小作为键 (见 ImageLoader.source_id),
+    未启用图片预处理时按原地址。
+
+    Returns:
+        (key, description): 缓存键和命中的描述,未启用缓存时 key 为 None
+    """
+    if cache is None:
+        return None, None
+
+    source = loader.source_id(img['url']) if loader is not None else img['url']
+    key = DiskCache.make_key(image_fingerprint(source), prompt, model)
+    description = cache.get(key)
+    if description is not None:
+        logger.info(f"视觉缓存命中: {img['url'][:50]}...")
+    return key, description
+
+
+def _image_fallback(img: dict) -> str:
+    """图片无法识别时使用 alt 文本作为描述"""
+    return f"[图片: {img.get('alt', '无描述')}]"
+
+
+def _hash_index_lookup(index: Optional[HashIndex], loaded: LoadedImage, model: str) -> Optional[str]:
+    """
+    在感知哈希索引中查找其他笔记中同一张图片的描述
+
+    感知哈希只用来缩小范围,原始内容的摘要也相同时才复用:
+    文字不同的终端/代码截图感知哈希可能非常接近,误用的描述会被之后所有相似截图继续复用。
+    """
+    if index is None or loaded.digest is None:
+        return None
+    entry = index.find(
+        model, loaded.phash,
+        accept=lambda value: isinstance(value, dict) and value.get('digest') == loaded.digest
+    )
+    if entry is None:
+        return None
+    logger.info(f"感知哈希命中,复用相同图片的描述 ({loaded.digest[:16]})")
+    return entry['description']
+
+
+def _hash_index_store(index: Optional[HashIndex], loaded: LoadedImage, model: str, description: str):
+    """写入感知哈希索引 (失败的占位结果不写入)"""
+    if index is not None and loaded.digest is not None and not description.startswith(IMAGE_FAILURE_PREFIX):
+        index.add(model, loaded.phash, {'digest': loaded.digest, 'description': description})
+
+
+def _make_inflight_hashes() -> Optional[InflightHashes]:
+    """创建本次运行的近似重复图片登记表,未启用去重时返回 None"""
+    return InflightHashes(config.IMAGE_HASH_DISTANCE) if config.IMAGE_DEDUP_ENABLED else None
+
+
+def _make_inflight_pages() -> Optional[InflightHashes]:
+    """创建本次运行的近似重复网页登记表,未启用去重时返回 None"""
+    return InflightHashes(config.PAGE_SIMHASH_DISTANCE) if config.PAGE_DEDUP_ENABLED else None
+
+
+def _fail_inflight(future: Future, error: BaseException):
+    """
+    负责者失败时通知等待近似重复结果的一方
+
+    协程被取消 (CancelledError 不是 Exception) 时转为普通异常,等待方按处理失败兜底,不会一直等待。
+    """
+    if not isinstance(error, Exception):
+        error = RuntimeError(f"近似重复内容的处理被中断 ({type(error).__name__})")
+    future.set_exception(error)
+
+
+def _make_image_loader(base_dir: Optional[str]) -> Optional[ImageLoader]:
+    """创建图片加载器,未启用图片预处理时返回 None (直接把原 URL 交给模型)"""
+    return ImageLoader(base_dir) if config.IMAGE_PREPROCESS_ENABLED else None
+
+
+def _vision_cache_store(cache: Optional[DiskCache], key: Optional[str], description: str):
+    """写入视觉缓存 (失败的占位结果不缓存)"""
+    if cache is not None and key is not None and not description.startswith(IMAGE_FAILURE_PREFIX):
+        cache.set(key, description)
+
+
+def _summary_cache_lookup(cache: Optional[DiskCache], content: str, context: str, model: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    查询总结缓存 (按正文内容哈希,与 URL 无关)
+
+    Returns:
+        (key, summary): 缓存键和命中的总结,未启用缓存时 key 为 None
+    """
+    if cache is None:
+        return None, None
+
+    key = DiskCache.make_key(content_fingerprint(content), context, model, SUMMARY_PROMPT_VERSION)
+    summary = cache.get(key)
+    if summary is not None:
+        logger.info("总结缓存命中,跳过模型调用")
+    return key, summary
+
+
+def _summary_cache_store(cache: Optional[DiskCache], key: Optional[str], summary: str):
+    """写入总结缓存 (失败的占位结果不缓存)"""
+    if cache is not None and key is not None and not summary.startswith(SUMMARY_FAILURE_PREFIX):
+        cache.set(key, summary, tag=SUMMARY_PROMPT_VERSION)
+
+
+def _is_failed_image(result: dict) -> bool:
+    """判断图片结果是否为失败占位 (图片分析失败或 alt 文本兜底)"""
+    return result['description'].startswith('[图片')
+
+
+def _is_failed_link(result: dict) -> bool:
+    """判断链接结果是否为失败占位"""
+    summary = result['summary']
+    return summary in (LINK_FETCH_FAILED, LINK_PROCESS_FAILED) or summary.startswith(SUMMARY_FAILURE_PREFIX)
+
+
+def _select_content(link: dict, content: str) -> str:
+    """按与链接标题和上下文的相关度挑选正文段落,控制总结的输入长度"""
+    query = f"{link.get('title', '')} {link.get('context', '')}"
+    return select_relevant(content, query, config.SUMMARY_INPUT_TOKENS)
+
+
+def _image_result(img: dict, description: str) -> dict:
+    """构建图片处理结果"""
+    return {
+        'url': img['url'],
+        'alt': img.get('alt', ''),
+        'description': description,
+        'context': img.get('context', '')
+    }
+
+
+def _link_result(link: dict, summary: str) -> dict:
+    """构建链接处理结果"""
+    return {
+        'url': link['url'],
+        'title': link.get('title', ''),
+        'summary': summary,
+        'context': link.get('context', '')
+    }
+
+
+class IncompleteArticle(Exception):
+    """流式生成文章时中途失败,已产出的内容不完整"""
+
 
 @dataclass
 class ProcessingProgress:
@@ -21,57 +210,211 @@ class ProcessingProgress:
     processed_images: int = 0
     total_links: int = 0
     processed_links: int = 0
+    retries: int = 0
     current_stage: str = "初始化"
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def start(self, total_images: int, total_links: int):
+        """重置计数并设置本次任务总量"""
+        with self._lock:
+            self.total_images = total_images
+            self.processed_images = 0
+            self.total_links = total_links
+            self.processed_links = 0
+            self.retries = 0
+
+    def mark_image_done(self):
+        """记录一张图片处理完成(线程安全)"""
+        with self._lock:
+            self.processed_images += 1
+
+    def mark_link_done(self):
+        """记录一个链接处理完成(线程安全)"""
+        with self._lock:
+            self.processed_links += 1
+
+    def mark_retry(self):
+        """记录一次请求重试(线程安全)"""
+        with self._lock:
+            self.retries += 1
+
+    def describe(self) -> str:
+        """生成当前进度描述"""
+        with self._lock:
+            retries = f", 重试 {self.retries} 次" if self.retries else ""
+            return (
+                f"处理图片和链接 (图片 {self.processed_images}/{self.total_images}, "
+                f"链接 {self.processed_links}/{self.total_links}{retries})..."
+            )
+
+
+def _report_retries(progress: ProcessingProgress, *clients):
+    """把客户端的重试次数汇报到进度信息中"""
+    for client in clients:
+        policy = getattr(client, 'retry_policy', None)
+        if policy is not None:
+            policy.on_retry = progress.mark_retry
+
+
+def _page_namespace(text_model: str) -> str:
+    """网页 SimHash 索引的命名空间: 模型或总结提示词变化后不再复用旧总结"""
+    return f"{text_model}:{SUMMARY_PROMPT_VERSION}"
+
+
+def _same_page(a: PageSignature, b: PageSignature) -> bool:
+    """正文 SimHash 相近且标题一致: 同一站点共用导航的不同页面标题不同,不会被当作转载"""
+    return hamming(a.simhash, b.simhash) <= config.PAGE_SIMHASH_DISTANCE and titles_match(a.title, b.title)
+
+
+def _page_index_lookup(index: Optional[HashIndex], namespace: str, signature: Optional[PageSignature]) -> Optional[str]:
+    """在持久化索引中查找 SimHash 相近且标题一致的网页的总结"""
+    if index is None or signature is None:
+        return None
+    entry = index.find(
+        namespace, signature.simhash,
+        accept=lambda value: isinstance(value, dict) and titles_match(value.get('title', ''), signature.title)
+    )
+    if entry is None:
+        return None
+    logger.info(f"网页 SimHash 命中,复用近似重复网页的总结 ({signature.simhash:016x})")
+    return entry['summary']
+
+
+def _page_index_store(index: Optional[HashIndex], namespace: str, signature: PageSignature, summary: str):
+    """写入网页 SimHash 索引 (失败的占位结果不写入)"""
+    if index is not None and not summary.startswith(SUMMARY_FAILURE_PREFIX):
+        index.add(namespace, signature.simhash, {'title': signature.title, 'summary': summary})
+
+
+class _DuplicateLinks:
+    """
+    一次运行中的重复链接
+
+    规范地址相同 (去掉跟踪参数或 rel=canonical 指向同一地址) 或正文 SimHash 相近且标题一致的链接
+    只抓取/总结一次: 第一个链接负责处理,之后的链接登记为它的跟随者,
+    在它完成时直接复用其总结。只在协调线程中使用,不需要加锁。
+    """
+
+    def __init__(self, index: Optional[HashIndex], namespace: str):
+        self.enabled = config.PAGE_DEDUP_ENABLED
+        self.index = index
+        self.namespace = namespace
+        self._by_url: Dict[str, int] = {}
+        self._pages: List[Tuple[PageSignature, int]] = []  # (网页签名, 负责的链接下标)
+        self._followers: Dict[int, List[int]] = {}
+
+    def owner_by_url(self, index: int, canonical: str) -> Optional[int]:
+        """
+        按规范地址登记链接
+
+        Returns:
+            Optional[int]: 已有相同地址的链接时返回其下标,否则登记为负责者并返回 None
+        """
+        if not self.enabled:
+            return None
+        owner = self._by_url.setdefault(canonical, index)
+        return owner if owner != index else None
+
+    def owner_by_content(self, index: int, canonical: str, signature: Optional[PageSignature]) -> Optional[int]:
+        """抓取完成后按网页声明的规范地址和网页签名 (正文 SimHash 加标题) 再次查找重复的链接"""
+        owner = self.owner_by_url(index, canonical)
+        if owner is not None or signature is None:
+            return owner
+        for known, known_owner in self._pages:
+            if _same_page(known, signature):
+                return known_owner
+        self._pages.append((signature, index))
+        return None
+
+    def follow(self, owner: int, index: int):
+        """登记等待 owner 结果的链接"""
+        self._followers.setdefault(owner, []).append(index)
+
+    def take_followers(self, owner: int) -> List[int]:
+        """取出等待 owner 结果的链接"""
+        return self._followers.pop(owner, [])
+
+    def known_summary(self, signature: Optional[PageSignature]) -> Optional[str]:
+        """在持久化索引中查找近似重复网页 (如其他笔记中的转载) 的总结"""
+        return _page_index_lookup(self.index, self.namespace, signature)
+
+    def store(self, index: int, summary: str):
+        """把负责链接的总结写入持久化索引"""
+        for signature, owner in self._pages:
+            if owner == index:
+                _page_index_store(self.index, self.namespace, signature, summary)
+                return
 
 
 class ContentIntegrator:
     """内容整合引擎"""
 
-    def __init__(self, api_key: Optional[str] = None, progress_callback: Optional[Callable] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        base_dir: Optional[str] = None
+    ):
         """
         初始化整合引擎
 
         Args:
             api_key: 智谱 API Key
             progress_callback: 进度回调函数 callback(progress: ProcessingProgress)
+            base_dir: 笔记所在目录,用于解析本地相对路径图片
         """
         self.parser = MarkdownParser()
         self.ai_client = ZhipuClient(api_key)
         self.scraper = WebScraper()
+        self.image_loader = _make_image_loader(base_dir)
+        self.hash_index = get_image_hash_index() if config.IMAGE_DEDUP_ENABLED else None
+        self.inflight_hashes = _make_inflight_hashes()
+        self.page_index = get_page_hash_index() if config.PAGE_DEDUP_ENABLED else None
+        self.vision_cache = get_vision_cache()
+        self.summary_cache = get_summary_cache(SUMMARY_PROMPT_VERSION)
         self.progress_callback = progress_callback
         self.progress = ProcessingProgress()
+        self.run_id: Optional[str] = None  # 最近一次运行的 ID,可用于恢复
+        self.fully_reorganized = True  # 最近一次运行的文章是否全部经过重组 (失败的部分为原始文本)
+        _report_retries(self.progress, self.ai_client, self.scraper, self.image_loader)
 
-    def process_markdown(self, markdown_text: str, max_workers: int = 5) -> str:
+    def process_markdown(
+        self,
+        markdown_text: str,
+        max_workers: int = 5,
+        note_id: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> str:
         """
         处理 Markdown 笔记,转换为优化后的文章
 
         Args:
             markdown_text: 原始 Markdown 文本
             max_workers: 并行处理的最大线程数
+            note_id: 笔记标识 (如文件名),提供时启用增量处理,
+                只重新处理相对上次运行新增或变化的图片和链接
+            run_id: 运行 ID,对应的运行日志已存在时恢复该运行,
+                只重试缺失的条目和最终重组
 
         Returns:
             str: 优化后的 Markdown 文章
         """
         try:
-            # 阶段1: 解析 Markdown
-            self._update_progress("解析 Markdown 内容...")
-            parsed = self.parser.parse(markdown_text)
-            logger.info(
-                f"解析完成: {len(parsed.text_blocks)} 个文本块, "
-                f"{len(parsed.images)} 张图片, {len(parsed.links)} 个链接"
-            )
+            journal = self._open_journal(markdown_text, note_id, run_id)
+            if journal is not None and journal.completed:
+                logger.info(f"运行 {journal.run_id} 已完成,直接返回已生成的文章")
+                self._update_progress("处理完成!")
+                return journal.article
 
-            # 阶段2: 并行处理图片和链接
-            self._update_progress("处理图片和链接...")
-            images_desc = self._process_images(parsed.images, max_workers)
-            links_summary = self._process_links(parsed.links, max_workers)
+            parsed, images_desc, links_summary = self._prepare(markdown_text, max_workers, note_id, journal)
 
             # 阶段3: 整合并重组文章
             self._update_progress("重组文章内容,可能会等待1-10s时间...")
             article = self._reorganize_content(
                 parsed,
                 images_desc,
-                links_summary
+                links_summary,
+                journal
             )
 
             self._update_progress("处理完成!")
@@ -82,142 +425,924 @@ class ContentIntegrator:
             logger.error(f"处理失败: {str(e)}")
             raise
 
-    def _process_images(self, images: list, max_workers: int) -> list:
-        """并行处理图片"""
-        if not images:
-            return []
+    def process_markdown_stream(
+        self,
+        markdown_text: str,
+        max_workers: int = 5,
+        note_id: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        处理 Markdown 笔记,以流的形式逐段产出优化后的文章
+
+        图片和链接处理完成后立即开始产出重组结果,调用方无需等待整篇文章生成完毕。
+
+        Args:
+            markdown_text: 原始 Markdown 文本
+            max_workers: 并行处理的最大线程数
+            note_id: 笔记标识,提供时启用增量处理 (见 process_markdown)
+            run_id: 运行 ID,用于恢复中断的运行 (见 process_markdown)
+
+        Yields:
+            str: 文章内容片段,全部拼接后即为完整文章
+
+        Raises:
+            IncompleteArticle: 已产出部分内容后重组失败,已产出的文章不完整,不应作为结果保存
+        """
+        try:
+            journal = self._open_journal(markdown_text, note_id, run_id)
+            if journal is not None and journal.completed:
+                logger.info(f"运行 {journal.run_id} 已完成,直接返回已生成的文章")
+                self._update_progress("处理完成!")
+                yield journal.article
+                return
+
+            parsed, images_desc, links_summary = self._prepare(markdown_text, max_workers, note_id, journal)
+
+            # 阶段3: 流式重组文章
+            self._update_progress("正在生成文章...")
+            yield from self._reorganize_content_stream(
+                parsed,
+                images_desc,
+                links_summary,
+                journal
+            )
+
+            self._update_progress("处理完成!")
+            logger.info("内容整合完成")
+
+        except Exception as e:
+            logger.error(f"处理失败: {str(e)}")
+            raise
+
+    def _open_journal(
+        self,
+        markdown_text: str,
+        note_id: Optional[str],
+        run_id: Optional[str]
+    ) -> Optional[RunJournal]:
+        """打开运行日志: 指定 run_id 时恢复或新建该运行,否则在启用缓存时新建"""
+        self.run_id = None
+        self.fully_reorganized = True
+        if not run_id and not config.CACHE_ENABLED:
+            return None
+
+        journal = RunJournal.open(markdown_text, run_id, note_id)
+        self.run_id = journal.run_id
+        return journal
+
+    def _prepare(
+        self,
+        markdown_text: str,
+        max_workers: int,
+        note_id: Optional[str] = None,
+        journal: Optional[RunJournal] = None
+    ) -> Tuple[ParsedContent, list, list]:
+        """解析笔记并处理其中的图片和链接"""
+        # 阶段1: 解析 Markdown
+        self._update_progress("解析 Markdown 内容...")
+        parsed = self.parser.parse(markdown_text)
+        logger.info(
+            f"解析完成: {len(parsed.text_blocks)} 个文本块, "
+            f"{len(parsed.images)} 张图片, {len(parsed.links)} 个链接"
+        )
+
+        # 阶段2: 图片识别、网页抓取和链接总结在同一个线程池中并发执行
+        self._update_progress("处理图片和链接...")
+        manifest = NoteManifest.load(note_id) if note_id and config.CACHE_ENABLED else None
+        images_desc, links_summary = self._process_media(
+            parsed.images,
+            parsed.links,
+            max_workers,
+            manifest,
+            journal
+        )
+
+        if manifest is not None:
+            manifest.update(
+                parsed.images, images_desc, self.ai_client.vision_model,
+                parsed.links, links_summary, self.ai_client.text_model,
+                failed_images={i for i, result in enumerate(images_desc) if _is_failed_image(result)},
+                failed_links={i for i, result in enumerate(links_summary) if _is_failed_link(result)}
+            )
+            manifest.save()
+
+        if self.progress.retries:
+            logger.info(f"图片和链接处理期间共重试 {self.progress.retries} 次")
+
+        for name, cache in (("视觉", self.vision_cache), ("总结", self.summary_cache)):
+            if cache is not None:
+                stats = cache.stats()
+                logger.info(f"{name}缓存: 命中 {stats.hits} 次, 未命中 {stats.misses} 次, 共 {stats.entries} 条")
+
+        http = getattr(self.scraper, 'http', None)
+        if http is not None:
+            stats = http.stats()
+            logger.info(
+                f"HTTP 连接池: 累计 {stats.requests} 次请求, {stats.hosts} 个主机, "
+                f"连接复用率 {stats.reuse_rate:.0%}, 等待主机并发名额 {stats.host_waits} 次"
+            )
+
+        return parsed, images_desc, links_summary
 
-        self.progress.total_images = len(images)
-        self.progress.processed_images = 0
-        results = []
+    def _process_media(
+        self,
+        images: list,
+        links: list,
+        max_workers: int,
+        manifest: Optional[NoteManifest] = None,
+        journal: Optional[RunJournal] = None
+    ) -> Tuple[list, list]:
+        """
+        统一调度图片和链接任务
+
+        所有视觉识别、网页抓取和文本总结任务共享一个线程池,
+        链接抓取完成后立即把总结任务提交回同一个池中,
+        总耗时约等于最慢的单个任务,而不是两个阶段之和。
+
+        Args:
+            images: 图片列表
+            links: 链接列表
+            max_workers: 并行处理的最大线程数
+            manifest: 上次运行的处理清单,命中的条目直接复用结果
+            journal: 本次运行的日志,已完成的条目直接复用,新完成的条目立即写入
+
+        Returns:
+            (images_desc, links_summary): 按原始顺序排列的处理结果
+        """
+        self.progress.start(len(images), len(links))
+        if not images and not links:
+            return [], []
+
+        images_desc = [None] * len(images)
+        links_summary = [None] * len(links)
+        self.inflight_hashes = _make_inflight_hashes()
+
+        if manifest is not None or journal is not None:
+            self._prefill_results(images, links, images_desc, links_summary, manifest, journal)
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_image = {
-                executor.submit(self._analyze_single_image, img): img
-                for img in images
-            }
+            pending = {}
+            to_analyze = [index for index, desc in enumerate(images_desc) if desc is None]
+            group_size = getattr(self.ai_client, 'vision_group_size', 1)
+            if group_size > 1 and len(to_analyze) > 1:
+                for start in range(0, len(to_analyze), group_size):
+                    group = to_analyze[start:start + group_size]
+                    future = executor.submit(self._analyze_image_group, [images[i] for i in group])
+                    pending[future] = ('image_group', group)
+            else:
+                for index in to_analyze:
+                    future = executor.submit(self._analyze_single_image, images[index])
+                    pending[future] = ('image', index)
+            duplicates = _DuplicateLinks(self.page_index, _page_namespace(self.ai_client.text_model))
+            for index, link in enumerate(links):
+                if links_summary[index] is not None:
+                    continue
+                owner = duplicates.owner_by_url(index, self.scraper.canonical_url(link['url']))
+                if owner is not None:
+                    duplicates.follow(owner, index)
+                    continue
+                future = executor.submit(self._fetch_link_page, link)
+                pending[future] = ('fetch', index)
 
-            for future in as_completed(future_to_image):
-                img = future_to_image[future]
-                try:
-                    description = future.result()
-                    results.append({
-                        'url': img['url'],
-                        'alt': img.get('alt', ''),
-                        'description': description,
-                        'context': img.get('context', '')
-                    })
-                except Exception as e:
-                    logger.error(f"图片处理失败 ({img['url']}): {str(e)}")
-                    results.append({
-                        'url': img['url'],
-                        'alt': img.get('alt', ''),
-                        'description': f"[图片: {img.get('alt', '无描述')}]",
-                        'context': img.get('context', '')
-                    })
-                finally:
-                    self.progress.processed_images += 1
-                    self._update_progress(
-                        f"处理图片 ({self.progress.processed_images}/{self.progress.total_images})..."
-                    )
-
-        return results
+            def finish_image(index: int, result: dict):
+                images_desc[index] = result
+                self.progress.mark_image_done()
+                if journal is not None and not _is_failed_image(result):
+                    journal.record_image(index, result)
+
+            def finish_link(index: int, result: dict):
+                links_summary[index] = result
+                self.progress.mark_link_done()
+                if not _is_failed_link(result):
+                    duplicates.store(index, result['summary'])
+                    if journal is not None:
+                        journal.record_link(index, result)
+                for follower in duplicates.take_followers(index):
+                    finish_link(follower, _link_result(links[follower], result['summary']))
+
+            # 已抓取、等待批量总结的链接 (index, link, content)
+            to_summarize = []
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, target = pending.pop(future)
+
+                    if kind == 'image':
+                        index = target
+                        finish_image(index, self._collect_image_result(images[index], future))
+
+                    elif kind == 'image_group':
+                        try:
+                            descriptions = future.result()
+                        except Exception as e:
+                            logger.error(f"多图分析失败: {str(e)}")
+                            descriptions = [None] * len(target)
+                        for index, description in zip(target, descriptions):
+                            img = images[index]
+                            if description is None:
+                                description = _image_fallback(img)
+                            finish_image(index, _image_result(img, description))
+
+                    elif kind == 'fetch':
+                        index = target
+                        link = links[index]
+                        try:
+                            page = future.result()
+                        except Exception as e:
+                            logger.error(f"链接抓取失败 ({link['url']}): {str(e)}")
+                            page = None
+
+                        if not page:
+                            finish_link(index, _link_result(link, LINK_FETCH_FAILED))
+                            continue
+
+                        content, signature = page
+                        owner = duplicates.owner_by_content(index, self.scraper.canonical_url(link['url']), signature)
+                        summary = duplicates.known_summary(signature) if owner is None else None
+                        if owner is not None:
+                            logger.info(f"链接与 {links[owner]['url']} 内容重复,复用其总结: {link['url']}")
+                            if links_summary[owner] is not None:
+                                finish_link(index, _link_result(link, links_summary[owner]['summary']))
+                            else:
+                                duplicates.follow(owner, index)
+                        elif summary is not None:
+                            finish_link(index, _link_result(link, summary))
+                        elif config.SUMMARY_BATCH_ENABLED:
+                            to_summarize.append((index, link, content))
+                        else:
+                            summary_future = executor.submit(self._summarize_link, link, content)
+                            pending[summary_future] = ('summary', index)
+
+                    elif kind == 'batch':
+                        batch = target
+                        try:
+                            summaries = future.result()
+                        except Exception as e:
+                            logger.warning(f"批量总结失败,改为逐个总结: {str(e)}")
+                            summaries = [None] * len(batch)
+
+                        for (index, link, content), summary in zip(batch, summaries):
+                            if summary is None:
+                                summary_future = executor.submit(self._summarize_link, link, content)
+                                pending[summary_future] = ('summary', index)
+                            else:
+                                finish_link(index, _link_result(link, summary))
+
+                    else:
+                        index = target
+                        finish_link(index, self._collect_link_result(links[index], future))
+
+                if to_summarize:
+                    fetching = any(kind == 'fetch' for kind, _ in pending.values())
+                    for batch in self._take_summary_batches(to_summarize, flush=not fetching):
+                        if len(batch) == 1:
+                            index, link, content = batch[0]
+                            pending[executor.submit(self._summarize_link, link, content)] = ('summary', index)
+                        else:
+                            pending[executor.submit(self._summarize_batch, batch)] = ('batch', batch)
+
+                self._update_progress(self.progress.describe())
+
+        return images_desc, links_summary
+
+    def _prefill_results(
+        self,
+        images: list,
+        links: list,
+        images_desc: list,
+        links_summary: list,
+        manifest: Optional[NoteManifest],
+        journal: Optional[RunJournal]
+    ):
+        """从运行日志和处理清单中填入已有结果,这些条目不再重新处理"""
+        for index, img in enumerate(images):
+            description = None
+            if journal is not None:
+                result = journal.get_image(index, img['url'])
+                description = result['description'] if result else None
+            if description is None and manifest is not None:
+                description = manifest.get_image(img, self.ai_client.vision_model)
+            if description is not None:
+                images_desc[index] = _image_result(img, description)
+                self.progress.mark_image_done()
+
+        for index, link in enumerate(links):
+            summary = None
+            if journal is not None:
+                result = journal.get_link(index, link['url'])
+                summary = result['summary'] if result else None
+            if summary is None and manifest is not None:
+                summary = manifest.get_link(link, self.ai_client.text_model)
+            if summary is not None:
+                links_summary[index] = _link_result(link, summary)
+                self.progress.mark_link_done()
+
+        reused_images = sum(result is not None for result in images_desc)
+        reused_links = sum(result is not None for result in links_summary)
+        logger.info(
+            f"复用已有结果: {reused_images}/{len(images)} 张图片, "
+            f"{reused_links}/{len(links)} 个链接"
+        )
+        if reused_images or reused_links:
+            self._update_progress(self.progress.describe())
+
+    def _collect_image_result(self, img: dict, future) -> dict:
+        """取出图片任务结果,失败时使用 alt 文本兜底"""
+        try:
+            description = future.result()
+        except Exception as e:
+            logger.error(f"图片处理失败 ({img['url']}): {str(e)}")
+            description = _image_fallback(img)
+        return _image_result(img, description)
+
+    def _collect_link_result(self, link: dict, future) -> dict:
+        """取出链接总结任务结果"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"链接处理失败 ({link['url']}): {str(e)}")
+            return _link_result(link, LINK_PROCESS_FAILED)
 
     def _analyze_single_image(self, img: dict) -> str:
-        """分析单张图片"""
-        url = img['url']
-        context = img.get('context', '')
+        """分析单张图片,已识别过的图片和近似重复的图片直接使用已有结果"""
+        model = self.ai_client.vision_model
+        prompt = _build_image_prompt(img)
+        key, description = _vision_cache_lookup(self.vision_cache, img, prompt, model, self.image_loader)
+        if description is not None:
+            return description
 
-        prompt = f"""请描述这张图片的内容,要求:
-1. 简洁专业,100字以内
-2. 适合作为图片说明插入文章
-3. 如果图片与上下文相关,请结合上下文理解
+        loaded = self._load_image(img)
+        if loaded is None:
+            return _image_fallback(img)
 
-上下文: {context[:100] if context else '无'}
-"""
-        return self.ai_client.analyze_image(url, prompt)
+        if loaded.phash is None or self.inflight_hashes is None:
+            description = self.ai_client.analyze_image(loaded.url, prompt)
+            _vision_cache_store(self.vision_cache, key, description)
+            return description
+
+        description = _hash_index_lookup(self.hash_index, loaded, model)
+        if description is None:
+            future, is_owner = self.inflight_hashes.claim(loaded.phash)
+            if not is_owner:
+                logger.info(f"图片与本篇笔记中的另一张图片近似重复,复用其描述: {img['url'][:50]}")
+                return future.result()
+            try:
+                description = self.ai_client.analyze_image(loaded.url, prompt)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            future.set_result(description)
+            _hash_index_store(self.hash_index, loaded, model, description)
 
-    def _process_links(self, links: list, max_workers: int) -> list:
-        """并行处理链接"""
-        if not links:
-            return []
+        _vision_cache_store(self.vision_cache, key, description)
+        return description
 
-        self.progress.total_links = len(links)
-        self.progress.processed_links = 0
-        results = []
+    def _analyze_image_group(self, imgs: List[dict]) -> List[str]:
+        """
+        一次视觉模型调用分析一组图片,已识别过的图片和近似重复的图片直接使用已有结果
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_link = {
-                executor.submit(self._process_single_link, link): link
-                for link in links
-            }
+        Args:
+            imgs: 同一组的图片
 
-            for future in as_completed(future_to_link):
-                link = future_to_link[future]
-                try:
-                    summary_data = future.result()
-                    results.append(summary_data)
-                except Exception as e:
-                    logger.error(f"链接处理失败 ({link['url']}): {str(e)}")
-                    results.append({
-                        'url': link['url'],
-                        'title': link.get('title', '链接'),
-                        'summary': '[内容获取失败]',
-                        'context': link.get('context', '')
-                    })
-                finally:
-                    self.progress.processed_links += 1
-                    self._update_progress(
-                        f"处理链接 ({self.progress.processed_links}/{self.progress.total_links})..."
-                    )
-
-        return results
-
-    def _process_single_link(self, link: dict) -> dict:
-        """处理单个链接"""
-        url = link['url']
-        title = link.get('title', '')
-        context = link.get('context', '')
+        Returns:
+            List[str]: 与 imgs 一一对应的图片描述
+        """
+        model = self.ai_client.vision_model
+        descriptions = [None] * len(imgs)
+        misses = []
+        for i, img in enumerate(imgs):
+            prompt = _build_image_prompt(img)
+            key, description = _vision_cache_lookup(self.vision_cache, img, prompt, model, self.image_loader)
+            if description is None:
+                misses.append((i, key, prompt))
+            else:
+                descriptions[i] = description
+
+        if self.image_loader is not None:
+            loaded_images = self.image_loader.load_many([imgs[i]['url'] for i, _, _ in misses])
+        else:
+            loaded_images = [LoadedImage(imgs[i]['url']) for i, _, _ in misses]
+
+        to_analyze = []  # (i, key, prompt, loaded, future)
+        duplicates = []  # (i, key, future): 等待近似重复图片的结果
+        for (i, key, prompt), loaded in zip(misses, loaded_images):
+            if loaded is None:
+                descriptions[i] = _image_fallback(imgs[i])
+                continue
+            if loaded.phash is None or self.inflight_hashes is None:
+                to_analyze.append((i, key, prompt, loaded, None))
+                continue
+
+            description = _hash_index_lookup(self.hash_index, loaded, model)
+            if description is not None:
+                descriptions[i] = description
+                _vision_cache_store(self.vision_cache, key, description)
+                continue
+
+            future, is_owner = self.inflight_hashes.claim(loaded.phash)
+            if is_owner:
+                to_analyze.append((i, key, prompt, loaded, future))
+            else:
+                duplicates.append((i, key, future))
+
+        if to_analyze:
+            try:
+                results = self.ai_client.analyze_images(
+                    [(loaded.url, prompt) for _, _, prompt, loaded, _ in to_analyze]
+                )
+            except Exception as e:
+                for *_, future in to_analyze:
+                    if future is not None:
+                        future.set_exception(e)
+                raise
+            for (i, key, _, loaded, future), description in zip(to_analyze, results):
+                descriptions[i] = description
+                _vision_cache_store(self.vision_cache, key, description)
+                if future is not None:
+                    future.set_result(description)
+                    _hash_index_store(self.hash_index, loaded, model, description)
+
+        # 先完成本组负责的图片再等待其他组的结果,避免两组相互等待
+        for i, key, future in duplicates:
+            descriptions[i] = future.result()
+            _vision_cache_store(self.vision_cache, key, descriptions[i])
+        if duplicates:
+            logger.info(f"本组 {len(duplicates)} 张图片与其他图片近似重复,复用其描述")
+        return descriptions
+
+    def _load_image(self, img: dict) -> Optional[LoadedImage]:
+        """读取并预处理图片,未启用图片预处理时直接使用原 URL"""
+        if self.image_loader is None:
+            return LoadedImage(img['url'])
+        return self.image_loader.load(img['url'])
 
-        # 抓取网页内容
-        content = self.scraper.fetch_content(url)
+    def _fetch_link_page(self, link: dict) -> Optional[Tuple[str, Optional[PageSignature]]]:
+        """
+        抓取链接正文并计算网页签名
+
+        Returns:
+            Optional[Tuple[str, Optional[PageSignature]]]: (挑选后的正文, 网页签名),抓取失败时返回 None;
+                未启用网页去重或正文过少时签名为 None
+        """
+        content = self.scraper.fetch_content(link['url'])
         if not content:
-            return {
-                'url': url,
-                'title': title,
-                'summary': '[内容抓取失败]',
-                'context': context
-            }
-
-        # 限制长度避免超过 token 限制
-        if len(content) > 3000:
-            content = content[:3000] + "..."
-
-        # AI 总结
-        summary = self.ai_client.summarize_text(content, context)
-
-        return {
-            'url': url,
-            'title': title,
-            'summary': summary,
-            'context': context
-        }
+            return None
+        signature = page_signature(content) if config.PAGE_DEDUP_ENABLED else None
+        return _select_content(link, content), signature
+
+    def _summarize_link(self, link: dict, content: str) -> dict:
+        """AI 总结已抓取的链接正文,相同正文只总结一次"""
+        context = link.get('context', '')
+        key, summary = _summary_cache_lookup(self.summary_cache, content, context, self.ai_client.text_model)
+        if summary is None:
+            summary = self.ai_client.summarize_text(content, context)
+            _summary_cache_store(self.summary_cache, key, summary)
+        return _link_result(link, summary)
+
+    def _take_summary_batches(self, to_summarize: list, flush: bool) -> List[list]:
+        """
+        按 token 预算把待总结的链接分批
+
+        flush 为 False 时 (仍有链接在抓取) 未装满的最后一批留在队列中等待后续链接。
+        """
+        batches = []
+        current = []
+        used = 0
+        for index, link, content in to_summarize:
+            cost = estimate_text_tokens(content)
+            if current and (used + cost > config.SUMMARY_BATCH_TOKENS
+                            or len(current) >= config.SUMMARY_BATCH_MAX_ITEMS):
+                batches.append(current)
+                current, used = [], 0
+            current.append((index, link, content))
+            used += cost
+
+        to_summarize.clear()
+        if current:
+            if flush or len(current) >= config.SUMMARY_BATCH_MAX_ITEMS:
+                batches.append(current)
+            else:
+                to_summarize.extend(current)
+        return batches
+
+    def _summarize_batch(self, batch: list) -> List[Optional[str]]:
+        """
+        一次模型调用总结一批链接
+
+        正文和上下文都相同的链接只占一个位置,已缓存的直接使用缓存。
+        无法从响应中解析出的条目返回 None,由调用方改为逐个总结。
+
+        Args:
+            batch: [(index, link, content), ...]
+
+        Returns:
+            List[Optional[str]]: 与 batch 一一对应的总结
+        """
+        model = self.ai_client.text_model
+        results = {}
+        pending = {}
+        for _, link, content in batch:
+            context = link.get('context', '')
+            slot = (content_fingerprint(content), context)
+            if slot in results or slot in pending:
+                continue
+            key, summary = _summary_cache_lookup(self.summary_cache, content, context, model)
+            if summary is not None:
+                results[slot] = summary
+            else:
+                pending[slot] = (content, context, key)
+
+        items = list(pending.values())
+        if len(items) == 1:
+            content, context, _ = items[0]
+            summaries = [self.ai_client.summarize_text(content, context)]
+        elif items:
+            summaries = self.ai_client.summarize_batch([(content, context) for content, context, _ in items])
+            logger.info(f"批量总结 {len(items)} 个链接,解析成功 {sum(s is not None for s in summaries)} 个")
+        else:
+            summaries = []
+
+        for (slot, (_, _, key)), summary in zip(pending.items(), summaries):
+            results[slot] = summary
+            if summary is not None:
+                _summary_cache_store(self.summary_cache, key, summary)
+
+        return [
+            results[(content_fingerprint(content), link.get('context', ''))]
+            for _, link, content in batch
+        ]
 
     def _reorganize_content(
         self,
         parsed: ParsedContent,
         images_desc: list,
-        links_summary: list
+        links_summary: list,
+        journal: Optional[RunJournal] = None
     ) -> str:
-        """使用 AI 重组内容为文章"""
+        """使用 AI 重组内容为文章,失败时返回原始文本"""
+        sections = split_sections(parsed, images_desc, links_summary, config.REORGANIZE_SECTION_CHARS)
+        if len(sections) > 1:
+            return "".join(self._reorganize_sections(parsed, sections, journal))
+
+        try:
+            article = self.ai_client.reorganize_article(
+                original_text=parsed.text_blocks,
+                images_desc=images_desc,
+                links_summary=links_summary,
+                tags=parsed.tags,
+                front_matter=parsed.front_matter,
+                fallback=False
+            )
+        except Exception:
+            self._log_resume_hint(journal)
+            self.fully_reorganized = False
+            return "\n\n".join(parsed.text_blocks)
+
+        if journal is not None:
+            journal.record_article(article)
+        return article
+
+    def _reorganize_content_stream(
+        self,
+        parsed: ParsedContent,
+        images_desc: list,
+        links_summary: list,
+        journal: Optional[RunJournal] = None
+    ) -> Iterator[str]:
+        """
+        流式重组文章
+
+        失败且尚未产出内容时产出原始文本;已产出部分内容后失败时抛出 IncompleteArticle。
+        """
+        sections = split_sections(parsed, images_desc, links_summary, config.REORGANIZE_SECTION_CHARS)
+        if len(sections) > 1:
+            yield from self._reorganize_sections(parsed, sections, journal)
+            return
+
+        chunks = []
+        try:
+            for piece in self.ai_client.reorganize_article_stream(
+                original_text=parsed.text_blocks,
+                images_desc=images_desc,
+                links_summary=links_summary,
+                tags=parsed.tags,
+                front_matter=parsed.front_matter,
+                fallback=False
+            ):
+                chunks.append(piece)
+                yield piece
+        except Exception as e:
+            self._log_resume_hint(journal)
+            self.fully_reorganized = False
+            if chunks:
+                hint = f",可使用运行 ID {journal.run_id} 恢复" if journal is not None else ""
+                raise IncompleteArticle(f"文章生成中途失败,已输出的内容不完整{hint}: {str(e)}") from e
+            yield "\n\n".join(parsed.text_blocks)
+            return
+
+        if journal is not None:
+            journal.record_article("".join(chunks))
+
+    def _reorganize_sections(
+        self,
+        parsed: ParsedContent,
+        sections: List[Section],
+        journal: Optional[RunJournal] = None
+    ) -> Iterator[str]:
+        """
+        并行重组长笔记的各段,按顺序产出拼接好的内容
+
+        前面的段完成后立即产出,总耗时约等于最慢的一段。
+        某段失败时该段使用原始文本,文章不记入运行日志,之后可以恢复重试。
+        """
+        logger.info(f"笔记较长,分 {len(sections)} 段并行重组")
+        parts = []
+        failed = False
+
+        with ThreadPoolExecutor(max_workers=min(len(sections), config.MODEL_MAX_CONCURRENCY)) as executor:
+            futures = [executor.submit(self._reorganize_section, parsed, section) for section in sections]
+            for section, future in zip(sections, futures):
+                try:
+                    text = future.result()
+                except Exception:
+                    failed = True
+                    text = "\n\n".join(section.text_blocks)
+
+                part = normalize_section(text, section.index)
+                parts.append(part)
+                self._update_progress(f"重组文章 (第 {section.index}/{section.total} 段完成)...")
+                yield part if section.is_first else "\n\n" + part
+
+        if failed:
+            self._log_resume_hint(journal)
+            self.fully_reorganized = False
+        elif journal is not None:
+            journal.record_article("\n\n".join(parts))
+
+    def _reorganize_section(self, parsed: ParsedContent, section: Section) -> str:
+        """重组长笔记的一段 (Front Matter 只给第一段,标签只给最后一段)"""
         return self.ai_client.reorganize_article(
-            original_text=parsed.text_blocks,
-            images_desc=images_desc,
-            links_summary=links_summary,
-            tags=parsed.tags,
-            front_matter=parsed.front_matter
+            original_text=section.text_blocks,
+            images_desc=section.images_desc,
+            links_summary=section.links_summary,
+            tags=parsed.tags if section.is_last else None,
+            front_matter=parsed.front_matter if section.is_first else None,
+            fallback=False,
+            section=(section.index, section.total)
+        )
+
+    @staticmethod
+    def _log_resume_hint(journal: Optional[RunJournal]):
+        """提示可以恢复的运行"""
+        if journal is not None:
+            logger.warning(
+                f"文章重组失败,已完成的图片和链接结果已保存,"
+                f"可使用运行 ID {journal.run_id} 恢复"
+            )
+
+    def _update_progress(self, stage: str):
+        """更新进度"""
+        self.progress.current_stage = stage
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.progress)
+            except Exception as e:
+                logger.warning(f"进度回调失败: {str(e)}")
+
+
+class AsyncContentIntegrator:
+    """
+    异步内容整合引擎
+
+    基于 aiohttp 在一个事件循环内调度所有图片识别、网页抓取和总结请求,
+    并发由信号量控制而不是线程数,适合批量处理大量笔记。
+
+    用法:
+        async with AsyncContentIntegrator(api_key) as integrator:
+            articles = await integrator.process_many(markdown_texts)
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        max_concurrency: int = config.ASYNC_MAX_CONCURRENCY,
+        model_concurrency: int = config.ASYNC_MODEL_CONCURRENCY,
+        base_dir: Optional[str] = None
+    ):
+        """
+        初始化异步整合引擎
+
+        Args:
+            api_key: 智谱 API Key
+            progress_callback: 进度回调函数 callback(progress: ProcessingProgress)
+            max_concurrency: 同时进行中的网页抓取请求上限
+            model_concurrency: 同时进行中的模型请求上限
+            base_dir: 笔记所在目录,用于解析本地相对路径图片
+        """
+        self.api_key = api_key or config.ZHIPU_API_KEY
+        if not self.api_key:
+            raise ValueError("未提供智谱 API Key")
+
+        self.parser = MarkdownParser()
+        self.vision_cache = get_vision_cache()
+        self.summary_cache = get_summary_cache(SUMMARY_PROMPT_VERSION)
+        self.progress_callback = progress_callback
+        self.progress = ProcessingProgress()
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.image_loader = _make_image_loader(base_dir)
+        self.hash_index = get_image_hash_index() if config.IMAGE_DEDUP_ENABLED else None
+        self.inflight_hashes = _make_inflight_hashes()
+        self.page_index = get_page_hash_index() if config.PAGE_DEDUP_ENABLED else None
+        self.inflight_pages = _make_inflight_pages()
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.ai_client: Optional[AsyncZhipuClient] = None
+        self.scraper: Optional[AsyncWebScraper] = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency + self.model_concurrency)
+        self.session = aiohttp.ClientSession(connector=connector)
+        self.ai_client = AsyncZhipuClient(self.session, self.api_key, self.model_concurrency)
+        self.scraper = AsyncWebScraper(self.session, self.max_concurrency)
+        _report_retries(self.progress, self.ai_client, self.scraper, self.image_loader)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    async def process_markdown(self, markdown_text: str) -> str:
+        """
+        处理单篇 Markdown 笔记
+
+        Args:
+            markdown_text: 原始 Markdown 文本
+
+        Returns:
+            str: 优化后的 Markdown 文章
+        """
+        articles = await self.process_many([markdown_text])
+        return articles[0]
+
+    async def process_many(self, markdown_texts: List[str]) -> List[str]:
+        """
+        在同一个事件循环中并发处理多篇笔记
+
+        Args:
+            markdown_texts: 原始 Markdown 文本列表
+
+        Returns:
+            List[str]: 与输入顺序一致的优化后文章
+        """
+        if self.session is None:
+            async with self:
+                return await self.process_many(markdown_texts)
+
+        try:
+            # 近似重复登记表只在一次运行内有效,上次运行的失败结果不会被复用
+            self.inflight_hashes = _make_inflight_hashes()
+            self.inflight_pages = _make_inflight_pages()
+
+            self._update_progress("解析 Markdown 内容...")
+            parsed_notes = [self.parser.parse(text) for text in markdown_texts]
+            self.progress.start(
+                sum(len(parsed.images) for parsed in parsed_notes),
+                sum(len(parsed.links) for parsed in parsed_notes)
+            )
+
+            self._update_progress("处理图片和链接...")
+            articles = await asyncio.gather(*(self._process_parsed(parsed) for parsed in parsed_notes))
+
+            self._update_progress("处理完成!")
+            logger.info(f"内容整合完成 ({len(articles)} 篇)")
+            return list(articles)
+
+        except Exception as e:
+            logger.error(f"处理失败: {str(e)}")
+            raise
+
+    async def _process_parsed(self, parsed: ParsedContent) -> str:
+        """并发处理一篇笔记的图片和链接,然后重组文章"""
+        images_desc, links_summary = await asyncio.gather(
+            asyncio.gather(*(self._analyze_single_image(img) for img in parsed.images)),
+            asyncio.gather(*(self._process_single_link(link) for link in parsed.links))
         )
 
+        self._update_progress("重组文章内容,可能会等待1-10s时间...")
+        sections = split_sections(parsed, list(images_desc), list(links_summary), config.REORGANIZE_SECTION_CHARS)
+        parts = await asyncio.gather(*(
+            self.ai_client.reorganize_article(
+                original_text=section.text_blocks,
+                images_desc=section.images_desc,
+                links_summary=section.links_summary,
+                tags=parsed.tags if section.is_last else None,
+                front_matter=parsed.front_matter if section.is_first else None,
+                section=(section.index, section.total) if section.total > 1 else None
+            )
+            for section in sections
+        ))
+        return stitch_sections(list(parts))
+
+    async def _analyze_single_image(self, img: dict) -> dict:
+        """分析单张图片,近似重复的图片只识别一次"""
+        try:
+            model = self.ai_client.vision_model
+            prompt = _build_image_prompt(img)
+            key, description = _vision_cache_lookup(self.vision_cache, img, prompt, model, self.image_loader)
+            if description is None:
+                loaded = LoadedImage(img['url'])
+                if self.image_loader is not None:
+                    # 读取和缩放图片是阻塞操作,放到线程中执行
+                    loaded = await asyncio.to_thread(self.image_loader.load, img['url'])
+                if loaded is None:
+                    description = _image_fallback(img)
+                else:
+                    description = await self._describe_loaded_image(loaded, prompt, model)
+                    _vision_cache_store(self.vision_cache, key, description)
+        except Exception as e:
+            logger.error(f"图片处理失败 ({img['url']}): {str(e)}")
+            description = _image_fallback(img)
+        finally:
+            self.progress.mark_image_done()
+            self._update_progress(self.progress.describe())
+        return _image_result(img, description)
+
+    async def _describe_loaded_image(self, loaded: LoadedImage, prompt: str, model: str) -> str:
+        """识别预处理后的图片,近似重复的图片复用索引中或正在进行的识别结果"""
+        if loaded.phash is None or self.inflight_hashes is None:
+            return await self.ai_client.analyze_image(loaded.url, prompt)
+
+        description = _hash_index_lookup(self.hash_index, loaded, model)
+        if description is not None:
+            return description
+
+        future, is_owner = self.inflight_hashes.claim(loaded.phash)
+        if not is_owner:
+            return await asyncio.wrap_future(future)
+        try:
+            description = await self.ai_client.analyze_image(loaded.url, prompt)
+        except BaseException as e:
+            _fail_inflight(future, e)
+            raise
+        future.set_result(description)
+        _hash_index_store(self.hash_index, loaded, model, description)
+        return description
+
+    async def _process_single_link(self, link: dict) -> dict:
+        """抓取并总结单个链接"""
+        try:
+            content = await self.scraper.fetch_content(link['url'])
+            if not content:
+                return _link_result(link, LINK_FETCH_FAILED)
+
+            if self.inflight_pages is None:
+                return _link_result(link, await self._summarize_content(link, content))
+
+            # 转载/镜像页面: 持久化索引中已有总结时直接复用,同一批中正在总结的等待其结果
+            signature = await asyncio.to_thread(page_signature, content)
+            if signature is None:
+                return _link_result(link, await self._summarize_content(link, content))
+            namespace = _page_namespace(self.ai_client.text_model)
+            summary = _page_index_lookup(self.page_index, namespace, signature)
+            if summary is not None:
+                return _link_result(link, summary)
+
+            future, is_owner = self.inflight_pages.claim(
+                signature.simhash, signature.title, accept=lambda title: titles_match(title, signature.title)
+            )
+            if not is_owner:
+                logger.info(f"链接与正在处理的网页内容重复,复用其总结: {link['url']}")
+                return _link_result(link, await asyncio.wrap_future(future))
+            try:
+                summary = await self._summarize_content(link, content)
+            except BaseException as e:
+                _fail_inflight(future, e)
+                raise
+            future.set_result(summary)
+            _page_index_store(self.page_index, namespace, signature, summary)
+            return _link_result(link, summary)
+
+        except Exception as e:
+            logger.error(f"链接处理失败 ({link['url']}): {str(e)}")
+            return _link_result(link, LINK_PROCESS_FAILED)
+        finally:
+            self.progress.mark_link_done()
+            self._update_progress(self.progress.describe())
+
+    async def _summarize_content(self, link: dict, content: str) -> str:
+        """挑选正文段落并总结,相同正文只总结一次"""
+        content = _select_content(link, content)
+        context = link.get('context', '')
+        key, summary = _summary_cache_lookup(self.summary_cache, content, context, self.ai_client.text_model)
+        if summary is None:
+            summary = await self.ai_client.summarize_text(content, context)
+            _summary_cache_store(self.summary_cache, key, summary)
+        return summary
+
     def _update_progress(self, stage: str):
         """更新进度"""
         self.progress.current_stage = stage
@@ -247,8 +1372,57 @@ def process_markdown_file(
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    integrator = ContentIntegrator(api_key, progress_callback)
-    return integrator.process_markdown(content)
+    path = Path(file_path).resolve()
+    integrator = ContentIntegrator(api_key, progress_callback, base_dir=str(path.parent))
+    return integrator.process_markdown(content, note_id=str(path))
+
+
+def resume_run(
+    run_id: str,
+    api_key: Optional[str] = None,
+    progress_callback: Optional[Callable] = None,
+    max_workers: int = 5
+) -> str:
+    """
+    按运行 ID 恢复中断的运行的便捷函数
+
+    只重新处理运行日志中缺失的图片/链接,然后重新生成文章。
+
+    Args:
+        run_id: 运行 ID
+        api_key: 智谱 API Key
+        progress_callback: 进度回调
+        max_workers: 并行处理的最大线程数
+
+    Returns:
+        str: 优化后的文章
+    """
+    journal = RunJournal.load(run_id)
+    base_dir = str(Path(journal.note_id).parent) if journal.note_id else None
+    integrator = ContentIntegrator(api_key, progress_callback, base_dir=base_dir)
+    return integrator.process_markdown(journal.markdown, max_workers, journal.note_id, run_id)
+
+
+def process_markdown_batch(
+    markdown_texts: List[str],
+    api_key: Optional[str] = None,
+    progress_callback: Optional[Callable] = None,
+    max_concurrency: int = config.ASYNC_MAX_CONCURRENCY
+) -> List[str]:
+    """
+    使用异步引擎批量处理多篇笔记的便捷函数
+
+    Args:
+        markdown_texts: 原始 Markdown 文本列表
+        api_key: 智谱 API Key
+        progress_callback: 进度回调
+        max_concurrency: 同时进行中的网页抓取请求上限
+
+    Returns:
+        List[str]: 优化后的文章列表
+    """
+    integrator = AsyncContentIntegrator(api_key, progress_callback, max_concurrency)
+    return asyncio.run(integrator.process_many(markdown_texts))
 
 
 if __name__ == "__main__":
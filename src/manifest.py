@@ -0,0 +1,140 @@
+"""
+笔记处理清单模块
+记录每篇笔记上一次解析出的图片/链接及处理结果,支持增量重新处理
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class NoteManifest:
+    """
+    笔记处理清单
+
+    每个图片/链接按 (URL, 上下文, 模型) 计算条目键。重新处理同一篇笔记时,
+    键未变化的条目直接复用上次的结果,只有新增或上下文变化的条目需要重新处理。
+    """
+
+    def __init__(self, note_id: str, directory: Optional[str] = None):
+        """
+        初始化清单
+
+        Args:
+            note_id: 笔记标识 (如文件名或文件路径)
+            directory: 清单保存目录,默认 CACHE_DIR/manifests
+        """
+        self.note_id = note_id
+        self.directory = directory or os.path.join(config.CACHE_DIR, "manifests")
+        digest = hashlib.sha256(note_id.encode('utf-8')).hexdigest()[:32]
+        self.path = os.path.join(self.directory, f"{digest}.json")
+        self.images: Dict[str, dict] = {}
+        self.links: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, note_id: str, directory: Optional[str] = None) -> "NoteManifest":
+        """
+        读取笔记清单,不存在或损坏时返回空清单
+
+        Args:
+            note_id: 笔记标识
+            directory: 清单保存目录
+
+        Returns:
+            NoteManifest: 清单实例
+        """
+        manifest = cls(note_id, directory)
+        if not os.path.exists(manifest.path):
+            return manifest
+
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            manifest.images = data.get('images', {})
+            manifest.links = data.get('links', {})
+            logger.info(
+                f"读取处理清单: {note_id} ({len(manifest.images)} 张图片, {len(manifest.links)} 个链接)"
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"处理清单读取失败,将全量处理 ({note_id}): {str(e)}")
+        return manifest
+
+    @staticmethod
+    def item_key(item: dict, model: str) -> str:
+        """由 URL、上下文和模型计算条目键"""
+        raw = json.dumps([item['url'], item.get('context', ''), model], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get_image(self, img: dict, model: str) -> Optional[str]:
+        """获取上次运行的图片描述"""
+        entry = self.images.get(self.item_key(img, model))
+        return entry['description'] if entry else None
+
+    def get_link(self, link: dict, model: str) -> Optional[str]:
+        """获取上次运行的链接总结"""
+        entry = self.links.get(self.item_key(link, model))
+        return entry['summary'] if entry else None
+
+    def update(
+        self,
+        images: List[dict],
+        images_desc: List[dict],
+        vision_model: str,
+        links: List[dict],
+        links_summary: List[dict],
+        text_model: str,
+        failed_images: set = frozenset(),
+        failed_links: set = frozenset()
+    ):
+        """
+        用本次运行的结果替换清单内容 (删除的条目随之移除,失败的条目不记录)
+
+        Args:
+            images: 本次解析出的图片
+            images_desc: 与 images 一一对应的处理结果
+            vision_model: 视觉模型
+            links: 本次解析出的链接
+            links_summary: 与 links 一一对应的处理结果
+            text_model: 文本模型
+            failed_images: 处理失败的图片下标
+            failed_links: 处理失败的链接下标
+        """
+        self.images = {
+            self.item_key(img, vision_model): {
+                'url': img['url'],
+                'context': img.get('context', ''),
+                'description': result['description']
+            }
+            for index, (img, result) in enumerate(zip(images, images_desc))
+            if index not in failed_images
+        }
+        self.links = {
+            self.item_key(link, text_model): {
+                'url': link['url'],
+                'context': link.get('context', ''),
+                'summary': result['summary']
+            }
+            for index, (link, result) in enumerate(zip(links, links_summary))
+            if index not in failed_links
+        }
+
+    def save(self):
+        """写入清单 (先写临时文件再替换,避免中断时损坏)"""
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        data = {
+            'note_id': self.note_id,
+            'updated_at': time.time(),
+            'images': self.images,
+            'links': self.links
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -23,6 +23,18 @@ logger = setup_logger(
 )
 
 
+_FRONT_MATTER_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+# 图片 ![alt](url) 和链接 [text](url) 用同一个模式扫描,图片中的 [alt](url) 不会再被当作链接。
+# 链接文字中允许嵌套一个图片 (徽章、可点击的截图: [![alt](img)](url))
+_NESTED_IMAGE_RE = re.compile(r'!\[([^\[\]]*)\]\(([^)]+)\)')
+_MEDIA_RE = re.compile(r'(!?)\[((?:!\[[^\[\]]*\]\([^)]+\)|[^\[\]])*)\]\(([^)]+)\)')
+# #标签: # 前面是空白或行首,避免误匹配 Markdown 标题
+_TAG_RE = re.compile(r'(?:^|[^\w#])(#[\w\u4e00-\u9fa5_]+)', re.MULTILINE)
+# 上下文中去掉的 Markdown 语法字符
+_SYNTAX_TABLE = str.maketrans('', '', '#*_[]()!')
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg')
+
+
 @dataclass
 class ParsedContent:
     """解析后的内容结构"""
@@ -63,19 +75,15 @@ class MarkdownParser:
         # 使用 mistune 解析为 AST (使用去除 Front Matter 后的内容)
         tokens = self.markdown(content)
 
-        # 递归提取内容
+        # 递归提取文本内容
         self._extract_content(tokens, result)
 
-        # 额外使用正则表达式捕获可能遗漏的图片和链接
-        self._extract_with_regex(content, result)
+        # 一次扫描提取图片和链接
+        self._extract_media(content, result)
 
         # 提取 #标签
         result.tags = self._extract_tags(content)
 
-        # 去重
-        result.images = self._deduplicate_items(result.images, key='url')
-        result.links = self._deduplicate_items(result.links, key='url')
-
         # ============ 详细日志 ============
         if logger.isEnabledFor(logging.DEBUG):
             log_section(logger, "📄 Markdown 解析结果")
@@ -119,8 +127,7 @@ class MarkdownParser:
             (front_matter, remaining_text): 元数据和剩余内容
         """
         # 匹配开头的 ---\n...\n---
-        pattern = r'^---\s*\n(.*?)\n---\s*\n'
-        match = re.match(pattern, markdown_text, re.DOTALL)
+        match = _FRONT_MATTER_RE.match(markdown_text)
 
         if match:
             front_matter = match.group(1).strip()
@@ -130,8 +137,8 @@ class MarkdownParser:
 
         return None, markdown_text
 
-    def _extract_content(self, tokens: List, result: ParsedContent, context: str = ""):
-        """递归提取 tokens 中的内容"""
+    def _extract_content(self, tokens: List, result: ParsedContent):
+        """递归提取 tokens 中的文本内容 (图片和链接由 _extract_media 提取)"""
         for token in tokens:
             token_type = token.get('type', '')
 
@@ -140,7 +147,6 @@ class MarkdownParser:
                 text = self._extract_text(token)
                 if text.strip():
                     result.text_blocks.append(text.strip())
-                    context = text.strip()[:100]  # 保留前100字符作为上下文
 
             elif token_type == 'heading':
                 # 提取标题文本
@@ -173,31 +179,9 @@ class MarkdownParser:
                 # 分隔线
                 result.text_blocks.append("---")
 
-            elif token_type == 'image':
-                # 提取图片
-                url = token.get('src', '')
-                alt = token.get('alt', '')
-                if url:
-                    result.images.append({
-                        'url': url,
-                        'alt': alt,
-                        'context': context
-                    })
-
-            elif token_type == 'link':
-                # 提取链接
-                url = token.get('link', '')
-                title = self._extract_text(token)
-                if url and self._is_webpage_url(url):
-                    result.links.append({
-                        'url': url,
-                        'title': title,
-                        'context': context
-                    })
-
             # 递归处理子节点
             if 'children' in token:
-                self._extract_content(token['children'], result, context)
+                self._extract_content(token['children'], result)
 
     def _extract_text(self, token: Dict) -> str:
         """从 token 中提取纯文本"""
@@ -216,40 +200,49 @@ class MarkdownParser:
 
         return ' '.join(text_parts)
 
-    def _extract_with_regex(self, markdown_text: str, result: ParsedContent):
-        """使用正则表达式补充提取图片和链接"""
+    def _extract_media(self, markdown_text: str, result: ParsedContent):
+        """
+        一次扫描提取图片和链接
+
+        按 URL 去重 (保留首次出现),上下文取匹配位置前后的原文。
+        耗时与文本长度和图片、链接数量成线性关系。
+        """
+        seen_images = set()
+        seen_links = set()
 
-        # 提取图片: ![alt](url)
-        image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-        for match in re.finditer(image_pattern, markdown_text):
-            alt, url = match.groups()
-            # 检查是否已存在
-            if not any(img['url'] == url for img in result.images):
+        def add_image(url: str, alt: str, position: int):
+            if url not in seen_images:
+                seen_images.add(url)
                 result.images.append({
                     'url': url,
                     'alt': alt,
-                    'context': self._get_surrounding_text(markdown_text, match.start())
+                    'context': self._get_surrounding_text(markdown_text, position)
                 })
 
-        # 提取链接: [text](url)
-        link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-        for match in re.finditer(link_pattern, markdown_text):
-            title, url = match.groups()
-            if self._is_webpage_url(url) and not any(link['url'] == url for link in result.links):
+        for match in _MEDIA_RE.finditer(markdown_text):
+            bang, label, url = match.groups()
+            if bang:
+                add_image(url, label, match.start())
+                continue
+            if '![' in label:
+                # 链接中的图片: 图片照常提取,链接标题使用图片的 alt 文字
+                for image in _NESTED_IMAGE_RE.finditer(label):
+                    add_image(image.group(2), image.group(1), match.start(2) + image.start())
+                label = _NESTED_IMAGE_RE.sub(r'\1', label).strip()
+            if label and url not in seen_links and self._is_webpage_url(url):
+                seen_links.add(url)
                 result.links.append({
                     'url': url,
-                    'title': title,
+                    'title': label,
                     'context': self._get_surrounding_text(markdown_text, match.start())
                 })
 
-    def _get_surrounding_text(self, text: str, position: int, radius: int = 100) -> str:
-        """获取指定位置周围的文本作为上下文"""
+    @staticmethod
+    def _get_surrounding_text(text: str, position: int, radius: int = 100) -> str:
+        """获取指定位置周围的文本作为上下文 (去掉 Markdown 语法字符)"""
         start = max(0, position - radius)
-        end = min(len(text), position + radius)
-        context = text[start:end].strip()
-        # 移除 markdown 语法
-        context = re.sub(r'[#*_\[\]()!]', '', context)
-        return context[:100]
+        context = text[start:position + radius].strip()
+        return context.translate(_SYNTAX_TABLE)[:100]
 
     def _extract_tags(self, markdown_text: str) -> List[str]:
         """
@@ -262,9 +255,7 @@ class MarkdownParser:
             List[str]: 标签列表(不含 # 符号)
         """
         # 匹配 #标签 格式 (支持中英文、数字、下划线)
-        # 确保 # 前面是空白或行首,避免误匹配 Markdown 标题
-        pattern = r'(?:^|[^\w#])(#[\w\u4e00-\u9fa5_]+)'
-        matches = re.findall(pattern, markdown_text, re.MULTILINE)
+        matches = _TAG_RE.findall(markdown_text)
 
         # 去除 # 符号并去重(保持顺序)
         seen = set()
@@ -289,25 +280,12 @@ class MarkdownParser:
             return False
 
         # 排除常见图片格式
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg']
-        if any(url.lower().endswith(ext) for ext in image_extensions):
+        if url.lower().endswith(_IMAGE_EXTENSIONS):
             return False
 
         # 必须是 http/https 协议
         return url.startswith('http://') or url.startswith('https://')
 
-    @staticmethod
-    def _deduplicate_items(items: List[Dict], key: str) -> List[Dict]:
-        """根据指定 key 去重"""
-        seen = set()
-        unique_items = []
-        for item in items:
-            value = item.get(key)
-            if value and value not in seen:
-                seen.add(value)
-                unique_items.append(item)
-        return unique_items
-
 
 def parse_markdown_file(file_path: str) -> ParsedContent:
     """
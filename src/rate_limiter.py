@@ -0,0 +1,301 @@
+"""
+模型调用限流模块
+进程内共享的令牌桶 (请求数/秒、token 数/分钟) 和 AIMD 自适应并发控制,
+所有智谱 API 调用都经过同一个限流器
+"""
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Iterator, List, AsyncIterator, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 估算 token 数时每张图片按固定数量计
+IMAGE_TOKENS = 1000
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """判断异常是否为服务端限流 (HTTP 429)"""
+    return getattr(error, 'status_code', None) == 429
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """
+    粗略估算一次请求消耗的 token 数 (输入 + 最大输出)
+
+    中文大约每 1.5 个字符一个 token,这里按每个字符一个 token 保守估计,
+    请求完成后再按实际用量修正。
+
+    Args:
+        messages: 请求消息
+        max_tokens: 最大输出 token 数
+
+    Returns:
+        int: 估算的 token 数
+    """
+    total = max_tokens
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, str):
+            total += len(content)
+            continue
+        for part in content or []:
+            if part.get('type') == 'text':
+                total += len(part.get('text', ''))
+            else:
+                total += IMAGE_TOKENS
+    return total
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    按固定速率补充令牌,请求可以透支: reserve 立即扣除令牌并返回需要等待的时间,
+    等待结束时透支的部分恰好补足,先到的请求先放行。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量 (允许的突发量)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        预留令牌
+
+        Args:
+            amount: 需要的令牌数,超过桶容量时按容量计
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, amount: float):
+        """归还 (正数) 或补扣 (负数) 令牌,用于按实际用量修正预估"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def _refill(self):
+        """按流逝时间补充令牌 (调用方需持有锁)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 自适应并发控制
+
+    每次成功把并发上限加 1/limit (约每轮加 1),遇到限流时减半。
+    同一批并发请求可能同时收到限流响应,冷却时间内只减半一次。
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 20, cooldown: float = 1.0):
+        """
+        初始化并发控制
+
+        Args:
+            initial: 初始并发上限
+            minimum: 并发上限的下限
+            maximum: 并发上限的上限
+            cooldown: 两次减半之间的最短间隔(秒)
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """不等待地占用一个并发名额"""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """占用一个并发名额,已满时阻塞等待"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """异步版 acquire (事件循环内不能阻塞,轮询等待)"""
+        while not self.try_acquire():
+            await asyncio.sleep(0.05)
+
+    def release(self):
+        """归还并发名额"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        """请求成功: 加性增加并发上限"""
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self) -> bool:
+        """
+        请求被限流: 乘性减小并发上限
+
+        Returns:
+            bool: 本次是否实际减小了上限 (冷却期内返回 False)
+        """
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return False
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+            return True
+
+
+class RateLimitLease:
+    """一次限流放行的请求,完成后可按实际用量修正 token 预估"""
+
+    def __init__(self, limiter: "RateLimiter", estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens: Optional[int]):
+        """按实际消耗的 token 数修正令牌桶"""
+        if actual_tokens is not None and self.limiter.tokens is not None:
+            self.limiter.tokens.adjust(self.estimated_tokens - actual_tokens)
+
+
+class RateLimiter:
+    """
+    模型调用限流器
+
+    同时限制请求速率、token 速率和并发数。请求先占用并发名额,
+    再按两个令牌桶中较长的等待时间等待,然后才真正发出。
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 20,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None
+    ):
+        """
+        初始化限流器
+
+        Args:
+            requests_per_second: 每秒最多请求数
+            tokens_per_minute: 每分钟最多 token 数,0 表示不限制
+            max_concurrency: 并发上限的上限
+            min_concurrency: 并发上限的下限
+            initial_concurrency: 初始并发上限,默认为最大值的一半
+        """
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute > 0 else None
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency or max(min_concurrency, max_concurrency // 2),
+            minimum=min_concurrency,
+            maximum=max_concurrency
+        )
+        self.throttled = 0
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """预留请求和 token 令牌,返回需要等待的秒数"""
+        delay = self.requests.reserve(1)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def _on_error(self, error: Exception):
+        """请求失败时,限流错误触发并发退避"""
+        if not is_throttle_error(error):
+            return
+        self.throttled += 1
+        if self.concurrency.on_throttle():
+            logger.warning(f"模型调用被限流,并发上限降至 {int(self.concurrency.limit)}")
+
+    @contextmanager
+    def request(self, estimated_tokens: int = 0) -> Iterator[RateLimitLease]:
+        """
+        在限流下执行一次请求
+
+        Args:
+            estimated_tokens: 预估消耗的 token 数
+
+        Yields:
+            RateLimitLease: 可用于按实际用量修正预估
+        """
+        self.concurrency.acquire()
+        try:
+            delay = self._reserve(estimated_tokens)
+            if delay:
+                time.sleep(delay)
+            try:
+                yield RateLimitLease(self, estimated_tokens)
+            except Exception as e:
+                self._on_error(e)
+                raise
+            self.concurrency.on_success()
+        finally:
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def request_async(self, estimated_tokens: int = 0) -> AsyncIterator[RateLimitLease]:
+        """异步版 request"""
+        await self.concurrency.acquire_async()
+        try:
+            delay = self._reserve(estimated_tokens)
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                yield RateLimitLease(self, estimated_tokens)
+            except Exception as e:
+                self._on_error(e)
+                raise
+            self.concurrency.on_success()
+        finally:
+            self.concurrency.release()
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的模型调用限流器 (配额按账号计算,所有客户端共用)"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_second=config.MODEL_RPS_LIMIT,
+                tokens_per_minute=config.MODEL_TPM_LIMIT,
+                max_concurrency=config.MODEL_MAX_CONCURRENCY,
+                min_concurrency=config.MODEL_MIN_CONCURRENCY
+            )
+        return _limiter
@@ -0,0 +1,212 @@
+"""
+重试模块
+模型调用和网页抓取共用的重试策略: 区分可重试错误、带抖动的指数退避、
+遵循 Retry-After,并以每次调用的总时间预算限制重试
+"""
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+import requests
+from zhipuai import APIConnectionError, APITimeoutError
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 可重试的 HTTP 状态码: 超时、限流和服务端临时错误
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# 可重试的网络异常 (连接失败、超时、连接中断)
+RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+    APIConnectionError,
+    APITimeoutError,
+)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """读取异常携带的 HTTP 状态码 (智谱 SDK / aiohttp / requests)"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """判断错误是否值得重试"""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    读取错误响应中的 Retry-After (秒数或 HTTP 日期)
+
+    Args:
+        error: 请求异常
+
+    Returns:
+        Optional[float]: 需要等待的秒数,没有该响应头时返回 None
+    """
+    headers = getattr(error, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryState:
+    """一次调用的重试状态: 已重试次数和剩余时间预算"""
+
+    def __init__(self, policy: "RetryPolicy", description: str):
+        self.policy = policy
+        self.description = description
+        self.attempt = 0
+        self.deadline = time.monotonic() + policy.deadline
+
+    def remaining(self) -> float:
+        """剩余时间预算(秒)"""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, limit: float) -> float:
+        """本次尝试可用的超时时间: 不超过单次超时和剩余预算"""
+        return max(0.1, min(limit, self.remaining()))
+
+    def backoff(self, error: Exception) -> Optional[float]:
+        """
+        决定是否重试
+
+        Args:
+            error: 本次尝试的异常
+
+        Returns:
+            Optional[float]: 重试前需要等待的秒数,不应重试时返回 None
+        """
+        if self.attempt >= self.policy.max_retries or not is_retryable(error):
+            return None
+
+        # 全抖动指数退避,服务端给出 Retry-After 时至少等待该时长
+        delay = random.uniform(0, min(self.policy.max_delay, self.policy.base_delay * 2 ** self.attempt))
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+
+        if delay >= self.remaining():
+            logger.warning(f"{self.description} 失败,剩余时间预算不足,不再重试: {str(error)}")
+            return None
+
+        self.attempt += 1
+        self.policy._mark_retry()
+        logger.warning(
+            f"{self.description} 失败 ({str(error)}),"
+            f"{delay:.1f}s 后第 {self.attempt}/{self.policy.max_retries} 次重试"
+        )
+        return delay
+
+
+class RetryPolicy:
+    """
+    重试策略
+
+    每个客户端持有一个实例,retries 统计累计重试次数,
+    on_retry 回调可用于把重试次数汇报到进度信息中。
+    """
+
+    def __init__(
+        self,
+        deadline: float,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        """
+        初始化重试策略
+
+        Args:
+            deadline: 每次调用 (含全部重试) 的总时间预算(秒)
+            max_retries: 最多重试次数,默认 MAX_RETRIES
+            base_delay: 首次退避的上限(秒),默认 RETRY_BASE_DELAY
+            max_delay: 单次退避的上限(秒),默认 RETRY_MAX_DELAY
+        """
+        self.deadline = deadline
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.retries = 0
+        self.on_retry: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+
+    def start(self, description: str) -> RetryState:
+        """开始一次调用,返回其重试状态"""
+        return RetryState(self, description)
+
+    def call(self, func: Callable[[float], Any], description: str, timeout: float) -> Any:
+        """
+        带重试地执行 func
+
+        Args:
+            func: 执行一次尝试的函数,参数为本次尝试可用的超时时间
+            description: 调用描述 (用于日志)
+            timeout: 单次尝试的超时上限(秒)
+
+        Returns:
+            func 的返回值,重试耗尽或遇到不可重试错误时抛出最后一次的异常
+        """
+        state = self.start(description)
+        while True:
+            try:
+                return func(state.timeout(timeout))
+            except Exception as e:
+                delay = state.backoff(e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def call_async(
+        self,
+        func: Callable[[float], Awaitable[Any]],
+        description: str,
+        timeout: float
+    ) -> Any:
+        """异步版 call"""
+        state = self.start(description)
+        while True:
+            try:
+                return await func(state.timeout(timeout))
+            except Exception as e:
+                delay = state.backoff(e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def _mark_retry(self):
+        """累计重试次数并通知回调"""
+        with self._lock:
+            self.retries += 1
+        if self.on_retry:
+            self.on_retry()
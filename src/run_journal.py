@@ -0,0 +1,289 @@
+"""
+运行日志模块
+处理过程中逐条记录已完成的图片/链接结果,支持按运行 ID 恢复中断的运行
+"""
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import config
+from src.cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# 运行 ID 的格式 (uuid4 十六进制的前 16 位),同时保证拼出的日志路径不会离开日志目录
+_RUN_ID_RE = re.compile(r'^[0-9a-f]{16}$')
+
+_indexes: Dict[str, DiskCache] = {}
+_indexes_lock = threading.Lock()
+
+
+def _note_hash(markdown_text: str) -> str:
+    """计算笔记原文哈希"""
+    return hashlib.sha256(markdown_text.encode('utf-8')).hexdigest()
+
+
+def _current_model() -> str:
+    """当前配置的模型组合,模型不同的运行结果不能互相复用"""
+    return f"{config.TEXT_MODEL}+{config.VISION_MODEL}"
+
+
+def _run_index(directory: str) -> DiskCache:
+    """获取日志目录下的 (笔记哈希, 模型) -> 未完成运行 ID 索引,同一目录只打开一次"""
+    path = os.path.join(directory, "index.sqlite3")
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = DiskCache(path, max_entries=1000)
+            _indexes[path] = index
+        return index
+
+
+class RunJournal:
+    """
+    运行日志 (JSON Lines)
+
+    第一行记录笔记原文,之后每完成一个图片/链接就追加一行并立即落盘,
+    最终文章生成成功后追加 article 记录。恢复运行时只需重试缺失的条目和最终重组。
+    """
+
+    def __init__(self, run_id: str, directory: Optional[str] = None):
+        """
+        初始化运行日志 (不读写文件,请使用 create/load/open)
+
+        Args:
+            run_id: 运行 ID
+            directory: 日志目录,默认 CACHE_DIR/runs
+
+        Raises:
+            ValueError: run_id 不是自动生成的格式 (16 位十六进制)
+        """
+        if not isinstance(run_id, str) or not _RUN_ID_RE.match(run_id):
+            raise ValueError(f"无效的运行 ID: {run_id!r}")
+        self.run_id = run_id
+        self.directory = directory or os.path.join(config.CACHE_DIR, "runs")
+        self.path = os.path.join(self.directory, f"{run_id}.jsonl")
+        self.markdown = ""
+        self.note_id: Optional[str] = None
+        self.note_hash = ""
+        self.model = ""
+        self.images: Dict[int, dict] = {}
+        self.links: Dict[int, dict] = {}
+        self.article: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls,
+        markdown_text: str,
+        note_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        directory: Optional[str] = None
+    ) -> "RunJournal":
+        """
+        新建运行日志,并登记为该笔记内容和当前模型最近一次未完成的运行
+
+        Args:
+            markdown_text: 笔记原文
+            note_id: 笔记标识
+            run_id: 指定运行 ID (16 位十六进制),不提供则自动生成
+            directory: 日志目录
+
+        Returns:
+            RunJournal: 运行日志
+
+        Raises:
+            ValueError: run_id 格式无效
+        """
+        journal = cls(run_id or uuid.uuid4().hex[:16], directory)
+        journal.markdown = markdown_text
+        journal.note_id = note_id
+        journal.note_hash = _note_hash(markdown_text)
+        journal.model = _current_model()
+
+        Path(journal.directory).mkdir(parents=True, exist_ok=True)
+        cls._cleanup(journal.directory)
+        journal._append({
+            'type': 'start',
+            'run_id': journal.run_id,
+            'note_id': note_id,
+            'note_hash': journal.note_hash,
+            'model': journal.model,
+            'markdown': markdown_text,
+            'created_at': time.time()
+        }, mode='w')
+        _run_index(journal.directory).set(journal._index_key(), journal.run_id)
+        logger.info(f"创建运行日志: {journal.run_id}")
+        return journal
+
+    @classmethod
+    def load(cls, run_id: str, directory: Optional[str] = None) -> "RunJournal":
+        """
+        读取已有的运行日志
+
+        Args:
+            run_id: 运行 ID
+            directory: 日志目录
+
+        Returns:
+            RunJournal: 运行日志
+
+        Raises:
+            ValueError: 运行 ID 格式无效或运行日志不存在
+        """
+        journal = cls(run_id, directory)
+        if not os.path.exists(journal.path):
+            raise ValueError(f"运行日志不存在: {run_id}")
+
+        with open(journal.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 最后一行可能因中断而不完整
+                    continue
+
+                record_type = record.get('type')
+                if record_type == 'start':
+                    journal.markdown = record['markdown']
+                    journal.note_id = record.get('note_id')
+                    journal.note_hash = record['note_hash']
+                    journal.model = record.get('model', '')
+                elif record_type == 'image':
+                    journal.images[record['index']] = record['result']
+                elif record_type == 'link':
+                    journal.links[record['index']] = record['result']
+                elif record_type == 'article':
+                    journal.article = record['content']
+
+        logger.info(
+            f"读取运行日志: {run_id} (已完成 {len(journal.images)} 张图片, "
+            f"{len(journal.links)} 个链接, 文章{'已' if journal.article is not None else '未'}生成)"
+        )
+        return journal
+
+    @classmethod
+    def open(
+        cls,
+        markdown_text: str,
+        run_id: Optional[str] = None,
+        note_id: Optional[str] = None,
+        directory: Optional[str] = None
+    ) -> "RunJournal":
+        """
+        打开运行日志: run_id 对应的日志存在时恢复,否则新建
+
+        Raises:
+            ValueError: 已有日志记录的笔记内容与 markdown_text 不一致
+        """
+        if run_id and os.path.exists(cls(run_id, directory).path):
+            journal = cls.load(run_id, directory)
+            if journal.note_hash != _note_hash(markdown_text):
+                raise ValueError(f"运行 {run_id} 记录的笔记内容与当前内容不一致,无法恢复")
+            return journal
+        return cls.create(markdown_text, note_id, run_id, directory)
+
+    @classmethod
+    def find_incomplete(
+        cls,
+        markdown_text: str,
+        directory: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        查找同一笔记内容、同一模型最近一次未完成的运行
+
+        通过 (笔记哈希, 模型) 索引直接定位,只读取这一份运行日志核对。
+
+        Args:
+            markdown_text: 笔记原文
+            directory: 日志目录
+            model: 模型组合,默认为当前配置的文本模型和视觉模型
+
+        Returns:
+            Optional[str]: 运行 ID,不存在时返回 None
+        """
+        directory = directory or os.path.join(config.CACHE_DIR, "runs")
+        if not os.path.isdir(directory):
+            return None
+
+        index = _run_index(directory)
+        key = DiskCache.make_key(_note_hash(markdown_text), model or _current_model())
+        run_id = index.get(key)
+        if not run_id:
+            return None
+        try:
+            journal = cls.load(run_id, directory)
+        except (OSError, ValueError, KeyError):
+            index.delete(key)
+            return None
+        if journal.completed or journal._index_key() != key:
+            index.delete(key)
+            return None
+        return journal.run_id
+
+    def _index_key(self) -> str:
+        """本运行在未完成运行索引中的键"""
+        return DiskCache.make_key(self.note_hash, self.model)
+
+    @property
+    def completed(self) -> bool:
+        """最终文章是否已生成"""
+        return self.article is not None
+
+    def get_image(self, index: int, url: str) -> Optional[dict]:
+        """获取已完成的图片结果"""
+        result = self.images.get(index)
+        return result if result and result['url'] == url else None
+
+    def get_link(self, index: int, url: str) -> Optional[dict]:
+        """获取已完成的链接结果"""
+        result = self.links.get(index)
+        return result if result and result['url'] == url else None
+
+    def record_image(self, index: int, result: dict):
+        """记录一张图片的处理结果"""
+        self.images[index] = result
+        self._append({'type': 'image', 'index': index, 'result': result})
+
+    def record_link(self, index: int, result: dict):
+        """记录一个链接的处理结果"""
+        self.links[index] = result
+        self._append({'type': 'link', 'index': index, 'result': result})
+
+    def record_article(self, content: str):
+        """记录最终文章,运行完成 (从未完成运行索引中移除)"""
+        self.article = content
+        self._append({'type': 'article', 'content': content})
+        index = _run_index(self.directory)
+        key = self._index_key()
+        if index.get(key) == self.run_id:
+            index.delete(key)
+
+    def _append(self, record: dict, mode: str = 'a'):
+        """追加一条记录并立即落盘"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, mode, encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _cleanup(directory: str):
+        """删除超过保留期限的运行日志"""
+        expire_before = time.time() - config.RUN_JOURNAL_RETENTION_DAYS * 86400
+        for path in Path(directory).glob("*.jsonl"):
+            try:
+                if path.stat().st_mtime < expire_before:
+                    path.unlink()
+            except OSError:
+                pass
+
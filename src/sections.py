@@ -0,0 +1,211 @@
+"""
+长笔记分段模块
+按标题把笔记切分为若干段,每段带上位于其中的图片和链接,
+分别重组后再拼接为完整文章
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from src.parser import ParsedContent
+
+# 段落开头的 YAML Front Matter (只允许出现在第一段)
+_FRONT_MATTER_RE = re.compile(r'^\s*---\s*\n.*?\n---\s*\n', re.DOTALL)
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+# 原文中的标题行: ATX 标题 (可以在引用块中) 和 Setext 标题的下划线
+_ATX_HEADING_RE = re.compile(r'^(?:[ \t]{0,3}>)*[ \t]{0,3}#{1,6}(?:[ \t]|$)')
+_SETEXT_UNDERLINE_RE = re.compile(r'^[ \t]{0,3}(?:=+|-+)[ \t]*$')
+
+
+@dataclass
+class Section:
+    """笔记的一段"""
+    index: int
+    total: int
+    text_blocks: List[str] = field(default_factory=list)
+    images_desc: List[Dict[str, str]] = field(default_factory=list)
+    links_summary: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def is_first(self) -> bool:
+        return self.index == 1
+
+    @property
+    def is_last(self) -> bool:
+        return self.index == self.total
+
+
+def _group_blocks(text_blocks: List[str], max_chars: int) -> List[List[str]]:
+    """
+    按标题分组,再把相邻的小组合并到 max_chars 左右
+
+    单个标题下的内容超过 max_chars 时按文本块继续切分。
+    """
+    groups: List[List[str]] = []
+    for block in text_blocks:
+        if block.startswith('# ') or not groups:
+            groups.append([])
+        groups[-1].append(block)
+
+    chunks: List[List[str]] = []
+    size = 0
+    for group in groups:
+        group_size = sum(len(block) for block in group)
+        if chunks and size + group_size <= max_chars:
+            chunks[-1].extend(group)
+            size += group_size
+            continue
+
+        chunks.append([])
+        size = 0
+        for block in group:
+            if chunks[-1] and size + len(block) > max_chars:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(block)
+            size += len(block)
+    return chunks
+
+
+def _heading_offsets(raw_markdown: str, has_front_matter: bool) -> List[int]:
+    """
+    按原文逐行找出各标题的起始位置 (跳过 Front Matter 和代码块)
+
+    标题文字中的加粗、行内代码和链接不影响定位。Setext 标题的位置为标题文字所在行。
+    """
+    offsets = []
+    position = 0
+    if has_front_matter:
+        match = _FRONT_MATTER_RE.match(raw_markdown)
+        if match:
+            position = match.end()
+
+    in_fence = False
+    previous = None  # 上一行的 (起始位置, 是否为普通文本行)
+    for line in raw_markdown[position:].splitlines(keepends=True):
+        stripped = line.rstrip('\r\n')
+        is_text = False
+        if _FENCE_RE.match(stripped):
+            in_fence = not in_fence
+        elif in_fence:
+            pass
+        elif _ATX_HEADING_RE.match(stripped):
+            offsets.append(position)
+        elif _SETEXT_UNDERLINE_RE.match(stripped) and previous and previous[1]:
+            offsets.append(previous[0])
+        else:
+            is_text = bool(stripped.strip())
+        previous = (position, is_text)
+        position += len(line)
+    return offsets
+
+
+def _chunk_offsets(chunks: List[List[str]], raw_markdown: str, has_front_matter: bool = False) -> List[int]:
+    """
+    定位每段在原文中的起始位置
+
+    以标题开头的段按标题在原文中的顺序定位;原文中找到的标题数与解析出的不一致,
+    或者段落不以标题开头时,用段首文字在原文中查找 (找不到时沿用上一段的位置)。
+    """
+    headings = _heading_offsets(raw_markdown, has_front_matter)
+    heading_counts = []
+    count = 0
+    for chunk in chunks:
+        heading_counts.append(count)
+        count += sum(1 for block in chunk if block.startswith('# '))
+    use_headings = count == len(headings)
+
+    offsets = [0]
+    cursor = 0
+    for chunk, heading_index in zip(chunks[1:], heading_counts[1:]):
+        first = chunk[0]
+        if use_headings and first.startswith('# '):
+            cursor = max(cursor, headings[heading_index])
+            offsets.append(cursor)
+            continue
+        probe = first[2:] if first.startswith('# ') else first
+        probe = probe.split('\n', 1)[0][:30].strip()
+        position = raw_markdown.find(probe, cursor) if probe else -1
+        if position >= 0:
+            cursor = position
+        offsets.append(cursor)
+    return offsets
+
+
+def _section_of(url: str, raw_markdown: str, offsets: List[int]) -> int:
+    """按 URL 首次出现的位置找到所属段的下标"""
+    position = raw_markdown.find(url)
+    index = 0
+    for i, offset in enumerate(offsets):
+        if offset <= position:
+            index = i
+    return index
+
+
+def split_sections(
+    parsed: ParsedContent,
+    images_desc: List[Dict[str, str]],
+    links_summary: List[Dict[str, str]],
+    max_chars: int
+) -> List[Section]:
+    """
+    把笔记切分为可以并行重组的若干段
+
+    Args:
+        parsed: 解析后的笔记
+        images_desc: 图片处理结果
+        links_summary: 链接处理结果
+        max_chars: 每段文本的目标字数
+
+    Returns:
+        List[Section]: 各段内容;笔记不需要切分时只有一段
+    """
+    chunks = _group_blocks(parsed.text_blocks, max_chars) or [[]]
+    total = len(chunks)
+    sections = [Section(i + 1, total, chunk) for i, chunk in enumerate(chunks)]
+    if total == 1:
+        sections[0].images_desc = list(images_desc)
+        sections[0].links_summary = list(links_summary)
+        return sections
+
+    offsets = _chunk_offsets(chunks, parsed.raw_markdown, parsed.front_matter is not None)
+    for img in images_desc:
+        sections[_section_of(img['url'], parsed.raw_markdown, offsets)].images_desc.append(img)
+    for link in links_summary:
+        sections[_section_of(link['url'], parsed.raw_markdown, offsets)].links_summary.append(link)
+    return sections
+
+
+def normalize_section(text: str, index: int) -> str:
+    """
+    拼接前整理一段的重组结果
+
+    第一段之后的内容去掉误生成的 Front Matter,并把一级标题降为二级,
+    保证整篇文章只有一个标题。
+
+    Args:
+        text: 该段的重组结果
+        index: 段序号 (从 1 开始)
+
+    Returns:
+        str: 整理后的内容
+    """
+    text = text.strip()
+    if index == 1:
+        return text
+
+    text = _FRONT_MATTER_RE.sub('', text, count=1)
+    lines = []
+    in_fence = False
+    for line in text.split('\n'):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and line.startswith('# '):
+            line = '#' + line
+        lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def stitch_sections(parts: List[str]) -> str:
+    """把各段的重组结果拼接为完整文章"""
+    return "\n\n".join(normalize_section(text, i) for i, text in enumerate(parts, 1))
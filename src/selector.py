@@ -0,0 +1,117 @@
+"""
+正文片段选择模块
+按与笔记上下文的相关度 (BM25) 从网页正文中挑选段落,在 token 预算内拼接,
+代替简单截取开头,不需要额外的模型调用
+"""
+import re
+import math
+from collections import Counter
+from typing import List
+
+_URL_RE = re.compile(r'https?://\S+')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+# BM25 参数
+_K1 = 1.5
+_B = 0.75
+
+
+def estimate_text_tokens(text: str) -> int:
+    """粗略估算文本 token 数: 中文约每字一个,其他字符约每 4 个一个"""
+    cjk = sum(len(run) for run in _CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, budget_tokens: int) -> str:
+    """按 estimate_text_tokens 的估算截取开头部分,使其不超过 token 预算"""
+    used = 0.0
+    for i, char in enumerate(text):
+        used += 1 if '\u4e00' <= char <= '\u9fff' else 0.25
+        if used > budget_tokens:
+            return text[:i]
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    """分词: 英文和数字按单词,中文按相邻两字 (单字词保留原样)"""
+    text = text.lower()
+    terms = _WORD_RE.findall(text)
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _bm25_scores(paragraphs: List[List[str]], query: List[str]) -> List[float]:
+    """计算每个段落对查询的 BM25 得分"""
+    count = len(paragraphs)
+    avg_length = sum(len(terms) for terms in paragraphs) / count or 1.0
+    document_frequency = Counter()
+    for terms in paragraphs:
+        document_frequency.update(set(terms))
+
+    query_terms = set(query)
+    scores = []
+    for terms in paragraphs:
+        frequency = Counter(terms)
+        norm = _K1 * (1 - _B + _B * len(terms) / avg_length)
+        score = 0.0
+        for term in query_terms:
+            tf = frequency.get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            score += idf * tf * (_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def select_relevant(content: str, query: str, budget_tokens: int) -> str:
+    """
+    从正文中挑选与查询最相关的段落
+
+    正文在预算内时原样返回;否则按 BM25 得分从高到低选入相关段落,
+    剩余预算再依次放入靠前的无关段落,最后按原文顺序拼接。查询与正文
+    没有任何重合时即退化为截取开头的段落。
+
+    Args:
+        content: 网页正文 (按行分段)
+        query: 查询文本,通常为链接标题和笔记中的上下文
+        budget_tokens: token 预算
+
+    Returns:
+        str: 选出的正文片段
+    """
+    if estimate_text_tokens(content) <= budget_tokens:
+        return content
+
+    paragraphs = [line.strip() for line in content.split('\n') if line.strip()]
+    if not paragraphs:
+        return ""
+    costs = [estimate_text_tokens(paragraph) for paragraph in paragraphs]
+    query_terms = tokenize(_URL_RE.sub(' ', query))
+    scores = _bm25_scores([tokenize(paragraph) for paragraph in paragraphs], query_terms)
+
+    # 相关段落按得分从高到低优先,得分相同时靠前的段落优先 (开头通常是摘要);
+    # 剩余预算再按原文顺序用无关段落填满
+    scored = sorted((i for i in range(len(paragraphs)) if scores[i] > 0), key=lambda i: (-scores[i], i))
+    order = scored + [i for i in range(len(paragraphs)) if scores[i] <= 0]
+
+    chosen = []
+    used = 0
+    for i in order:
+        if used + costs[i] > budget_tokens:
+            continue
+        chosen.append(i)
+        used += costs[i]
+
+    if not chosen:
+        # 单个段落就超过预算,截取得分最高的段落
+        best = paragraphs[order[0]]
+        return truncate_to_tokens(best, budget_tokens) + "..."
+
+    return "\n".join(paragraphs[i] for i in sorted(chosen))
@@ -1,28 +1,500 @@
 """
 网页内容抓取模块
-实现双重策略: readability (主) + Jina AI Reader (备)
+实现双重策略: readability (主) + Jina AI Reader (备),两者竞速并按域名学习胜出的策略
 """
+import re
+import time
 import logging
-from typing import Optional
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Deque, Iterable, Iterator, List, Optional, Dict, Mapping, Tuple
+from urllib.parse import urlsplit, urlunsplit, urljoin, parse_qsl, urlencode
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
-from readability import Document
 from config import config
+from src.cache import DiskCache, get_cache, get_page_cache
+from src.extractor import extract_text, get_extraction_pool
+from src.http_pool import HttpPool, get_http_pool
+from src.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
 
-class WebScraper:
+JINA_HEADERS = {'Accept': 'text/plain'}
+
+# 交给 readability 提取正文的内容类型 (没有 Content-Type 时也会尝试)
+HTML_TYPES = {'text/html', 'application/xhtml+xml'}
+CHUNK_SIZE = 64 * 1024
+
+STRATEGY_NAMES = {'readability': 'readability', 'jina': 'Jina AI'}
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', 'spm', 'ref_src', 'share_source', 'vd_source',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+_LINK_TAG_RE = re.compile(rb'<link\b[^>]*>', re.IGNORECASE)
+_REL_CANONICAL_RE = re.compile(rb'\brel\s*=\s*["\']?canonical\b', re.IGNORECASE)
+_HREF_RE = re.compile(rb'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+_HTML_END_RE = re.compile(rb'</html\s*>', re.IGNORECASE)
+_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化网页 URL
+
+    去掉跟踪参数 (utm_* 等) 和片段,协议和域名转为小写,省略默认端口,
+    同一篇文章的不同分享链接得到相同的 URL。
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        str: 规范化后的 URL,非 http(s) 地址原样返回
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return url
+
+    try:
+        port = parts.port
+    except ValueError:
+        return url
+    netloc = parts.hostname.lower()
+    if port is not None and port != {'http': 80, 'https': 443}[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    query = parts.query
+    params = parse_qsl(query, keep_blank_values=True)
+    kept = [(key, value) for key, value in params
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    if len(kept) != len(params):
+        query = urlencode(kept)
+
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def extract_canonical_link(html: bytes, url: str) -> Optional[str]:
+    """
+    读取网页声明的规范地址 (<link rel="canonical">)
+
+    Args:
+        html: 原始 HTML 字节
+        url: 网页 URL,用于解析相对地址
+
+    Returns:
+        Optional[str]: 规范化后的规范地址,没有声明时返回 None
+    """
+    head = html[:200_000]
+    for tag in _LINK_TAG_RE.findall(head):
+        if not _REL_CANONICAL_RE.search(tag):
+            continue
+        match = _HREF_RE.search(tag)
+        if not match:
+            continue
+        href = next(group for group in match.groups() if group is not None)
+        href = href.decode('utf-8', errors='ignore').strip()
+        if href:
+            canonical = canonicalize_url(urljoin(url, href))
+            if canonical.startswith(('http://', 'https://')):
+                return canonical
+    return None
+
+
+def extract_readable_text(html: bytes, url: str, charset: Optional[str] = None) -> Optional[str]:
+    """
+    使用配置的引擎 (EXTRACTOR) 从 HTML 中提取正文
+
+    Args:
+        html: 原始 HTML 字节
+        url: 网页 URL (仅用于日志)
+        charset: 响应头声明的字符集
+
+    Returns:
+        Optional[str]: 正文内容,过短时返回 None
+    """
+    return extract_text(html, url, config.EXTRACTOR, charset)
+
+
+def check_jina_text(text: str, url: str) -> Optional[str]:
+    """
+    校验 Jina AI Reader 返回的正文
+
+    Args:
+        text: Jina 返回的文本
+        url: 网页 URL (仅用于日志)
+
+    Returns:
+        Optional[str]: 正文内容,过短时返回 None
+    """
+    content = text.strip()
+
+    if len(content) < 100:
+        logger.warning(f"Jina 返回内容过短 ({len(content)} 字): {url}")
+        return None
+
+    return content
+
+
+class UnsupportedContent(Exception):
+    """响应不是可以提取正文的网页 (内容类型不符或超过大小上限)"""
+
+
+def check_response_headers(
+    headers: Mapping[str, str],
+    max_bytes: int,
+    allowed_types: Optional[set] = HTML_TYPES
+):
+    """
+    下载响应体之前检查 Content-Type 和 Content-Length
+
+    Args:
+        headers: 响应头
+        max_bytes: 响应体字节数上限
+        allowed_types: 允许的内容类型,None 表示不限制
+
+    Raises:
+        UnsupportedContent: 内容类型不符 (如 PDF、视频) 或声明的长度超过上限
+    """
+    content_type = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    if allowed_types and content_type and content_type not in allowed_types:
+        raise UnsupportedContent(f"不支持的内容类型: {content_type}")
+
+    length = headers.get('Content-Length', '')
+    if length.isdigit() and int(length) > max_bytes:
+        raise UnsupportedContent(f"内容过大: {int(length)} 字节 (上限 {max_bytes})")
+
+
+def response_charset(headers: Mapping[str, str], default: Optional[str] = 'utf-8') -> Optional[str]:
+    """读取响应头声明的字符集,没有声明时返回 default"""
+    match = _CHARSET_RE.search(headers.get('Content-Type', ''))
+    return match.group(1) if match else default
+
+
+class BodyReader:
+    """
+    有上限地累积响应体
+
+    超过 max_bytes 时截断,HTML 读到 </html> 后提前结束,
+    之后的字节不再下载;多个链接并发抓取时每个请求占用的内存有固定上限。
+    """
+
+    def __init__(self, url: str, max_bytes: int, stop_at_html_end: bool = True):
+        """
+        初始化读取器
+
+        Args:
+            url: 请求地址 (仅用于日志)
+            max_bytes: 最多保留的字节数
+            stop_at_html_end: 读到 </html> 时是否结束
+        """
+        self.url = url
+        self.max_bytes = max_bytes
+        self.stop_at_html_end = stop_at_html_end
+        self.truncated = False
+        self._body = bytearray()
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        追加一段数据
+
+        Returns:
+            bool: 为 True 时已经足够,应停止读取
+        """
+        # 带上前一段末尾,避免 </html> 恰好跨越两段
+        tail = bytes(self._body[-7:]) + chunk
+        self._body += chunk
+        if len(self._body) >= self.max_bytes:
+            self.truncated = len(self._body) > self.max_bytes
+            del self._body[self.max_bytes:]
+            if self.truncated:
+                logger.warning(f"内容超过 {self.max_bytes} 字节,只使用开头部分: {self.url}")
+            return True
+        return self.stop_at_html_end and _HTML_END_RE.search(tail) is not None
+
+    def getvalue(self) -> bytes:
+        """获取已读取的内容"""
+        return bytes(self._body)
+
+
+def parse_domain_ttls(spec: str) -> Dict[str, int]:
+    """
+    解析按域名配置的缓存有效期
+
+    Args:
+        spec: 形如 "github.com=3600,docs.python.org=604800" 的配置串
+
+    Returns:
+        Dict[str, int]: {域名: 有效期秒数}
+    """
+    ttls = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        domain, ttl = item.split('=', 1)
+        try:
+            ttls[domain.strip().lower()] = int(ttl)
+        except ValueError:
+            logger.warning(f"忽略无效的域名缓存配置: {item}")
+    return ttls
+
+
+class FetchCancelled(Exception):
+    """竞速中另一策略已经胜出,放弃本次请求"""
+
+
+class DomainStrategies:
+    """
+    按域名记录竞速中胜出的抓取策略
+
+    先返回可用正文的策略记一次胜出,计数超过上限时全部减半,近期结果权重更高。
+    Jina 在某个域名上胜出较多 (例如需要执行 JS 才有正文的网站) 时,
+    下次不再等待 readability,两个请求同时发出。
+    记录保存在缓存目录中,缓存被禁用时只保存在内存中。
+    """
+
+    MAX_COUNT = 16
+
+    def __init__(self, cache: Optional[DiskCache] = None, preferred: Iterable[str] = ()):
+        """
+        初始化记录
+
+        Args:
+            cache: 持久化记录的缓存,None 表示只保存在内存中
+            preferred: 始终同时发出 Jina 请求的域名 (包括其子域名)
+        """
+        self.cache = cache
+        self.preferred = {domain.strip().lower() for domain in preferred if domain.strip()}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, domain: str) -> Dict[str, int]:
+        """读取域名的胜出计数 (调用方持有锁)"""
+        counts = self._counts.get(domain)
+        if counts is None:
+            stored = self.cache.get(DiskCache.make_key("strategy", domain)) if self.cache else None
+            counts = self._counts[domain] = dict(stored or {})
+        return counts
+
+    def record(self, domain: str, strategy: str):
+        """记录一次胜出"""
+        with self._lock:
+            counts = self._load(domain)
+            counts[strategy] = counts.get(strategy, 0) + 1
+            if counts[strategy] > self.MAX_COUNT:
+                counts = self._counts[domain] = {name: count // 2 for name, count in counts.items()}
+            if self.cache is not None:
+                self.cache.set(DiskCache.make_key("strategy", domain), counts)
+
+    def prefers_jina(self, domain: str) -> bool:
+        """该域名是否应立即发出 Jina 请求"""
+        if any(domain == known or domain.endswith('.' + known) for known in self.preferred):
+            return True
+        with self._lock:
+            counts = self._load(domain)
+            jina = counts.get('jina', 0)
+            return jina >= 2 and jina > counts.get('readability', 0)
+
+
+_strategies: Optional[DomainStrategies] = None
+_race_executor: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_domain_strategies() -> DomainStrategies:
+    """获取进程内共享的域名策略记录"""
+    global _strategies
+    with _shared_lock:
+        if _strategies is None:
+            cache = get_cache("fetch_strategies", max_entries=5000) if config.CACHE_ENABLED else None
+            _strategies = DomainStrategies(cache, config.JINA_PREFERRED_DOMAINS.split(','))
+        return _strategies
+
+
+def _get_race_executor() -> ThreadPoolExecutor:
+    """获取竞速请求共用的线程池"""
+    global _race_executor
+    with _shared_lock:
+        if _race_executor is None:
+            _race_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="fetch-race")
+        return _race_executor
+
+
+class _PageCacheMixin:
+    """
+    页面缓存逻辑 (同步/异步抓取器共用)
+
+    缓存条目保存提取后的正文以及 ETag/Last-Modified 校验信息。
+    未过期的条目直接返回;过期条目通过条件请求重新校验,
+    服务端返回 304 时沿用已保存的正文,省去下载和解析。
+    """
+
+    page_cache: Optional[DiskCache]
+    domain_ttls: Dict[str, int]
+    default_ttl: int
+
+    def _init_page_cache(self):
+        self.page_cache = get_page_cache()
+        self._declared_canonical: Dict[str, str] = {}
+        self.default_ttl = config.PAGE_CACHE_TTL
+        self.domain_ttls = parse_domain_ttls(config.PAGE_CACHE_DOMAIN_TTL)
+
+    def _ttl_for(self, url: str) -> int:
+        """获取 URL 所属域名的缓存有效期 (最长后缀匹配)"""
+        host = (urlsplit(url).hostname or '').lower()
+        best = None
+        for domain, ttl in self.domain_ttls.items():
+            if host == domain or host.endswith('.' + domain):
+                if best is None or len(domain) > len(best):
+                    best = domain
+        return self.domain_ttls[best] if best is not None else self.default_ttl
+
+    def _cached_page(self, url: str) -> Optional[dict]:
+        """读取缓存条目"""
+        if self.page_cache is None:
+            return None
+        return self.page_cache.get(DiskCache.make_key("page", url))
+
+    def _is_fresh(self, url: str, entry: dict) -> bool:
+        """判断缓存条目是否仍在有效期内"""
+        return time.time() - entry['fetched_at'] < self._ttl_for(url)
+
+    @staticmethod
+    def _conditional_headers(headers: Mapping[str, str], entry: Optional[dict], strategy: str) -> Dict[str, str]:
+        """为同一策略的过期条目附加条件请求头"""
+        headers = dict(headers)
+        if entry and entry.get('strategy') == strategy:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _store_page(
+        self,
+        url: str,
+        strategy: str,
+        content: str,
+        headers: Mapping[str, str],
+        canonical: Optional[str] = None
+    ):
+        """保存提取结果、校验信息和网页声明的规范地址"""
+        self._remember_canonical(url, canonical)
+        if self.page_cache is None:
+            return
+        self.page_cache.set(DiskCache.make_key("page", url), {
+            'strategy': strategy,
+            'content': content,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'canonical': canonical
+        })
+
+    def _remember_canonical(self, url: str, canonical: Optional[str]):
+        """记录网页声明的规范地址"""
+        if canonical and canonical != url:
+            self._declared_canonical[url] = canonical
+
+    def canonical_url(self, url: str) -> str:
+        """
+        获取链接的规范地址
+
+        已抓取的网页声明了 rel=canonical 时使用声明的地址 (如 AMP 页面指向原文),
+        否则为去掉跟踪参数后的 URL。
+
+        Args:
+            url: 链接 URL
+
+        Returns:
+            str: 规范地址
+        """
+        url = canonicalize_url(url)
+        return self._declared_canonical.get(url, url)
+
+    def _revalidated(self, url: str, entry: dict) -> str:
+        """服务端返回 304,刷新缓存时间并沿用已保存的正文"""
+        logger.info(f"页面未修改 (304),使用缓存内容: {url}")
+        entry = dict(entry, fetched_at=time.time())
+        self._remember_canonical(url, entry.get('canonical'))
+        self.page_cache.set(DiskCache.make_key("page", url), entry)
+        return entry['content']
+
+
+class WebScraper(_PageCacheMixin):
     """网页内容抓取器"""
 
-    def __init__(self):
+    def __init__(self, http: Optional[HttpPool] = None):
+        """
+        初始化抓取器
+
+        Args:
+            http: HTTP 连接池,默认使用进程内共享的连接池
+        """
+        self.http = http or get_http_pool()
         self.timeout = config.REQUEST_TIMEOUT
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        }
+        self.max_bytes = int(config.PAGE_MAX_DOWNLOAD_MB * 1024 * 1024)
+        self.headers = dict(DEFAULT_HEADERS)
+        self.retry_policy = RetryPolicy(deadline=config.SCRAPE_RETRY_DEADLINE)
+        self.strategies = get_domain_strategies()
+        self.extraction = get_extraction_pool()
+        self._init_page_cache()
+
+    def _get(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        description: str,
+        cancel: Optional[threading.Event] = None,
+        html: bool = True
+    ) -> Tuple[int, Optional[bytes], Mapping[str, str]]:
+        """
+        带重试的流式 GET 请求
+
+        先检查响应头,再有上限地读取响应体 (见 BodyReader)。
+        状态码为 4xx/5xx 时抛出 HTTPError,内容类型或长度不符时抛出 UnsupportedContent,
+        被取消时抛出 FetchCancelled。
+
+        Args:
+            url: 请求地址
+            headers: 请求头
+            description: 调用描述 (用于日志)
+            cancel: 竞速中另一策略胜出时被设置
+            html: 是否为网页 (只接受 HTML 内容类型,读到 </html> 时结束)
+
+        Returns:
+            (status, body, headers): 304 时 body 为 None
+        """
+        def attempt(timeout: float):
+            if cancel is not None and cancel.is_set():
+                raise FetchCancelled()
+            with self.http.stream(url, headers=headers, timeout=timeout) as response:
+                if response.status_code == 304:
+                    return response.status_code, None, response.headers
+                response.raise_for_status()
+                check_response_headers(response.headers, self.max_bytes, HTML_TYPES if html else None)
+
+                reader = BodyReader(url, self.max_bytes, stop_at_html_end=html)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if cancel is not None and cancel.is_set():
+                        raise FetchCancelled()
+                    if reader.feed(chunk):
+                        break
+                return response.status_code, reader.getvalue(), response.headers
+
+        return self.retry_policy.call(attempt, description, self.timeout)
 
     def fetch_content(self, url: str) -> Optional[str]:
         """
@@ -34,62 +506,132 @@ class WebScraper:
         Returns:
             Optional[str]: 提取的正文内容,失败返回 None
         """
+        url = canonicalize_url(url)
         logger.info(f"开始抓取: {url}")
 
+        cached = self._cached_page(url)
+        if cached and self._is_fresh(url, cached):
+            logger.info(f"页面缓存命中: {url}")
+            self._remember_canonical(url, cached.get('canonical'))
+            return cached['content']
+
+        if config.FETCH_RACE_ENABLED:
+            content = self._race(url, cached)
+        else:
+            content = self._fetch_sequential(url, cached)
+        if content:
+            return content
+
+        if cached:
+            logger.warning(f"抓取失败,使用过期的缓存内容: {url}")
+            return cached['content']
+
+        logger.error(f"所有抓取方法均失败: {url}")
+        return None
+
+    def _fetch_sequential(self, url: str, cached: Optional[dict]) -> Optional[str]:
+        """依次尝试 readability 和 Jina AI"""
         # 策略1: readability (快速)
-        content = self._fetch_with_readability(url)
+        content = self._fetch_with_readability(url, cached)
         if content:
             logger.info(f"成功使用 readability 抓取: {url}")
             return content
 
         # 策略2: Jina AI Reader (后备)
         logger.warning(f"readability 失败,尝试 Jina AI: {url}")
-        content = self._fetch_with_jina(url)
+        content = self._fetch_with_jina(url, cached)
         if content:
             logger.info(f"成功使用 Jina AI 抓取: {url}")
-            return content
+        return content
 
-        logger.error(f"所有抓取方法均失败: {url}")
-        return None
-
-    def _fetch_with_readability(self, url: str) -> Optional[str]:
+    def _race(self, url: str, cached: Optional[dict]) -> Optional[str]:
         """
-        使用 readability-lxml 提取正文
+        readability 与 Jina AI 竞速
+
+        先发出 readability 请求,超过 JINA_RACE_DELAY 仍未成功 (或已经失败) 时再发出 Jina 请求;
+        该域名过去多由 Jina 胜出时两个请求同时发出。先返回可用正文的一方胜出,
+        另一方被取消: 尚未开始的直接取消,进行中的不再重试,也不再解析和写入缓存。
 
         Args:
-            url: 网页 URL
+            url: 规范化后的网页 URL
+            cached: 过期的缓存条目
 
         Returns:
-            Optional[str]: 正文内容
+            Optional[str]: 胜出策略的正文,两者都失败时返回 None
         """
-        try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
-
-            # 使用 readability 提取正文
-            doc = Document(response.content)
-            html_content = doc.summary()
+        domain = (urlsplit(url).hostname or '').lower()
+        jina_first = self.strategies.prefers_jina(domain)
+        jina_at = time.monotonic() + (0.0 if jina_first else config.JINA_RACE_DELAY)
+        cancel = threading.Event()
+        executor = _get_race_executor()
+        pending = {executor.submit(self._fetch_with_readability, url, cached, cancel): 'readability'}
+        jina_started = False
 
-            # 使用 BeautifulSoup 清洗 HTML
-            soup = BeautifulSoup(html_content, 'lxml')
-
-            # 移除脚本和样式
-            for tag in soup(['script', 'style', 'nav', 'footer', 'aside']):
-                tag.decompose()
+        try:
+            while pending or not jina_started:
+                if not jina_started and (not pending or time.monotonic() >= jina_at):
+                    if not pending:
+                        logger.warning(f"readability 失败,尝试 Jina AI: {url}")
+                    elif jina_first:
+                        logger.info(f"该域名通常由 Jina AI 胜出,同时发出请求: {url}")
+                    else:
+                        logger.info(f"readability 超过 {config.JINA_RACE_DELAY:g} 秒未完成,同时尝试 Jina AI: {url}")
+                    pending[executor.submit(self._fetch_with_jina, url, cached, cancel)] = 'jina'
+                    jina_started = True
+
+                timeout = None if jina_started else max(0.0, jina_at - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    strategy = pending.pop(future)
+                    content = future.result()
+                    if content:
+                        self.strategies.record(domain, strategy)
+                        logger.info(f"成功使用 {STRATEGY_NAMES[strategy]} 抓取: {url}")
+                        return content
+            return None
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+
+    def _fetch_with_readability(
+        self,
+        url: str,
+        cached: Optional[dict] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[str]:
+        """
+        下载网页并在本地提取正文
 
-            # 提取文本
-            text = soup.get_text(separator='\n', strip=True)
+        下载在调用线程中进行,正文提取交给进程池 (见 ExtractionPool)。
 
-            # 清洗空行
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            clean_text = '\n'.join(lines)
+        Args:
+            url: 网页 URL
+            cached: 过期的缓存条目,存在时发送条件请求
+            cancel: 竞速中另一策略胜出时被设置,之后不再重试和解析
 
-            if len(clean_text) < 100:
-                logger.warning(f"提取的内容过短 ({len(clean_text)} 字): {url}")
+        Returns:
+            Optional[str]: 正文内容
+        """
+        try:
+            headers = self._conditional_headers(self.headers, cached, 'readability')
+            status, html, response_headers = self._get(url, headers, f"网页请求 ({url})", cancel)
+            if cancel is not None and cancel.is_set():
                 return None
+            if status == 304:
+                return self._revalidated(url, cached) if cached else None
 
-            return clean_text
+            content = self.extraction.extract(html, url, response_charset(response_headers, None))
+            if content:
+                canonical = extract_canonical_link(html, url)
+                self._store_page(url, 'readability', content, response_headers, canonical)
+            return content
 
+        except FetchCancelled:
+            return None
+        except UnsupportedContent as e:
+            logger.warning(f"跳过 readability ({url}): {str(e)}")
+            return None
         except requests.RequestException as e:
             logger.error(f"请求失败 ({url}): {str(e)}")
             return None
@@ -97,12 +639,19 @@ class WebScraper:
             logger.error(f"readability 解析失败 ({url}): {str(e)}")
             return None
 
-    def _fetch_with_jina(self, url: str) -> Optional[str]:
+    def _fetch_with_jina(
+        self,
+        url: str,
+        cached: Optional[dict] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[str]:
         """
         使用 Jina AI Reader 提取正文
 
         Args:
             url: 网页 URL
+            cached: 过期的缓存条目,存在时发送条件请求
+            cancel: 竞速中另一策略胜出时被设置,之后不再重试和解析
 
         Returns:
             Optional[str]: 正文内容 (Markdown 格式)
@@ -110,21 +659,29 @@ class WebScraper:
         try:
             jina_url = f"{config.JINA_READER_BASE}{url}"
 
-            response = requests.get(
+            status, body, response_headers = self._get(
                 jina_url,
-                headers={'Accept': 'text/plain'},
-                timeout=self.timeout
+                self._conditional_headers(JINA_HEADERS, cached, 'jina'),
+                f"Jina AI 请求 ({url})",
+                cancel,
+                html=False
             )
-            response.raise_for_status()
-
-            content = response.text.strip()
-
-            if len(content) < 100:
-                logger.warning(f"Jina 返回内容过短 ({len(content)} 字): {url}")
+            if cancel is not None and cancel.is_set():
                 return None
+            if status == 304:
+                return self._revalidated(url, cached) if cached else None
 
+            text = body.decode(response_charset(response_headers), errors='replace')
+            content = check_jina_text(text, url)
+            if content:
+                self._store_page(url, 'jina', content, response_headers)
             return content
 
+        except FetchCancelled:
+            return None
+        except UnsupportedContent as e:
+            logger.warning(f"跳过 Jina AI ({url}): {str(e)}")
+            return None
         except requests.RequestException as e:
             logger.error(f"Jina AI 请求失败 ({url}): {str(e)}")
             return None
@@ -132,20 +689,297 @@ class WebScraper:
             logger.error(f"Jina AI 解析失败 ({url}): {str(e)}")
             return None
 
-    def fetch_multiple(self, urls: list[str]) -> dict[str, Optional[str]]:
+    def fetch_multiple(self, urls: list[str], max_workers: Optional[int] = None) -> dict[str, Optional[str]]:
         """
-        批量抓取多个网页
+        批量抓取多个网页 (并发执行,见 iter_fetch)
 
         Args:
             urls: URL 列表
+            max_workers: 并发抓取数,默认 FETCH_CONCURRENCY
 
         Returns:
-            dict: {url: content} 映射
+            dict: {url: content} 映射,顺序与输入一致
+        """
+        results = dict(self.iter_fetch(urls, max_workers))
+        return {url: results.get(url) for url in urls}
+
+    def iter_fetch(
+        self,
+        urls: Iterable[str],
+        max_workers: Optional[int] = None,
+        max_per_host: Optional[int] = None
+    ) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        并发抓取多个网页,按完成顺序逐个返回结果
+
+        同时进行的抓取不超过 max_workers 个,同一主机不超过 max_per_host 个。
+        各主机轮流取出下一个 URL,链接集中在少数网站时不会占满所有线程,
+        其他网站的链接也能尽早开始。调用方拿到第一个网页即可开始后续处理;
+        提前结束迭代时,尚未开始的抓取会被取消。
+
+        Args:
+            urls: URL 列表 (规范地址相同的 URL 只抓取一次)
+            max_workers: 并发抓取数,默认 FETCH_CONCURRENCY
+            max_per_host: 每个主机的并发抓取数,默认 HTTP_MAX_PER_HOST
+
+        Yields:
+            (url, content): 输入中的 URL 和正文,失败时 content 为 None
         """
-        results = {}
+        max_workers = max(1, max_workers or config.FETCH_CONCURRENCY)
+        max_per_host = max(1, max_per_host or config.HTTP_MAX_PER_HOST)
+
+        # 按规范地址合并重复的 URL,再按主机排队
+        aliases: Dict[str, List[str]] = {}
         for url in urls:
-            results[url] = self.fetch_content(url)
-        return results
+            aliases.setdefault(canonicalize_url(url), []).append(url)
+        if not aliases:
+            return
+        queues: Dict[str, Deque[str]] = {}
+        for canonical in aliases:
+            queues.setdefault((urlsplit(canonical).hostname or '').lower(), deque()).append(canonical)
+
+        hosts = deque(queues)
+        active: Dict[str, int] = {host: 0 for host in queues}
+        pending: Dict[Future, Tuple[str, str]] = {}
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(aliases)), thread_name_prefix="fetch")
+
+        def fill():
+            """轮流从各主机取出 URL 提交,直到线程占满或剩余主机都已达到并发上限"""
+            skipped = 0
+            while hosts and len(pending) < max_workers and skipped < len(hosts):
+                host = hosts[0]
+                hosts.rotate(-1)
+                if active[host] >= max_per_host:
+                    skipped += 1
+                    continue
+                canonical = queues[host].popleft()
+                if not queues[host]:
+                    hosts.remove(host)
+                active[host] += 1
+                pending[executor.submit(self._fetch_quietly, canonical)] = (canonical, host)
+                skipped = 0
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    canonical, host = pending.pop(future)
+                    active[host] -= 1
+                    finished.append((canonical, future.result()))
+                # 先补充新的抓取,再把结果交给调用方
+                fill()
+                for canonical, content in finished:
+                    for url in aliases[canonical]:
+                        yield url, content
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _fetch_quietly(self, url: str) -> Optional[str]:
+        """抓取网页,意外异常记录日志后返回 None"""
+        try:
+            return self.fetch_content(url)
+        except Exception as e:
+            logger.error(f"抓取出错 ({url}): {str(e)}")
+            return None
+
+
+class AsyncWebScraper(_PageCacheMixin):
+    """
+    网页内容异步抓取器 (基于 aiohttp)
+
+    与 WebScraper 采用相同的双重策略和竞速方式,落败的一方直接取消。网络请求在事件循环上并发执行,
+    正文提取属于 CPU 工作,放到进程池中执行以免阻塞事件循环。
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, max_concurrency: int = config.ASYNC_MAX_CONCURRENCY):
+        """
+        初始化抓取器
+
+        Args:
+            session: 共享的 aiohttp 会话
+            max_concurrency: 同时进行中的抓取请求上限
+        """
+        self.session = session
+        self.timeout = config.REQUEST_TIMEOUT
+        self.max_bytes = int(config.PAGE_MAX_DOWNLOAD_MB * 1024 * 1024)
+        self.headers = dict(DEFAULT_HEADERS)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.retry_policy = RetryPolicy(deadline=config.SCRAPE_RETRY_DEADLINE)
+        self.strategies = get_domain_strategies()
+        self.extraction = get_extraction_pool()
+        self._init_page_cache()
+
+    async def _get(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        description: str,
+        html: bool = True
+    ) -> Tuple[int, Optional[bytes], Mapping[str, str]]:
+        """
+        带重试的流式 GET 请求 (同 WebScraper._get),状态码为 4xx/5xx 时抛出 ClientResponseError
+
+        Returns:
+            (status, body, headers): 304 时 body 为 None
+        """
+        async def attempt(timeout: float):
+            async with self._host_slot(url), self.semaphore:
+                async with self.session.get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    if response.status == 304:
+                        return response.status, None, response.headers
+                    response.raise_for_status()
+                    check_response_headers(response.headers, self.max_bytes, HTML_TYPES if html else None)
+
+                    reader = BodyReader(url, self.max_bytes, stop_at_html_end=html)
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        if reader.feed(chunk):
+                            break
+                    return response.status, reader.getvalue(), response.headers
+
+        return await self.retry_policy.call_async(attempt, description, self.timeout)
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """获取 URL 所属主机的并发名额 (与同步抓取器的 HTTP_MAX_PER_HOST 一致)"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}".lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(config.HTTP_MAX_PER_HOST)
+        return slot
+
+    async def fetch_content(self, url: str) -> Optional[str]:
+        """异步版 WebScraper.fetch_content"""
+        url = canonicalize_url(url)
+        logger.info(f"开始抓取: {url}")
+
+        cached = self._cached_page(url)
+        if cached and self._is_fresh(url, cached):
+            logger.info(f"页面缓存命中: {url}")
+            self._remember_canonical(url, cached.get('canonical'))
+            return cached['content']
+
+        if config.FETCH_RACE_ENABLED:
+            content = await self._race(url, cached)
+        else:
+            content = await self._fetch_sequential(url, cached)
+        if content:
+            return content
+
+        if cached:
+            logger.warning(f"抓取失败,使用过期的缓存内容: {url}")
+            return cached['content']
+
+        logger.error(f"所有抓取方法均失败: {url}")
+        return None
+
+    async def _fetch_sequential(self, url: str, cached: Optional[dict]) -> Optional[str]:
+        """依次尝试 readability 和 Jina AI"""
+        content = await self._fetch_with_readability(url, cached)
+        if content:
+            logger.info(f"成功使用 readability 抓取: {url}")
+            return content
+
+        logger.warning(f"readability 失败,尝试 Jina AI: {url}")
+        content = await self._fetch_with_jina(url, cached)
+        if content:
+            logger.info(f"成功使用 Jina AI 抓取: {url}")
+        return content
+
+    async def _race(self, url: str, cached: Optional[dict]) -> Optional[str]:
+        """异步版 WebScraper._race,落败的任务被取消"""
+        loop = asyncio.get_running_loop()
+        domain = (urlsplit(url).hostname or '').lower()
+        jina_first = self.strategies.prefers_jina(domain)
+        jina_at = loop.time() + (0.0 if jina_first else config.JINA_RACE_DELAY)
+        pending = {asyncio.ensure_future(self._fetch_with_readability(url, cached)): 'readability'}
+        jina_started = False
+
+        try:
+            while pending or not jina_started:
+                if not jina_started and (not pending or loop.time() >= jina_at):
+                    if not pending:
+                        logger.warning(f"readability 失败,尝试 Jina AI: {url}")
+                    elif jina_first:
+                        logger.info(f"该域名通常由 Jina AI 胜出,同时发出请求: {url}")
+                    else:
+                        logger.info(f"readability 超过 {config.JINA_RACE_DELAY:g} 秒未完成,同时尝试 Jina AI: {url}")
+                    pending[asyncio.ensure_future(self._fetch_with_jina(url, cached))] = 'jina'
+                    jina_started = True
+
+                timeout = None if jina_started else max(0.0, jina_at - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    strategy = pending.pop(task)
+                    content = task.result()
+                    if content:
+                        self.strategies.record(domain, strategy)
+                        logger.info(f"成功使用 {STRATEGY_NAMES[strategy]} 抓取: {url}")
+                        return content
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_with_readability(self, url: str, cached: Optional[dict] = None) -> Optional[str]:
+        """下载网页并在进程池中提取正文"""
+        try:
+            headers = self._conditional_headers(self.headers, cached, 'readability')
+            status, html, response_headers = await self._get(url, headers, f"网页请求 ({url})")
+            if status == 304:
+                return self._revalidated(url, cached) if cached else None
+
+            content = await self.extraction.extract_async(html, url, response_charset(response_headers, None))
+            if content:
+                canonical = extract_canonical_link(html, url)
+                self._store_page(url, 'readability', content, response_headers, canonical)
+            return content
+
+        except UnsupportedContent as e:
+            logger.warning(f"跳过 readability ({url}): {str(e)}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"请求失败 ({url}): {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"readability 解析失败 ({url}): {str(e)}")
+            return None
+
+    async def _fetch_with_jina(self, url: str, cached: Optional[dict] = None) -> Optional[str]:
+        """使用 Jina AI Reader 提取正文"""
+        try:
+            jina_url = f"{config.JINA_READER_BASE}{url}"
+
+            headers = self._conditional_headers(JINA_HEADERS, cached, 'jina')
+            status, body, response_headers = await self._get(
+                jina_url, headers, f"Jina AI 请求 ({url})", html=False
+            )
+            if status == 304:
+                return self._revalidated(url, cached) if cached else None
+
+            text = body.decode(response_charset(response_headers), errors='replace')
+            content = check_jina_text(text, url)
+            if content:
+                self._store_page(url, 'jina', content, response_headers)
+            return content
+
+        except UnsupportedContent as e:
+            logger.warning(f"跳过 Jina AI ({url}): {str(e)}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Jina AI 请求失败 ({url}): {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Jina AI 解析失败 ({url}): {str(e)}")
+            return None
 
 
 # 便捷函数
@@ -2,95 +2,43 @@
 智谱 AI 客户端封装
 支持 GLM-4.6 (文本) 和 GLM-4.5V (视觉)
 """
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Tuple
 import logging
+import re
+import json
+import time
+import asyncio
+import hashlib
+import aiohttp
 from zhipuai import ZhipuAI
 from config import config
+from src.rate_limiter import RateLimiter, get_rate_limiter, estimate_tokens
+from src.retry import RetryPolicy
+from src.hedging import Hedger, get_hedger
 
 logger = logging.getLogger(__name__)
 
 
-class ZhipuClient:
-    """智谱 AI 客户端封装"""
-
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        初始化客户端
-
-        Args:
-            api_key: API 密钥,如果不提供则从配置读取
-        """
-        self.api_key = api_key or config.ZHIPU_API_KEY
-        if not self.api_key:
-            raise ValueError("未提供智谱 API Key")
-
-        self.client = ZhipuAI(api_key=self.api_key)
-        self.text_model = config.TEXT_MODEL
-        self.vision_model = config.VISION_MODEL
-
-    def analyze_image(self, image_url: str, prompt: Optional[str] = None) -> str:
-        """
-        使用 GLM-4.5V 分析图片内容
-
-        Args:
-            image_url: 图片 URL (支持网络链接)
-            prompt: 自定义提示词,不提供则使用默认
-
-        Returns:
-            str: 图片内容描述
-        """
-        if not prompt:
-            prompt = """请详细描述这张图片的内容,包括:
+DEFAULT_IMAGE_PROMPT = """请详细描述这张图片的内容,包括:
 1. 主要对象或主题
 2. 视觉元素(颜色、布局、风格等)
 3. 图片传达的信息或情感
 
 请用简洁专业的语言,适合插入到文章中作为图片说明。"""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.vision_model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_url
-                                }
-                            }
-                        ]
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+MULTI_IMAGE_PROMPT = """下面依次给出 {count} 张图片,每张图片前附有该图片的分析要求。
+请逐张分析,只输出一个 JSON 对象,键为图片编号,值为该图片的描述,例如 {{"1": "...", "2": "..."}}"""
 
-            result = response.choices[0].message.content
-            logger.info(f"成功分析图片: {image_url[:50]}...")
-            return result
+# 只支持单张图片输入的视觉模型
+SINGLE_IMAGE_MODELS = {"glm-4v", "glm-4v-plus", "glm-4v-flash"}
 
-        except Exception as e:
-            logger.error(f"图片分析失败 ({image_url}): {str(e)}")
-            return f"[图片分析失败: {str(e)}]"
+# 调用失败时返回的占位结果前缀,用于判断结果能否缓存
+IMAGE_FAILURE_PREFIX = "[图片分析失败"
+SUMMARY_FAILURE_PREFIX = "[总结失败"
 
-    def summarize_text(self, text: str, context: Optional[str] = None) -> str:
-        """
-        使用 GLM-4.6 总结文本内容
+SUMMARY_SYSTEM_PROMPT = "你是一个专业的内容总结助手,擅长提炼核心信息。"
 
-        Args:
-            text: 需要总结的文本
-            context: 上下文信息
-
-        Returns:
-            str: 总结结果
-        """
-        prompt = f"""请对以下网页内容进行总结,提取核心信息:
+SUMMARY_PROMPT_TEMPLATE = """请对以下网页内容进行总结,提取核心信息:
 
 {text}
 
@@ -101,65 +49,67 @@ class ZhipuClient:
 4. 控制在 200 字以内
 """
 
-        if context:
-            prompt = f"上下文: {context}\n\n" + prompt
+SUMMARY_BATCH_PROMPT_TEMPLATE = """请分别总结以下 {count} 个网页的内容,提取核心信息:
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是一个专业的内容总结助手,擅长提炼核心信息。"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.5,
-                max_tokens=800
-            )
+{pages}
 
-            result = response.choices[0].message.content
-            logger.info(f"成功总结文本 ({len(text)} 字 -> {len(result)} 字)")
-            return result
+要求:
+1. 每个网页单独总结,保留关键观点和重要信息
+2. 语言简洁流畅,适合融入文章叙述
+3. 每条总结控制在 200 字以内
+4. 只输出一个 JSON 对象,键为网页编号,值为该网页的总结,例如 {{"1": "...", "2": "..."}}
+"""
 
-        except Exception as e:
-            logger.error(f"文本总结失败: {str(e)}")
-            return f"[总结失败: {str(e)}]"
+# 总结提示词版本,模板变化后自动改变,使旧的总结缓存失效
+SUMMARY_PROMPT_VERSION = hashlib.sha256(
+    (SUMMARY_SYSTEM_PROMPT + SUMMARY_PROMPT_TEMPLATE + SUMMARY_BATCH_PROMPT_TEMPLATE).encode('utf-8')
+).hexdigest()[:12]
 
-    def reorganize_article(
-        self,
-        original_text: List[str],
-        images_desc: List[Dict[str, str]],
-        links_summary: List[Dict[str, str]],
-        tags: List[str] = None,
-        front_matter: Optional[str] = None
-    ) -> str:
-        """
-        使用 GLM-4.6 重组文章
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
 
-        Args:
-            original_text: 原始文本块列表
-            images_desc: 图片描述列表 [{"url": "...", "description": "..."}]
-            links_summary: 链接总结列表 [{"url": "...", "title": "...", "summary": "..."}]
-            tags: 标签列表 (可选)
-            front_matter: YAML Front Matter (可选)
+def parse_numbered_json(text: str, count: int) -> List[Optional[str]]:
+    """
+    解析批量请求 (批量总结、多图分析) 的 JSON 响应
 
-        Returns:
-            str: 重组后的 Markdown 文章
-        """
-        # 构建提示词
-        prompt = self._build_reorganize_prompt(original_text, images_desc, links_summary, tags, front_matter)
+    Args:
+        text: 模型输出,形如 {"1": "...", "2": "..."},可能包含 ```json 代码块
+        count: 条目数量
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """# 角色与目标 你现在是一位拥有10年一线开发经验的资深工程师，你正在为一个技术博客或团队内部分享撰写一篇文章。你的目标不是编写一份冷冰冰的官方文档，而是像与一位聪明的同事进行技术交流一样，生动、深入地分享你在某个具体技术点上的实践经验、踩坑记录和深度思考。
+    Returns:
+        List[Optional[str]]: 按编号排列的结果,缺失或无法解析的条目为 None
+    """
+    match = _JSON_OBJECT_RE.search(text or "")
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except ValueError:
+        logger.warning("批量请求的响应不是有效的 JSON")
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    summaries = []
+    for i in range(1, count + 1):
+        summary = data.get(str(i))
+        summaries.append(summary.strip() if isinstance(summary, str) and summary.strip() else None)
+    return summaries
+
+
+def _total_tokens(response) -> Optional[int]:
+    """读取响应中的实际 token 用量,没有时返回 None"""
+    usage = getattr(response, 'usage', None)
+    return getattr(usage, 'total_tokens', None)
+
+
+class ZhipuHTTPError(RuntimeError):
+    """智谱接口返回非 200 状态码 (异步客户端)"""
+
+    def __init__(self, status_code: int, detail: str, headers=None):
+        super().__init__(f"HTTP {status_code}: {detail[:200]}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+REORGANIZE_SYSTEM_PROMPT = """# 角色与目标 你现在是一位拥有10年一线开发经验的资深工程师，你正在为一个技术博客或团队内部分享撰写一篇文章。你的目标不是编写一份冷冰冰的官方文档，而是像与一位聪明的同事进行技术交流一样，生动、深入地分享你在某个具体技术点上的实践经验、踩坑记录和深度思考。
 
 # 核心写作心态
 
@@ -185,26 +135,121 @@ class ZhipuClient:
 8. **重要: 保留所有引用块(>)、分隔线(---)等特殊格式**
 9. **重要: 如果有 YAML Front Matter,必须从文章第一行开始,前面不能有空行**
 10. 适合公众号发布风格"""
+
+
+class _ZhipuClientBase:
+    """同步/异步客户端共用的配置和提示词构建逻辑"""
+
+    def __init__(self, api_key: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        """
+        初始化客户端
+
+        Args:
+            api_key: API 密钥,如果不提供则从配置读取
+            limiter: 限流器,默认使用进程内共享的限流器
+        """
+        self.api_key = api_key or config.ZHIPU_API_KEY
+        if not self.api_key:
+            raise ValueError("未提供智谱 API Key")
+
+        self.text_model = config.TEXT_MODEL
+        self.vision_model = config.VISION_MODEL
+        self.limiter = limiter or get_rate_limiter()
+        self.retry_policy = RetryPolicy(deadline=config.MODEL_RETRY_DEADLINE)
+
+    @staticmethod
+    def _build_image_messages(image_url: str, prompt: Optional[str] = None) -> List[Dict]:
+        """构建图片分析请求的消息"""
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt or DEFAULT_IMAGE_PROMPT
                     },
                     {
-                        "role": "user",
-                        "content": prompt
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_url
+                        }
                     }
-                ],
-                temperature=0.6,
-                max_tokens=4000
-            )
+                ]
+            }
+        ]
+
+    @staticmethod
+    def _build_multi_image_messages(items: List[Tuple[str, Optional[str]]]) -> List[Dict]:
+        """构建多图分析请求的消息,每张图片前附上各自的提示词"""
+        content = [{"type": "text", "text": MULTI_IMAGE_PROMPT.format(count=len(items))}]
+        for i, (image_url, prompt) in enumerate(items, 1):
+            content.append({"type": "text", "text": f"图片 {i}: {prompt or DEFAULT_IMAGE_PROMPT}"})
+            content.append({"type": "image_url", "image_url": {"url": image_url}})
+        return [{"role": "user", "content": content}]
+
+    @staticmethod
+    def _build_summary_messages(text: str, context: Optional[str] = None) -> List[Dict]:
+        """构建文本总结请求的消息"""
+        prompt = SUMMARY_PROMPT_TEMPLATE.format(text=text)
 
-            result = response.choices[0].message.content
-            # 移除开头的空行(如果存在),但保留 YAML Front Matter
-            result = result.lstrip('\n')
-            logger.info(f"成功重组文章 (输出 {len(result)} 字)")
-            return result
+        if context:
+            prompt = f"上下文: {context}\n\n" + prompt
 
-        except Exception as e:
-            logger.error(f"文章重组失败: {str(e)}")
-            # 返回原始内容作为后备
-            return "\n\n".join(original_text)
+        return [
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    @staticmethod
+    def _build_batch_summary_messages(items: List[Tuple[str, Optional[str]]]) -> List[Dict]:
+        """构建批量总结请求的消息"""
+        pages = []
+        for i, (text, context) in enumerate(items, 1):
+            header = f"### 网页 {i}\n"
+            if context:
+                header += f"上下文: {context}\n"
+            pages.append(f"{header}\n{text}\n")
+
+        return [
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": SUMMARY_BATCH_PROMPT_TEMPLATE.format(count=len(items), pages="\n".join(pages))
+            }
+        ]
+
+    def _build_reorganize_messages(
+        self,
+        original_text: List[str],
+        images_desc: List[Dict[str, str]],
+        links_summary: List[Dict[str, str]],
+        tags: List[str] = None,
+        front_matter: Optional[str] = None,
+        section: Optional[Tuple[int, int]] = None
+    ) -> List[Dict]:
+        """构建文章重组请求的消息"""
+        prompt = self._build_reorganize_prompt(
+            original_text, images_desc, links_summary, tags, front_matter, section
+        )
+        return [
+            {
+                "role": "system",
+                "content": REORGANIZE_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
 
     def _build_reorganize_prompt(
         self,
@@ -212,9 +257,10 @@ class ZhipuClient:
         images_desc: List[Dict[str, str]],
         links_summary: List[Dict[str, str]],
         tags: List[str] = None,
-        front_matter: Optional[str] = None
+        front_matter: Optional[str] = None,
+        section: Optional[Tuple[int, int]] = None
     ) -> str:
-        """构建文章重组的提示词"""
+        """构建文章重组的提示词,section 为 (段序号, 总段数) 时只整理长笔记的其中一段"""
 
         prompt_parts = ["请将以下笔记内容整理成一篇完整的文章:\n"]
 
@@ -268,8 +314,479 @@ class ZhipuClient:
 6. 输出完整的 Markdown 格式文章
 """)
 
+        if section:
+            index, total = section
+            prompt_parts.append(
+                f"\n**注意: 以上是一篇长笔记的第 {index}/{total} 部分,只整理这一部分的内容,"
+                f"各部分会按顺序拼接成一篇文章。**\n"
+            )
+            if index > 1:
+                prompt_parts.append("- 不要写文章标题和开头引言,直接承接上文,小标题使用二级及以下标题\n")
+            if index < total:
+                prompt_parts.append("- 不要写全文总结、结尾和参考链接部分,后面还有内容\n")
+
         return "".join(prompt_parts)
 
+class ZhipuClient(_ZhipuClientBase):
+    """智谱 AI 客户端封装"""
+
+    def __init__(self, api_key: Optional[str] = None, limiter: Optional[RateLimiter] = None):
+        """
+        初始化客户端
+
+        Args:
+            api_key: API 密钥,如果不提供则从配置读取
+            limiter: 限流器,默认使用进程内共享的限流器
+        """
+        super().__init__(api_key, limiter)
+        # 重试由 retry_policy 统一负责,关闭 SDK 自带的重试
+        self.client = ZhipuAI(api_key=self.api_key, max_retries=0)
+        self.hedger: Optional[Hedger] = get_hedger() if config.HEDGE_ENABLED else None
+
+        # 多图分析每组的图片数,请求因过大被拒绝时自动减小
+        if config.VISION_BATCH_ENABLED and self.vision_model not in SINGLE_IMAGE_MODELS:
+            self.vision_group_size = max(1, config.VISION_BATCH_MAX_IMAGES)
+        else:
+            self.vision_group_size = 1
+
+    def _complete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        description: str,
+        hedged: bool = False
+    ) -> str:
+        """
+        在限流和重试策略下发送一次对话补全请求,返回模型输出文本
+
+        hedged 为 True 且启用对冲时,对冲的是重试循环中的单次尝试: 某次尝试迟迟不返回时
+        发出一个副本 (见 Hedger),两者都失败时再由重试策略决定是否重试。
+        """
+        def send(timeout: float) -> str:
+            with self.limiter.request(estimate_tokens(messages, max_tokens)) as lease:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+                lease.settle(_total_tokens(response))
+            return response.choices[0].message.content
+
+        def attempt(timeout: float) -> str:
+            if hedged and self.hedger is not None:
+                return self.hedger.call(lambda: send(timeout), description)
+            return send(timeout)
+
+        return self.retry_policy.call(attempt, description, config.MODEL_TIMEOUT)
+
+    def _complete_hedged(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        description: str
+    ) -> str:
+        """启用对冲时,单次尝试迟迟不返回则发出副本请求 (见 _complete),否则等同于 _complete"""
+        return self._complete(model, messages, temperature, max_tokens, description, hedged=True)
+
+    def _complete_stream(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        description: str
+    ) -> Iterator[str]:
+        """
+        在限流和重试策略下发送流式请求,逐段产出模型输出
+
+        尚未产出任何内容时失败可以重试,已产出内容后失败直接抛出。
+        """
+        retry = self.retry_policy.start(description)
+        while True:
+            produced = False
+            try:
+                # 流式响应读取完毕前一直占用并发名额
+                with self.limiter.request(estimate_tokens(messages, max_tokens)) as lease:
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        timeout=retry.timeout(config.MODEL_TIMEOUT)
+                    )
+
+                    usage = None
+                    for chunk in response:
+                        usage = _total_tokens(chunk) or usage
+                        if not chunk.choices:
+                            continue
+                        piece = chunk.choices[0].delta.content
+                        if piece:
+                            produced = True
+                            yield piece
+
+                    lease.settle(usage)
+                return
+
+            except Exception as e:
+                delay = None if produced else retry.backoff(e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    def analyze_image(self, image_url: str, prompt: Optional[str] = None) -> str:
+        """
+        使用 GLM-4.5V 分析图片内容
+
+        Args:
+            image_url: 图片 URL (支持网络链接)
+            prompt: 自定义提示词,不提供则使用默认
+
+        Returns:
+            str: 图片内容描述
+        """
+        try:
+            result = self._complete_hedged(
+                self.vision_model,
+                self._build_image_messages(image_url, prompt),
+                temperature=0.7,
+                max_tokens=500,
+                description="图片分析"
+            )
+            logger.info(f"成功分析图片: {image_url[:50]}...")
+            return result
+
+        except Exception as e:
+            logger.error(f"图片分析失败 ({image_url[:50]}...): {str(e)}")
+            return f"{IMAGE_FAILURE_PREFIX}: {str(e)}]"
+
+    def analyze_images(self, items: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """
+        一次请求分析多张图片,每张图片使用各自的提示词
+
+        请求失败时把这一组对半拆分后重试,直到逐张调用 analyze_image;
+        响应中缺少的图片单独重新分析。请求因过大被拒绝 (400/413) 时,
+        同时减小之后的分组大小。
+
+        Args:
+            items: [(image_url, prompt), ...]
+
+        Returns:
+            List[str]: 与 items 一一对应的图片描述 (失败时为占位结果,与 analyze_image 一致)
+        """
+        if len(items) == 1:
+            return [self.analyze_image(*items[0])]
+
+        try:
+            result = self._complete(
+                self.vision_model,
+                self._build_multi_image_messages(items),
+                temperature=0.7,
+                max_tokens=min(4000, 300 * len(items)),
+                description="多图分析"
+            )
+        except Exception as e:
+            if getattr(e, 'status_code', None) in (400, 413) and self.vision_group_size >= len(items):
+                self.vision_group_size = max(1, len(items) // 2)
+                logger.warning(f"多图请求被拒绝,分组大小降为 {self.vision_group_size}")
+            logger.warning(f"多图分析失败,拆分 {len(items)} 张图片重试: {str(e)}")
+            middle = len(items) // 2
+            return self.analyze_images(items[:middle]) + self.analyze_images(items[middle:])
+
+        descriptions = parse_numbered_json(result, len(items))
+        logger.info(f"成功分析 {len(items)} 张图片,解析成功 {sum(d is not None for d in descriptions)} 张")
+        return [
+            description if description is not None else self.analyze_image(image_url, prompt)
+            for (image_url, prompt), description in zip(items, descriptions)
+        ]
+
+    def summarize_text(self, text: str, context: Optional[str] = None) -> str:
+        """
+        使用 GLM-4.6 总结文本内容
+
+        Args:
+            text: 需要总结的文本
+            context: 上下文信息
+
+        Returns:
+            str: 总结结果
+        """
+        try:
+            result = self._complete_hedged(
+                self.text_model,
+                self._build_summary_messages(text, context),
+                temperature=0.5,
+                max_tokens=800,
+                description="文本总结"
+            )
+            logger.info(f"成功总结文本 ({len(text)} 字 -> {len(result)} 字)")
+            return result
+
+        except Exception as e:
+            logger.error(f"文本总结失败: {str(e)}")
+            return f"{SUMMARY_FAILURE_PREFIX}: {str(e)}]"
+
+    def summarize_batch(self, items: List[Tuple[str, Optional[str]]]) -> List[Optional[str]]:
+        """
+        一次请求总结多段文本,省去逐个请求的往返和重复的系统提示词
+
+        Args:
+            items: [(text, context), ...]
+
+        Returns:
+            List[Optional[str]]: 与 items 一一对应的总结,响应中缺失或无法解析的条目为 None;
+                请求本身失败时抛出异常
+        """
+        result = self._complete(
+            self.text_model,
+            self._build_batch_summary_messages(items),
+            temperature=0.5,
+            max_tokens=min(4000, 400 * len(items)),
+            description="批量总结"
+        )
+        return parse_numbered_json(result, len(items))
+
+    def reorganize_article(
+        self,
+        original_text: List[str],
+        images_desc: List[Dict[str, str]],
+        links_summary: List[Dict[str, str]],
+        tags: List[str] = None,
+        front_matter: Optional[str] = None,
+        fallback: bool = True,
+        section: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """
+        使用 GLM-4.6 重组文章
+
+        Args:
+            original_text: 原始文本块列表
+            images_desc: 图片描述列表 [{"url": "...", "description": "..."}]
+            links_summary: 链接总结列表 [{"url": "...", "title": "...", "summary": "..."}]
+            tags: 标签列表 (可选)
+            front_matter: YAML Front Matter (可选)
+            fallback: 失败时是否返回原始文本作为后备,为 False 时抛出异常
+            section: (段序号, 总段数),分段重组长笔记时只整理其中一段
+
+        Returns:
+            str: 重组后的 Markdown 文章
+        """
+        messages = self._build_reorganize_messages(
+            original_text, images_desc, links_summary, tags, front_matter, section
+        )
+
+        try:
+            result = self._complete(
+                self.text_model,
+                messages,
+                temperature=0.6,
+                max_tokens=4000,
+                description="文章重组"
+            )
+            # 移除开头的空行(如果存在),但保留 YAML Front Matter
+            result = result.lstrip('\n')
+            logger.info(f"成功重组文章 (输出 {len(result)} 字)")
+            return result
+
+        except Exception as e:
+            logger.error(f"文章重组失败: {str(e)}")
+            if not fallback:
+                raise
+            # 返回原始内容作为后备
+            return "\n\n".join(original_text)
+
+
+    def reorganize_article_stream(
+        self,
+        original_text: List[str],
+        images_desc: List[Dict[str, str]],
+        links_summary: List[Dict[str, str]],
+        tags: List[str] = None,
+        front_matter: Optional[str] = None,
+        fallback: bool = True
+    ) -> Iterator[str]:
+        """
+        流式重组文章,模型每生成一段内容就立即产出
+
+        参数与 reorganize_article 相同。请求失败且尚未产出任何内容时,
+        产出原始文本作为后备;中途失败则保留已产出的部分并结束。
+        fallback 为 False 时任何失败都抛出异常。
+
+        Yields:
+            str: 文章内容片段
+        """
+        messages = self._build_reorganize_messages(original_text, images_desc, links_summary, tags, front_matter)
+        started = False
+        total = 0
+
+        try:
+            for piece in self._complete_stream(
+                self.text_model,
+                messages,
+                temperature=0.6,
+                max_tokens=4000,
+                description="文章流式重组"
+            ):
+                # 移除开头的空行(如果存在),但保留 YAML Front Matter
+                if not started:
+                    piece = piece.lstrip('\n')
+                    if not piece:
+                        continue
+                    started = True
+
+                total += len(piece)
+                yield piece
+
+            logger.info(f"成功流式重组文章 (输出 {total} 字)")
+
+        except Exception as e:
+            logger.error(f"文章流式重组失败: {str(e)}")
+            if not fallback:
+                raise
+            if not started:
+                # 返回原始内容作为后备
+                yield "\n\n".join(original_text)
+
+
+class AsyncZhipuClient(_ZhipuClientBase):
+    """
+    智谱 AI 异步客户端 (基于 aiohttp)
+
+    直接调用 chat/completions HTTP 接口,同一个事件循环内可以同时挂起大量请求,
+    并发数由信号量限制。失败时的降级行为与 ZhipuClient 保持一致。
+    不支持对冲请求 (HEDGE_ENABLED 只对同步的 ZhipuClient 生效)。
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_key: Optional[str] = None,
+        max_concurrency: int = config.ASYNC_MODEL_CONCURRENCY,
+        limiter: Optional[RateLimiter] = None
+    ):
+        """
+        初始化客户端
+
+        Args:
+            session: 共享的 aiohttp 会话
+            api_key: API 密钥,如果不提供则从配置读取
+            max_concurrency: 同时进行中的模型请求上限
+            limiter: 限流器,默认使用进程内共享的限流器
+        """
+        super().__init__(api_key, limiter)
+        self.session = session
+        self.endpoint = f"{config.ZHIPU_API_BASE.rstrip('/')}/chat/completions"
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _chat(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        description: str
+    ) -> str:
+        """在限流和重试策略下发送一次对话补全请求,返回模型输出文本"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        async def attempt(timeout: float) -> str:
+            async with self.semaphore:
+                async with self.limiter.request_async(estimate_tokens(messages, max_tokens)) as lease:
+                    async with self.session.post(
+                        self.endpoint,
+                        json=payload,
+                        headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=timeout)
+                    ) as response:
+                        if response.status != 200:
+                            detail = await response.text()
+                            raise ZhipuHTTPError(response.status, detail, response.headers)
+                        data = await response.json()
+                    lease.settle(data.get("usage", {}).get("total_tokens"))
+            return data["choices"][0]["message"]["content"]
+
+        return await self.retry_policy.call_async(attempt, description, config.MODEL_TIMEOUT)
+
+    async def analyze_image(self, image_url: str, prompt: Optional[str] = None) -> str:
+        """异步版 ZhipuClient.analyze_image"""
+        try:
+            result = await self._chat(
+                self.vision_model,
+                self._build_image_messages(image_url, prompt),
+                temperature=0.7,
+                max_tokens=500,
+                description="图片分析"
+            )
+            logger.info(f"成功分析图片: {image_url[:50]}...")
+            return result
+
+        except Exception as e:
+            logger.error(f"图片分析失败 ({image_url[:50]}...): {str(e)}")
+            return f"{IMAGE_FAILURE_PREFIX}: {str(e)}]"
+
+    async def summarize_text(self, text: str, context: Optional[str] = None) -> str:
+        """异步版 ZhipuClient.summarize_text"""
+        try:
+            result = await self._chat(
+                self.text_model,
+                self._build_summary_messages(text, context),
+                temperature=0.5,
+                max_tokens=800,
+                description="文本总结"
+            )
+            logger.info(f"成功总结文本 ({len(text)} 字 -> {len(result)} 字)")
+            return result
+
+        except Exception as e:
+            logger.error(f"文本总结失败: {str(e)}")
+            return f"{SUMMARY_FAILURE_PREFIX}: {str(e)}]"
+
+    async def reorganize_article(
+        self,
+        original_text: List[str],
+        images_desc: List[Dict[str, str]],
+        links_summary: List[Dict[str, str]],
+        tags: List[str] = None,
+        front_matter: Optional[str] = None,
+        fallback: bool = True,
+        section: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """异步版 ZhipuClient.reorganize_article"""
+        messages = self._build_reorganize_messages(
+            original_text, images_desc, links_summary, tags, front_matter, section
+        )
+
+        try:
+            result = await self._chat(
+                self.text_model,
+                messages,
+                temperature=0.6,
+                max_tokens=4000,
+                description="文章重组"
+            )
+            result = result.lstrip('\n')
+            logger.info(f"成功重组文章 (输出 {len(result)} 字)")
+            return result
+
+        except Exception as e:
+            logger.error(f"文章重组失败: {str(e)}")
+            if not fallback:
+                raise
+            return "\n\n".join(original_text)
+
 
 # 便捷函数
 def create_client(api_key: Optional[str] = None) -> ZhipuClient:
@@ -0,0 +1,85 @@
+"""
+测试持久化缓存
+"""
+import os
+import tempfile
+import time
+import unittest
+
+from src.cache import DiskCache, image_fingerprint
+
+
+class TestDiskCache(unittest.TestCase):
+    """测试磁盘 LRU 缓存"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "test.sqlite3")
+
+    def test_get_set_and_counters(self):
+        """测试读写与命中统计"""
+        cache = DiskCache(self.path)
+        key = DiskCache.make_key("url", "prompt", "model")
+
+        self.assertIsNone(cache.get(key))
+        cache.set(key, "描述")
+        self.assertEqual(cache.get(key), "描述")
+
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_persistent_across_instances(self):
+        """测试缓存跨实例保留"""
+        DiskCache(self.path).set("k", {"a": 1})
+        self.assertEqual(DiskCache(self.path).get("k"), {"a": 1})
+
+    def test_lru_eviction_by_entries(self):
+        """测试按条目数淘汰最久未访问的条目"""
+        cache = DiskCache(self.path, max_entries=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_eviction_by_size(self):
+        """测试按容量淘汰"""
+        cache = DiskCache(self.path, max_bytes=250)
+        for i in range(5):
+            cache.set(str(i), "x" * 100)
+            time.sleep(0.01)
+
+        self.assertLessEqual(cache.stats().size_bytes, 250)
+        self.assertEqual(cache.get("4"), "x" * 100)
+        self.assertIsNone(cache.get("0"))
+
+    def test_retain_tag(self):
+        """测试按标签失效旧条目"""
+        cache = DiskCache(self.path)
+        cache.set("old", 1, tag="v1")
+        cache.set("untagged", 2)
+        cache.set("new", 3, tag="v2")
+
+        self.assertEqual(cache.retain_tag("v2"), 2)
+        self.assertIsNone(cache.get("old"))
+        self.assertEqual(cache.get("new"), 3)
+
+    def test_image_fingerprint(self):
+        """测试图片标识优先使用内容哈希"""
+        self.assertEqual(image_fingerprint("https://a/x.png"), "url:https://a/x.png")
+        self.assertEqual(
+            image_fingerprint("https://a/x.png", b"data"),
+            image_fingerprint("https://b/y.png", b"data")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
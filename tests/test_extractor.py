@@ -0,0 +1,161 @@
+"""
+测试网页正文提取
+"""
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+from config import config
+from src.extractor import ExtractionPool, extract_with_lxml, extract_with_readability, extract_text
+from src.web_scraper import extract_readable_text
+
+ARTICLE = "<p>这是一段足够长的正文内容,用于测试正文提取,包含<a href='/x'>一个链接</a>和<b>强调</b>。</p>"
+
+PAGE_HTML = (
+    "<html><head><meta charset='utf-8'><title>标题</title><script>var x = '脚本内容';</script></head><body>"
+    "<nav><a href='/'>首页</a><a href='/a'>归档</a></nav>"
+    "<div class='sidebar'><p>侧边栏里的热门文章推荐,不应该出现在正文中,即使它足够长。</p></div>"
+    "<div id='content'><h1>文章标题</h1><div class='post-body'>"
+    + ARTICLE * 6
+    + "<pre>def main():\n    return 42</pre>"
+    "</div></div>"
+    "<div id='comments' class='comments'><p>一条评论,同样不应该出现在正文中,这里写得长一些。</p></div>"
+    "<footer>版权所有</footer></body></html>"
+).encode('utf-8')
+
+
+class TestLxmlExtractor(unittest.TestCase):
+    """测试 lxml 单次解析引擎"""
+
+    def test_extracts_article(self):
+        """测试保留正文、标题和代码缩进,去掉导航、侧边栏、评论和脚本"""
+        text = extract_with_lxml(PAGE_HTML, "https://example.com")
+
+        self.assertIn("文章标题", text)
+        self.assertIn("包含一个链接和强调。", text)
+        self.assertIn("    return 42", text)
+        for noise in ("首页", "热门文章", "一条评论", "版权所有", "脚本内容"):
+            self.assertNotIn(noise, text)
+
+    def test_inline_elements_stay_on_one_line(self):
+        """测试行内元素不拆成多行,每个段落一行"""
+        text = extract_with_lxml(PAGE_HTML, "https://example.com")
+        lines = text.split('\n')
+
+        self.assertEqual(sum(1 for line in lines if line.startswith("这是一段")), 6)
+
+    def test_declared_charset(self):
+        """测试按 <meta charset> 解码"""
+        html = ("<html><head><meta charset='gb2312'></head><body><div>" + ARTICLE * 4 + "</div></body></html>")
+        text = extract_with_lxml(html.encode('gbk'), "https://example.com")
+
+        self.assertIn("足够长的正文", text)
+
+    def test_response_charset_preferred(self):
+        """测试响应头声明的字符集优先于 <meta charset>,两种引擎都适用"""
+        html = "<html><head><meta charset='utf-8'></head><body><div>" + ARTICLE * 4 + "</div></body></html>"
+
+        for engine in ("lxml", "readability"):
+            self.assertIn("足够长的正文", extract_text(html.encode('gbk'), "u", engine, charset='GBK'))
+        self.assertIn("足够长的正文", extract_with_lxml(html.encode('utf-8'), "u", charset='unknown-charset'))
+
+    def test_short_or_empty_page(self):
+        """测试正文过短或为空时返回 None"""
+        self.assertIsNone(extract_with_lxml(b"<html><body><div id='app'></div></body></html>", "u"))
+        self.assertIsNone(extract_with_lxml(b"", "u"))
+
+    def test_fullwidth_commas_score(self):
+        """测试全角逗号计入得分: 长度相近时标点多的中文正文胜过没有标点的推荐列表"""
+        article = "<p>改造内容包括加装电梯，增设停车位，完善养老设施，由居民协商决定</p>"
+        related = "<p>本市公布今年第三季度重点工程建设进展情况及下一阶段工作安排请查看</p>"
+        html = (
+            "<html><body><div>" + related * 4 + "</div>"
+            "<div>" + article * 4 + "</div></body></html>"
+        ).encode('utf-8')
+
+        text = extract_with_lxml(html, "u")
+
+        self.assertIn("加装电梯", text)
+        self.assertNotIn("重点工程", text)
+
+    def test_page_wrapped_in_form(self):
+        """测试整个页面包在 <form> 中 (ASP.NET 等) 时仍能提取正文,只去掉表单控件"""
+        html = (
+            "<html><body><form id='aspnetForm' method='post' action='./Default.aspx'>"
+            "<input type='hidden' name='__VIEWSTATE' value='dDwtMTA4MTA'>"
+            "<div id='content'>" + ARTICLE * 4 + "</div>"
+            "<select name='lang'><option>简体中文选项</option></select><button>提交按钮</button>"
+            "</form></body></html>"
+        ).encode('utf-8')
+
+        text = extract_with_lxml(html, "u")
+
+        self.assertIn("足够长的正文", text)
+        self.assertNotIn("简体中文选项", text)
+        self.assertNotIn("提交按钮", text)
+
+    def test_deep_nesting(self):
+        """测试深层嵌套的网页 (libxml2 默认最多约 256 层)"""
+        html = "<div><span>" * 120 + ARTICLE * 4 + "</span></div>" * 120
+
+        self.assertIn("足够长的正文", extract_with_lxml(html.encode('utf-8'), "u"))
+
+
+class TestEngineSelection(unittest.TestCase):
+    """测试提取引擎选择"""
+
+    def test_engines_agree_on_article(self):
+        """测试两种引擎都能提取正文"""
+        for engine in ("lxml", "readability"):
+            self.assertIn("足够长的正文", extract_text(PAGE_HTML, "u", engine))
+
+    def test_scraper_uses_configured_engine(self):
+        """测试抓取器按 EXTRACTOR 配置选择引擎,未知名称时使用 lxml"""
+        with mock.patch.object(config, 'EXTRACTOR', 'readability'), \
+                mock.patch('src.extractor.extract_with_readability', wraps=extract_with_readability) as readability:
+            with mock.patch.dict('src.extractor.EXTRACTORS', {'readability': readability}):
+                extract_readable_text(PAGE_HTML, "u")
+        readability.assert_called_once()
+
+        self.assertEqual(extract_text(PAGE_HTML, "u", "unknown"), extract_with_lxml(PAGE_HTML, "u"))
+
+
+class TestExtractionPool(unittest.TestCase):
+    """测试正文提取进程池"""
+
+    def setUp(self):
+        self.pool = ExtractionPool(1, inline_bytes=0)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_extract_in_subprocess(self):
+        """测试子进程中的提取结果与本进程一致 (同步和异步)"""
+        expected = extract_with_lxml(PAGE_HTML, "u")
+
+        self.assertEqual(self.pool.extract(PAGE_HTML, "u"), expected)
+        self.assertEqual(asyncio.run(self.pool.extract_async(PAGE_HTML, "u")), expected)
+
+    def test_broken_pool_recreated(self):
+        """测试子进程意外退出后本次在本进程提取,之后重新创建进程池"""
+        executor = self.pool._get_executor()
+        with self.assertRaises(Exception):
+            executor.submit(os._exit, 1).result()
+
+        self.assertIn("足够长的正文", self.pool.extract(PAGE_HTML, "u"))
+        self.assertIsNot(self.pool._get_executor(), executor)
+        self.assertIn("足够长的正文", self.pool.extract(PAGE_HTML, "u"))
+
+    def test_disabled_pool_runs_inline(self):
+        """测试子进程数为 0 或网页很小时不使用进程池"""
+        pool = ExtractionPool(0)
+        small = ExtractionPool(1, inline_bytes=len(PAGE_HTML) + 1)
+        self.addCleanup(small.shutdown)
+
+        self.assertIn("足够长的正文", pool.extract(PAGE_HTML, "u"))
+        self.assertIsNone(pool._get_executor())
+        self.assertIn("足够长的正文", small.extract(PAGE_HTML, "u"))
+        self.assertIsNone(small._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+测试感知哈希和近似重复索引
+"""
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image, ImageDraw
+
+from config import config
+from src.fingerprint import (
+    HashIndex, InflightHashes, dhash, hamming, simhash, page_body, page_signature, titles_match
+)
+
+
+def terminal_screenshot(lines) -> Image.Image:
+    """深色背景的 1200x800 终端截图 (默认字体放大 3 倍,接近常见的终端字号)"""
+    image = Image.new('RGB', (400, 267), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((4, 4 + i * 10), line, fill=(200, 200, 200))
+    return image.resize((1200, 800))
+
+
+def sample_image(size=(640, 480), flip=False) -> Image.Image:
+    """带明暗结构的测试图片"""
+    image = Image.radial_gradient('L').resize(size).convert('RGB')
+    return image.transpose(Image.FLIP_LEFT_RIGHT).rotate(90) if flip else image
+
+
+class TestDHash(unittest.TestCase):
+    """测试 dHash"""
+
+    def test_resized_and_recompressed_copy_is_near(self):
+        """测试缩放并重新压缩后的副本距离很近"""
+        original = sample_image()
+        buffer = io.BytesIO()
+        original.resize((200, 150)).save(buffer, format='JPEG', quality=60)
+        copy = Image.open(io.BytesIO(buffer.getvalue()))
+
+        self.assertLessEqual(hamming(dhash(original), dhash(copy)), config.IMAGE_HASH_DISTANCE)
+
+    def test_different_images_are_far(self):
+        """测试不同图片距离较远"""
+        gradient = Image.linear_gradient('L').resize((640, 480))
+
+        self.assertGreater(hamming(dhash(sample_image()), dhash(gradient)), config.IMAGE_HASH_DISTANCE)
+
+    def test_terminal_screenshots_with_different_text_are_far(self):
+        """测试文字不同的深色终端截图不会被当作近似重复"""
+        first = terminal_screenshot([f"$ pip install package-{i} " + "x" * (i * 7 % 60) for i in range(25)])
+        second = terminal_screenshot([f"ERROR: build failed at step {i} " + "y" * (i * 13 % 70) for i in range(25)])
+
+        self.assertGreater(hamming(dhash(first), dhash(second)), config.IMAGE_HASH_DISTANCE)
+
+
+class TestSimHash(unittest.TestCase):
+    """测试网页正文 SimHash"""
+
+    def test_mirror_is_near_and_other_page_is_far(self):
+        """测试加了页眉页脚的转载页面距离很近,不同文章距离较远"""
+        article = "\n".join(f"第{i}段: 缓存可以显著降低分布式系统中的请求延迟,但需要处理失效问题。" for i in range(40))
+        mirror = "转载自原作者博客\n" + article + "\n本文已获授权"
+        other = "\n".join(f"第{i}段: 前端构建工具通过增量编译和模块联邦提升开发体验。" for i in range(40))
+
+        self.assertLessEqual(hamming(simhash(article), simhash(mirror)), 3)
+        self.assertGreater(hamming(simhash(article), simhash(other)), 10)
+
+
+class TestPageSignature(unittest.TestCase):
+    """测试网页签名"""
+
+    NAV = "\n".join(f"* [第{i}章 参考手册](https://docs.example.com/ch{i})" for i in range(60))
+
+    def test_body_skips_navigation_and_short_lines(self):
+        """测试链接列表、菜单项和 Jina 元信息行不计入正文"""
+        text = "Title: 安装\nURL Source: https://docs.example.com/install\n" + self.NAV + (
+            "\n[首页](/) > 文档\n## 安装\n使用 pip 安装时需要 Python 3.9 以上版本,并建议在虚拟环境中进行。"
+        )
+
+        self.assertEqual(page_body(text), "使用 pip 安装时需要 Python 3.9 以上版本,并建议在虚拟环境中进行。")
+
+    def test_short_body_not_signed(self):
+        """测试去掉样板后正文过少的页面不参与去重"""
+        self.assertIsNone(page_signature(self.NAV + "\n只有一句正文内容,其余全是导航链接。", min_terms=50))
+
+    def test_titles_match(self):
+        """测试转载页附加站点名仍视为同一标题,不同文档页标题不同"""
+        self.assertTrue(titles_match("老旧小区改造如何兼顾居民需求", "老旧小区改造如何兼顾居民需求_某新闻网"))
+        self.assertFalse(titles_match("安装指南 - FastJSON 文档", "配置参考 - FastJSON 文档"))
+        self.assertFalse(titles_match("", "任意标题"))
+
+
+class TestHashIndex(unittest.TestCase):
+    """测试近似重复索引"""
+
+    def test_find_within_distance_and_namespace(self):
+        """测试按阈值和命名空间查找最近的条目"""
+        index = HashIndex(None, max_distance=2)
+        index.add("vision", 0b1111, "四")
+        index.add("vision", 0b0111, "三")
+        index.add("other", 0b0011, "二")
+
+        self.assertEqual(index.find("vision", 0b0011), "三")
+        self.assertIsNone(index.find("vision", 0b1111 << 8))
+        self.assertIsNone(index.find("unknown", 0b1111))
+
+    def test_accept_filters_entries(self):
+        """测试二次核对不通过的条目不参与匹配"""
+        index = HashIndex(None, max_distance=2)
+        index.add("vision", 0b0111, {'digest': "a", 'description': "近的"})
+        index.add("vision", 0b0011, {'digest': "b", 'description': "核对通过"})
+
+        entry = index.find("vision", 0b0111, accept=lambda value: value['digest'] == "b")
+
+        self.assertEqual(entry['description'], "核对通过")
+        self.assertIsNone(index.find("vision", 0b0111, accept=lambda value: False))
+
+    def test_persisted_and_bounded(self):
+        """测试条目保存到磁盘,重新打开后仍可查到,超过上限时淘汰最早的条目"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "hashes.sqlite3")
+            index = HashIndex(path, max_distance=0, max_entries=2)
+            index.add("vision", 1, "一")
+            index.add("vision", 2 ** 63 + 1, "大")
+            index.add("vision", 3, "三")
+
+            reopened = HashIndex(path, max_distance=0, max_entries=2)
+
+            self.assertEqual(len(reopened), 2)
+            self.assertIsNone(reopened.find("vision", 1))
+            self.assertEqual(reopened.find("vision", 2 ** 63 + 1), "大")
+
+
+class TestInflightHashes(unittest.TestCase):
+    """测试同一次运行中的近似重复登记"""
+
+    def test_near_duplicate_waits_for_owner(self):
+        """测试近似重复的图片得到第一张图片的 Future"""
+        inflight = InflightHashes(max_distance=1)
+
+        future, is_owner = inflight.claim(0b1000)
+        duplicate, duplicate_is_owner = inflight.claim(0b1001)
+        _, other_is_owner = inflight.claim(0b0111)
+        future.set_result("描述")
+
+        self.assertTrue(is_owner)
+        self.assertFalse(duplicate_is_owner)
+        self.assertEqual(duplicate.result(), "描述")
+        self.assertTrue(other_is_owner)
+
+
+if __name__ == '__main__':
+    unittest.main()
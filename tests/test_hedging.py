@@ -0,0 +1,102 @@
+"""
+测试对冲请求
+"""
+import threading
+import time
+import unittest
+
+from src.hedging import Hedger, LatencyTracker
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """测试延迟统计"""
+
+    def test_percentile(self):
+        """测试分位数计算"""
+        tracker = LatencyTracker()
+        self.assertIsNone(tracker.percentile(95))
+        for i in range(1, 101):
+            tracker.record(i / 100)
+
+        self.assertAlmostEqual(tracker.percentile(50), 0.51)
+        self.assertAlmostEqual(tracker.percentile(95), 0.96)
+
+
+class TestHedger(unittest.TestCase):
+    """测试对冲执行"""
+
+    def make_hedger(self, budget=1.0):
+        hedger = Hedger(percentile=90, budget=budget, min_samples=5, max_workers=4)
+        for _ in range(10):
+            hedger.tracker("op").record(0.02)
+        return hedger
+
+    def test_slow_call_hedged(self):
+        """测试第一次调用卡住时对冲请求先返回"""
+        hedger = self.make_hedger()
+        calls = []
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                calls.append(1)
+                first = len(calls) == 1
+            time.sleep(1.0 if first else 0.01)
+            return "first" if first else "hedge"
+
+        start = time.monotonic()
+        result = hedger.call(call, "op")
+
+        self.assertEqual(result, "hedge")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(hedger.hedges, 1)
+        self.assertEqual(hedger.hedge_wins, 1)
+
+    def test_fast_call_not_hedged(self):
+        """测试及时返回的调用不发对冲请求"""
+        hedger = self.make_hedger()
+
+        self.assertEqual(hedger.call(lambda: "ok", "op"), "ok")
+        self.assertEqual(hedger.hedges, 0)
+
+    def test_budget_limits_hedges(self):
+        """测试对冲次数不超过预算"""
+        hedger = self.make_hedger(budget=0.25)
+
+        def slow():
+            time.sleep(0.05)
+            return "ok"
+
+        for _ in range(8):
+            hedger.call(slow, "op")
+
+        self.assertLessEqual(hedger.hedges, 2)
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        """测试对冲请求失败时等待原始请求"""
+        hedger = self.make_hedger()
+        calls = []
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                calls.append(1)
+                first = len(calls) == 1
+            if not first:
+                raise RuntimeError("hedge failed")
+            time.sleep(0.1)
+            return "primary"
+
+        self.assertEqual(hedger.call(call, "op"), "primary")
+
+    def test_no_hedge_without_samples(self):
+        """测试样本不足时不对冲"""
+        hedger = Hedger(min_samples=5)
+
+        self.assertIsNone(hedger.hedge_delay("new"))
+        self.assertEqual(hedger.call(lambda: "ok", "new"), "ok")
+        self.assertEqual(hedger.hedges, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+测试共享 HTTP 连接池
+"""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.http_pool import HttpPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """支持 keep-alive 的处理器,记录同时进行中的请求数"""
+
+    protocol_version = 'HTTP/1.1'
+    delay = 0.0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        body = b"ok"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpPool(unittest.TestCase):
+    """测试连接复用和按主机限制并发"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        KeepAliveHandler.delay = 0.0
+        KeepAliveHandler.max_in_flight = 0
+
+    def test_sequential_requests_reuse_connection(self):
+        """测试同一主机的连续请求复用同一个连接"""
+        pool = HttpPool()
+
+        for i in range(5):
+            self.assertEqual(pool.get(f"{self.base_url}/page{i}", timeout=5).text, "ok")
+
+        stats = pool.stats()
+        self.assertEqual(stats.requests, 5)
+        self.assertEqual(stats.connections, 1)
+        self.assertAlmostEqual(stats.reuse_rate, 0.8)
+
+    def test_per_host_limit(self):
+        """测试同一主机的并发请求不超过上限"""
+        KeepAliveHandler.delay = 0.05
+        pool = HttpPool(max_per_host=2)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda i: pool.get(f"{self.base_url}/{i}", timeout=5), range(6)))
+
+        self.assertLessEqual(KeepAliveHandler.max_in_flight, 2)
+        self.assertGreater(pool.stats().host_waits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+测试图片预处理
+"""
+import base64
+import io
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from config import config
+from src.image_loader import ImageLoader, encode_image
+
+
+def decode_data_url(data_url: str):
+    """解析 data URL,返回 (MIME 类型, 图片)"""
+    header, payload = data_url.split(',', 1)
+    mime_type = header[len('data:'):].split(';')[0]
+    return mime_type, Image.open(io.BytesIO(base64.b64decode(payload)))
+
+
+def png_bytes(size, mode='RGB', color='white') -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """返回 PNG 图片;/declared 声明 Content-Length,/undeclared 不声明 (读到连接关闭)"""
+
+    image = png_bytes((64, 64), color='red')
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        if self.path == '/declared.png':
+            self.send_header('Content-Length', str(len(self.image)))
+        self.end_headers()
+        self.wfile.write(self.image)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEncodeImage(unittest.TestCase):
+    """测试缩放和重新压缩"""
+
+    def test_large_screenshot_downscaled_to_jpeg(self):
+        """测试不透明的大尺寸 PNG 缩小并转为 JPEG"""
+        mime_type, image = decode_data_url(encode_image(png_bytes((3000, 1500)), max_edge=1000, quality=85))
+
+        self.assertEqual(mime_type, 'image/jpeg')
+        self.assertEqual(image.size, (1000, 500))
+
+    def test_transparent_image_keeps_png(self):
+        """测试带透明区域的图片保留 PNG"""
+        data = png_bytes((2000, 100), mode='RGBA', color=(0, 0, 0, 0))
+
+        mime_type, image = decode_data_url(encode_image(data, max_edge=500, quality=85))
+
+        self.assertEqual(mime_type, 'image/png')
+        self.assertEqual(image.size, (500, 25))
+
+    def test_small_image_not_enlarged(self):
+        """测试小图不放大,重新压缩不划算时使用原图"""
+        data = png_bytes((10, 10))
+
+        mime_type, image = decode_data_url(encode_image(data, max_edge=1000, quality=85))
+
+        self.assertEqual(image.size, (10, 10))
+        self.assertIn(mime_type, ('image/png', 'image/jpeg'))
+
+    def test_invalid_data(self):
+        """测试无法解码时返回 None"""
+        self.assertIsNone(encode_image(b"not an image", max_edge=1000, quality=85))
+
+
+class TestImageLoader(unittest.TestCase):
+    """测试本地和网络图片加载"""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.note_dir = Path(temp_dir.name)
+        (self.note_dir / "assets").mkdir()
+        (self.note_dir / "assets" / "shot one.png").write_bytes(png_bytes((2400, 1200)))
+        self.loader = ImageLoader(self.note_dir, max_edge=800)
+
+    def test_relative_path(self):
+        """测试相对路径 (含 URL 编码) 相对于笔记目录解析"""
+        loaded = self.loader.load("assets/shot%20one.png")
+        _, image = decode_data_url(loaded.url)
+
+        self.assertEqual(image.size, (800, 400))
+        self.assertIsNotNone(loaded.phash)
+
+    def test_file_url_and_missing_file(self):
+        """测试 file:// URL,以及不存在的本地图片返回 None"""
+        file_url = (self.note_dir / "assets" / "shot one.png").as_uri()
+
+        self.assertTrue(self.loader.load(file_url).url.startswith("data:image/jpeg"))
+        self.assertIsNone(self.loader.load("assets/missing.png"))
+
+    def test_paths_outside_note_dir_rejected(self):
+        """测试指向笔记目录之外的路径 (绝对路径、.. 、file:// 和符号链接) 不读取"""
+        with tempfile.TemporaryDirectory() as outside:
+            secret = Path(outside) / "secret.png"
+            secret.write_bytes(png_bytes((10, 10)))
+            (self.note_dir / "link.png").symlink_to(secret)
+            escape = "../" * len(self.note_dir.parts) + str(secret).lstrip('/')
+
+            for url in (str(secret), secret.as_uri(), escape, "link.png"):
+                self.assertIsNone(self.loader.resolve_path(url), url)
+                self.assertIsNone(self.loader.load(url), url)
+                self.assertEqual(self.loader.source_id(url), url)
+        self.assertIsNotNone(self.loader.load(str(self.note_dir / "assets" / "shot one.png")))
+
+    def test_local_reads_disabled_without_note_dir(self):
+        """测试不知道笔记目录时不读取本地图片,data URL 不受影响"""
+        with mock.patch.object(config, 'IMAGE_BASE_DIR', ''):
+            loader = ImageLoader()
+
+        self.assertIsNone(loader.load("assets/shot%20one.png"))
+        self.assertIsNone(loader.load((self.note_dir / "assets" / "shot one.png").as_uri()))
+        self.assertEqual(loader.load("data:image/png;base64,AA").url, "data:image/png;base64,AA")
+
+    def test_remote_failure_falls_back_to_url(self):
+        """测试网络图片下载失败时返回原 URL"""
+        self.loader.retry_policy.max_retries = 0
+        url = "http://127.0.0.1:9/unreachable.png"
+
+        loaded = self.loader.load(url)
+
+        self.assertEqual(loaded.url, url)
+        self.assertIsNone(loaded.phash)
+
+    def test_source_id(self):
+        """测试本地图片的标识随文件内容和笔记目录变化,网络图片为原地址"""
+        shot = self.note_dir / "assets" / "shot one.png"
+        first = self.loader.source_id("assets/shot%20one.png")
+        self.assertEqual(self.loader.source_id(shot.as_uri()), first)
+
+        shot.write_bytes(png_bytes((100, 100)))
+        self.assertNotEqual(self.loader.source_id("assets/shot%20one.png"), first)
+
+        with tempfile.TemporaryDirectory() as other_dir:
+            (Path(other_dir) / "assets").mkdir()
+            (Path(other_dir) / "assets" / "shot one.png").write_bytes(shot.read_bytes())
+            other = ImageLoader(other_dir).source_id("assets/shot%20one.png")
+        self.assertNotEqual(other, self.loader.source_id("assets/shot%20one.png"))
+        self.assertEqual(self.loader.source_id("https://a/x.png"), "https://a/x.png")
+
+    def test_download_limited_by_size(self):
+        """测试网络图片流式下载,超过大小上限 (声明或实际) 时改用原 URL"""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        self.loader.retry_policy.max_retries = 0
+
+        for path in ("/declared.png", "/undeclared.png"):
+            self.assertIsNotNone(self.loader.load(base_url + path).phash)
+
+        self.loader.max_bytes = len(ImageHandler.image) - 1
+        for path in ("/declared.png", "/undeclared.png"):
+            loaded = self.loader.load(base_url + path)
+            self.assertEqual(loaded.url, base_url + path)
+            self.assertIsNone(loaded.phash)
+
+    def test_load_many_keeps_order(self):
+        """测试并发加载结果顺序"""
+        results = self.loader.load_many(["assets/missing.png", "assets/shot%20one.png", "data:image/png;base64,AA"])
+
+        self.assertIsNone(results[0])
+        self.assertTrue(results[1].url.startswith("data:image/jpeg"))
+        self.assertEqual(results[2].url, "data:image/png;base64,AA")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,731 @@
+"""
+测试内容整合引擎
+"""
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from config import config
+from src.cache import DiskCache
+from src.fingerprint import HashIndex
+from src.image_loader import ImageLoader
+from src.integrator import ContentIntegrator, AsyncContentIntegrator, IncompleteArticle, LINK_PROCESS_FAILED
+from src.run_journal import RunJournal
+from src.web_scraper import canonicalize_url
+
+
+# 被多个网站转载的同一篇文章 (Jina 输出格式)
+REPRINTED_ARTICLE = "\n".join([
+    "Title: 老旧小区改造如何兼顾居民需求",
+    "Markdown Content:",
+    "今年以来,本市老旧小区改造工作全面提速,计划开工项目超过两百个,惠及居民约十二万户。",
+    "与以往刷墙换窗的做法不同,今年的改造更加注重补齐功能短板,加装电梯成为重点内容。",
+    "低层住户担心电梯影响采光和通风,部分居民对费用分摊方案存在不同意见。",
+    "街道和社区多次组织协商会议,请设计单位现场解答,并根据意见调整了电梯井的位置。",
+])
+
+
+class FakeClient:
+    """模拟智谱客户端,每次调用固定耗时"""
+
+    vision_model = "fake-vision"
+    text_model = "fake-text"
+
+    def __init__(self, delay: float = 0.0, reorganize_error: bool = False):
+        self.delay = delay
+        self.reorganize_error = reorganize_error
+        self.image_calls = []
+        self.summary_calls = []
+        self.batch_calls = []
+        self.reorganize_calls = 0
+
+    def analyze_image(self, image_url, prompt=None):
+        time.sleep(self.delay)
+        self.image_calls.append(image_url)
+        return f"描述:{image_url}"
+
+    def summarize_text(self, text, context=None):
+        time.sleep(self.delay)
+        self.summary_calls.append(text)
+        return f"总结:{text[:10]}"
+
+    def summarize_batch(self, items):
+        time.sleep(self.delay)
+        self.batch_calls.append([text for text, _ in items])
+        return [f"总结:{text[:10]}" for text, _ in items]
+
+    def reorganize_article(self, original_text, images_desc, links_summary, tags=None, front_matter=None,
+                           fallback=True, section=None):
+        self.reorganize_calls += 1
+        if self.reorganize_error:
+            raise RuntimeError("模型不可用")
+        return "\n".join(original_text)
+
+    def reorganize_article_stream(self, original_text, images_desc, links_summary, tags=None, front_matter=None,
+                                  fallback=True):
+        self.reorganize_calls += 1
+        if self.reorganize_error:
+            raise RuntimeError("模型不可用")
+        for text in original_text:
+            yield text + "\n"
+
+
+class FakeScraper:
+    """模拟网页抓取器"""
+
+    def __init__(self, delay: float = 0.0, failures=()):
+        self.delay = delay
+        self.failures = set(failures)
+
+    def fetch_content(self, url):
+        time.sleep(self.delay)
+        if url in self.failures:
+            return None
+        return f"正文 {url} " * 20
+
+    def canonical_url(self, url):
+        return canonicalize_url(url)
+
+
+class FakeAsyncClient:
+    """模拟异步智谱客户端"""
+
+    vision_model = "fake-vision"
+    text_model = "fake-text"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _call(self, result):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return result
+
+    async def analyze_image(self, image_url, prompt=None):
+        return await self._call(f"描述:{image_url}")
+
+    async def summarize_text(self, text, context=None):
+        return await self._call(f"总结:{text[:10]}")
+
+    async def reorganize_article(self, original_text, images_desc, links_summary, tags=None, front_matter=None,
+                                 section=None):
+        return f"{len(images_desc)} 图 {len(links_summary)} 链"
+
+
+class FakeAsyncScraper:
+    """模拟异步网页抓取器"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def fetch_content(self, url):
+        await asyncio.sleep(self.delay)
+        return f"正文 {url} " * 20
+
+
+class TestContentIntegrator(unittest.TestCase):
+    """测试内容整合引擎"""
+
+    def setUp(self):
+        # 运行日志在处理时按 CACHE_ENABLED 打开,整个测试期间都写到临时目录而不是项目的 .cache
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch.object(config, 'CACHE_DIR', temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_integrator(self, client=None, scraper=None, **kwargs):
+        with mock.patch.object(config, 'CACHE_ENABLED', False):
+            integrator = ContentIntegrator(api_key="test.key", **kwargs)
+        integrator.ai_client = client or FakeClient()
+        integrator.scraper = scraper or FakeScraper()
+        integrator.image_loader = None
+        return integrator
+
+    def test_results_keep_input_order(self):
+        """测试结果按原始顺序返回"""
+        integrator = self.make_integrator()
+        images = [{'url': f"https://example.com/{i}.png", 'alt': '', 'context': ''} for i in range(5)]
+        links = [{'url': f"https://example.com/a{i}", 'title': f"t{i}", 'context': ''} for i in range(5)]
+
+        images_desc, links_summary = integrator._process_media(images, links, max_workers=3)
+
+        self.assertEqual([img['url'] for img in images_desc], [img['url'] for img in images])
+        self.assertEqual([link['url'] for link in links_summary], [link['url'] for link in links])
+
+    def test_images_and_links_share_one_pool(self):
+        """测试图片和链接在同一阶段并发执行"""
+        delay = 0.2
+        integrator = self.make_integrator(FakeClient(delay), FakeScraper(delay))
+        images = [{'url': f"https://example.com/{i}.png"} for i in range(4)]
+        links = [{'url': f"https://example.com/a{i}"} for i in range(4)]
+
+        start = time.monotonic()
+        integrator._process_media(images, links, max_workers=8)
+        elapsed = time.monotonic() - start
+
+        # 图片一轮 + 链接抓取与总结两轮,全部重叠时约 2 * delay
+        self.assertLess(elapsed, 3 * delay)
+
+    def test_failed_fetch_skips_summary(self):
+        """测试抓取失败的链接不会调用总结"""
+        client = FakeClient()
+        integrator = self.make_integrator(client, FakeScraper(failures={"https://example.com/bad"}))
+        links = [{'url': "https://example.com/bad"}, {'url': "https://example.com/good"}]
+
+        _, links_summary = integrator._process_media([], links, max_workers=2)
+
+        self.assertEqual(links_summary[0]['summary'], '[内容抓取失败]')
+        self.assertTrue(links_summary[1]['summary'].startswith("总结:"))
+        self.assertEqual(len(client.summary_calls), 1)
+
+    def test_links_summarized_in_batches(self):
+        """测试多个链接按预算合并为少量批量请求,解析失败的条目改为单独总结"""
+        class PartialBatchClient(FakeClient):
+            def summarize_batch(self, items):
+                summaries = super().summarize_batch(items)
+                summaries[0] = None
+                return summaries
+
+        client = PartialBatchClient()
+        integrator = self.make_integrator(client)
+        links = [{'url': f"https://example.com/a{i}", 'context': ''} for i in range(10)]
+
+        with mock.patch.object(config, 'SUMMARY_BATCH_MAX_ITEMS', 4):
+            _, links_summary = integrator._process_media([], links, max_workers=4)
+
+        self.assertEqual(sorted(len(batch) for batch in client.batch_calls), [2, 4, 4])
+        self.assertEqual(len(client.summary_calls), 3)
+        self.assertEqual([link['url'] for link in links_summary], [link['url'] for link in links])
+        self.assertTrue(all(link['summary'].startswith("总结:") for link in links_summary))
+        self.assertEqual(integrator.progress.processed_links, 10)
+
+    def test_local_images_sent_as_data_urls(self):
+        """测试本地相对路径图片被读取后以 data URL 发送,缺失的图片使用 alt 兜底"""
+        with tempfile.TemporaryDirectory() as note_dir:
+            Path(note_dir, "assets").mkdir()
+            Image.new('RGB', (40, 20), 'red').save(Path(note_dir, "assets", "x.png"))
+            client = FakeClient()
+            integrator = self.make_integrator(client)
+            integrator.image_loader = ImageLoader(note_dir)
+            images = [{'url': "assets/x.png", 'alt': ''}, {'url': "assets/missing.png", 'alt': '缺失'}]
+
+            images_desc, _ = integrator._process_media(images, [], max_workers=2)
+
+        self.assertEqual(len(client.image_calls), 1)
+        self.assertTrue(client.image_calls[0].startswith("data:image/"))
+        self.assertEqual(images_desc[0]['url'], "assets/x.png")
+        self.assertEqual(images_desc[1]['description'], "[图片: 缺失]")
+
+    def test_near_duplicate_images_share_one_call(self):
+        """测试同一截图的不同尺寸副本只识别一次,单张和分组两种方式都适用"""
+        class GroupClient(FakeClient):
+            vision_group_size = 2
+
+            def analyze_images(self, items):
+                self.batch_calls.append([url for url, _ in items])
+                return [f"描述:{url[:30]}" for url, _ in items]
+
+        with tempfile.TemporaryDirectory() as note_dir:
+            screenshot = Image.radial_gradient('L').resize((800, 600)).convert('RGB')
+            screenshot.save(Path(note_dir, "a.png"))
+            screenshot.resize((400, 300)).save(Path(note_dir, "b.jpg"), quality=70)
+            Image.linear_gradient('L').save(Path(note_dir, "c.png"))
+            images = [{'url': name, 'alt': ''} for name in ("a.png", "b.jpg", "c.png")]
+
+            for client in (FakeClient(), GroupClient()):
+                integrator = self.make_integrator(client)
+                integrator.image_loader = ImageLoader(note_dir)
+                integrator.hash_index = None
+
+                images_desc, _ = integrator._process_media(images, [], max_workers=3)
+
+                calls = client.image_calls + [url for group in client.batch_calls for url in group]
+                self.assertEqual(len(calls), 2)
+                self.assertEqual(images_desc[0]['description'], images_desc[1]['description'])
+                self.assertNotEqual(images_desc[0]['description'], images_desc[2]['description'])
+
+    def test_persisted_hash_index_requires_same_content(self):
+        """测试跨笔记只复用内容完全相同的图片的描述,感知哈希相近的其他图片重新识别"""
+        with tempfile.TemporaryDirectory() as note_dir:
+            screenshot = Image.radial_gradient('L').resize((800, 600)).convert('RGB')
+            screenshot.save(Path(note_dir, "a.png"))
+            screenshot.resize((400, 300)).save(Path(note_dir, "b.jpg"), quality=70)
+            Path(note_dir, "copy.png").write_bytes(Path(note_dir, "a.png").read_bytes())
+
+            client = FakeClient()
+            integrator = self.make_integrator(client)
+            integrator.image_loader = ImageLoader(note_dir)
+            integrator.hash_index = HashIndex(None, max_distance=config.IMAGE_HASH_DISTANCE)
+
+            for name in ("a.png", "b.jpg", "copy.png"):
+                integrator._process_media([{'url': name, 'alt': ''}], [], max_workers=1)
+
+            self.assertEqual(len(client.image_calls), 2)
+
+    def test_images_analyzed_in_groups(self):
+        """测试多张图片合并为少量视觉请求,结果按原始顺序返回"""
+        class GroupClient(FakeClient):
+            vision_group_size = 3
+
+            def analyze_images(self, items):
+                self.batch_calls.append([url for url, _ in items])
+                return [f"描述:{url}" for url, _ in items]
+
+        client = GroupClient()
+        integrator = self.make_integrator(client)
+        images = [{'url': f"https://example.com/{i}.png", 'alt': ''} for i in range(7)]
+
+        images_desc, _ = integrator._process_media(images, [], max_workers=4)
+
+        self.assertEqual(sorted(len(group) for group in client.batch_calls), [1, 3, 3])
+        self.assertEqual(client.image_calls, [])
+        self.assertEqual([img['description'] for img in images_desc], [f"描述:{img['url']}" for img in images])
+        self.assertEqual(integrator.progress.processed_images, 7)
+
+    def test_progress_counts(self):
+        """测试进度计数"""
+        stages = []
+        integrator = self.make_integrator(progress_callback=lambda p: stages.append(p.current_stage))
+        images = [{'url': f"https://example.com/{i}.png"} for i in range(3)]
+        links = [{'url': f"https://example.com/a{i}"} for i in range(2)]
+
+        integrator._process_media(images, links, max_workers=4)
+
+        self.assertEqual(integrator.progress.processed_images, 3)
+        self.assertEqual(integrator.progress.processed_links, 2)
+        self.assertIn("图片 3/3", stages[-1])
+        self.assertIn("链接 2/2", stages[-1])
+
+    def test_process_markdown_stream(self):
+        """测试流式输出在图片和链接处理完成后逐段产出"""
+        stages = []
+        integrator = self.make_integrator(progress_callback=lambda p: stages.append(p.current_stage))
+        md = "# 标题\n\n第一段 ![图](https://example.com/a.png)\n\n第二段"
+
+        chunks = list(integrator.process_markdown_stream(md))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertIn("第二段", "".join(chunks))
+        self.assertEqual(integrator.progress.processed_images, 1)
+        self.assertEqual(stages[-1], "处理完成!")
+
+    def test_stream_failure_reported(self):
+        """测试流式生成中途失败时抛出 IncompleteArticle 且不记为完成,开始前失败时产出原始文本并标记"""
+        class BrokenStreamClient(FakeClient):
+            def reorganize_article_stream(self, original_text, *args, **kwargs):
+                yield original_text[0]
+                raise RuntimeError("连接中断")
+
+        note = "# 标题\n\n第一段\n\n第二段"
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(config, 'CACHE_ENABLED', True), \
+                mock.patch.object(config, 'CACHE_DIR', tmp):
+            integrator = self.make_integrator(BrokenStreamClient())
+            chunks = []
+            with self.assertRaises(IncompleteArticle) as raised:
+                for chunk in integrator.process_markdown_stream(note):
+                    chunks.append(chunk)
+
+            self.assertEqual(chunks, ["# 标题"])
+            self.assertIn(integrator.run_id, str(raised.exception))
+            self.assertFalse(integrator.fully_reorganized)
+            self.assertEqual(RunJournal.find_incomplete(note), integrator.run_id)
+
+            integrator = self.make_integrator(FakeClient(reorganize_error=True))
+            self.assertIn("第二段", "".join(integrator.process_markdown_stream(note)))
+            self.assertFalse(integrator.fully_reorganized)
+
+            integrator.ai_client = FakeClient()
+            list(integrator.process_markdown_stream(note))
+            self.assertTrue(integrator.fully_reorganized)
+
+    def test_vision_cache_skips_seen_images(self):
+        """测试重复处理时已识别的图片不再调用模型"""
+        client = FakeClient()
+        integrator = self.make_integrator(client)
+        with tempfile.TemporaryDirectory() as tmp:
+            integrator.vision_cache = DiskCache(f"{tmp}/vision.sqlite3")
+            images = [{'url': f"https://example.com/{i}.png", 'context': '上下文'} for i in range(3)]
+
+            first, _ = integrator._process_media(images, [], max_workers=2)
+            second, _ = integrator._process_media(images, [], max_workers=2)
+
+            self.assertEqual(len(client.image_calls), 3)
+            self.assertEqual(first, second)
+            self.assertEqual(integrator.vision_cache.stats().hits, 3)
+
+    def test_vision_cache_follows_local_file(self):
+        """测试本地图片被替换后重新识别,不同笔记目录下的同名图片不共用缓存"""
+        client = FakeClient()
+        integrator = self.make_integrator(client)
+        with tempfile.TemporaryDirectory() as tmp:
+            integrator.vision_cache = DiskCache(f"{tmp}/vision.sqlite3")
+            for name in ("a", "b"):
+                (Path(tmp) / name).mkdir()
+                Image.new('RGB', (64, 64), 'white').save(Path(tmp) / name / "image.png")
+            images = [{'url': "image.png", 'context': ''}]
+
+            integrator.image_loader = ImageLoader(Path(tmp) / "a")
+            integrator._process_media(images, [], max_workers=1)
+            integrator._process_media(images, [], max_workers=1)
+            self.assertEqual(len(client.image_calls), 1)
+
+            Image.new('RGB', (80, 64), 'black').save(Path(tmp) / "a" / "image.png")
+            integrator._process_media(images, [], max_workers=1)
+            self.assertEqual(len(client.image_calls), 2)
+
+            integrator.image_loader = ImageLoader(Path(tmp) / "b")
+            integrator._process_media(images, [], max_workers=1)
+            self.assertEqual(len(client.image_calls), 3)
+
+    def test_summary_cache_shared_across_urls(self):
+        """测试正文相同的不同 URL 只总结一次"""
+        class SameContentScraper(FakeScraper):
+            def fetch_content(self, url):
+                return "同一篇文章的正文内容。" * 20
+
+        client = FakeClient()
+        integrator = self.make_integrator(client, SameContentScraper())
+        with tempfile.TemporaryDirectory() as tmp:
+            integrator.summary_cache = DiskCache(f"{tmp}/summaries.sqlite3")
+            links = [
+                {'url': "https://example.com/post", 'context': '上下文'},
+                {'url': "https://example.com/post?utm_source=x", 'context': '上下文'},
+                {'url': "https://mirror.example.org/post", 'context': '上下文'},
+            ]
+
+            _, links_summary = integrator._process_media([], links, max_workers=1)
+
+            self.assertEqual(len(client.summary_calls), 1)
+            self.assertEqual(len({link['summary'] for link in links_summary}), 1)
+
+    def test_duplicate_links_summarized_once(self):
+        """测试跟踪参数变体不重复抓取,转载页面复用总结,跨运行通过 SimHash 索引复用"""
+        article = " ".join(f"sentence {i} about caching strategies in distributed systems." for i in range(60))
+
+        class MirrorScraper(FakeScraper):
+            def fetch_content(self, url):
+                self.fetched.append(url)
+                if "other" in url:
+                    return "完全不同的另一篇文章,讨论的是前端构建工具。" * 20
+                footer = "Syndicated from the original blog." if "mirror" in url else ""
+                return article + footer
+
+        scraper = MirrorScraper()
+        scraper.fetched = []
+        client = FakeClient()
+        integrator = self.make_integrator(client, scraper)
+        integrator.page_index = HashIndex(None, max_distance=config.PAGE_SIMHASH_DISTANCE)
+        links = [
+            {'url': "https://blog.example.com/post", 'context': '缓存'},
+            {'url': "https://blog.example.com/post?utm_source=feed&utm_medium=rss", 'context': '缓存'},
+            {'url': "https://mirror.example.org/amp/post", 'context': '转载'},
+            {'url': "https://other.example.com/post", 'context': '前端'},
+        ]
+
+        _, links_summary = integrator._process_media([], links, max_workers=4)
+
+        self.assertEqual(len(scraper.fetched), 3)
+        self.assertEqual(len(client.summary_calls) + sum(map(len, client.batch_calls)), 2)
+        self.assertEqual(links_summary[0]['summary'], links_summary[1]['summary'])
+        self.assertEqual(links_summary[0]['summary'], links_summary[2]['summary'])
+        self.assertNotEqual(links_summary[0]['summary'], links_summary[3]['summary'])
+        self.assertEqual([link['url'] for link in links_summary], [link['url'] for link in links])
+        self.assertEqual(integrator.progress.processed_links, 4)
+
+        # 另一篇笔记引用了同一篇文章的转载
+        client.summary_calls.clear()
+        client.batch_calls.clear()
+        _, links_summary = integrator._process_media([], [links[2]], max_workers=1)
+
+        self.assertEqual(client.summary_calls + client.batch_calls, [])
+        self.assertTrue(links_summary[0]['summary'].startswith("总结:"))
+
+    def test_docs_pages_sharing_navigation_not_merged(self):
+        """测试共用导航和侧边栏的不同文档页 (Jina 输出) 分别总结,也不会在索引中互相匹配"""
+        nav = "\n".join(f"* [{name} {i}](https://docs.example.com/{i})" for i, name in enumerate(["Guide", "API"] * 40))
+        sidebar = "FastJSON is a high performance JSON library for Python with optional C extensions and streaming."
+        pages = {
+            "https://docs.example.com/install": ("Installation - FastJSON",
+                                                 "Install with pip install fastjson. Wheels are provided for "
+                                                 "Linux, macOS and Windows on every supported Python version."),
+            "https://docs.example.com/config": ("Configuration - FastJSON",
+                                                "Set FASTJSON_STRICT to reject duplicate keys while parsing, "
+                                                "and tune the buffer size for very large documents."),
+        }
+
+        class DocsScraper(FakeScraper):
+            def fetch_content(self, url):
+                title, body = pages[url]
+                return f"Title: {title}\nURL Source: {url}\nMarkdown Content:\n{nav}\n{sidebar}\n{body}"
+
+        client = FakeClient()
+        integrator = self.make_integrator(client, DocsScraper())
+        # 索引中任意 SimHash 都算相近,只靠标题区分
+        integrator.page_index = HashIndex(None, max_distance=64)
+        links = [{'url': url, 'context': '文档'} for url in pages]
+
+        with mock.patch.object(config, 'PAGE_DEDUP_MIN_TERMS', 10):
+            _, first = integrator._process_media([], links, max_workers=1)
+            _, second = integrator._process_media([], links[1:], max_workers=1)
+
+        self.assertEqual(len(client.summary_calls) + sum(map(len, client.batch_calls)), 2)
+        self.assertNotEqual(first[0]['summary'], first[1]['summary'])
+        self.assertEqual(second[0]['summary'], first[1]['summary'])
+
+    def test_incremental_reprocessing(self):
+        """测试同一笔记再次处理时只处理新增或变化的条目"""
+        client = FakeClient()
+        integrator = self.make_integrator(client)
+        note_v1 = (
+            "第一段\n\n![图1](https://example.com/1.png)\n\n"
+            "第二段 [链接](https://example.com/a)\n\n![图2](https://example.com/2.png)\n\n"
+            + "结尾段落。" * 40
+        )
+        # 新增内容离原有图片足够远,不改变它们的上下文
+        note_v2 = note_v1 + "\n\n新增段落\n\n![图3](https://example.com/3.png)"
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(config, 'CACHE_ENABLED', True), \
+                mock.patch.object(config, 'CACHE_DIR', tmp):
+            integrator.process_markdown(note_v1, note_id="note.md")
+            self.assertEqual(len(client.image_calls), 2)
+            self.assertEqual(len(client.summary_calls), 1)
+
+            integrator.process_markdown(note_v2, note_id="note.md")
+            self.assertEqual(client.image_calls[2:], ["https://example.com/3.png"])
+            self.assertEqual(len(client.summary_calls), 1)
+
+            # 其他笔记不共用清单
+            integrator.process_markdown(note_v1, note_id="other.md")
+            self.assertEqual(len(client.image_calls), 5)
+
+    def test_resume_failed_run(self):
+        """测试恢复运行时只重试缺失的条目和最终重组"""
+        client = FakeClient(reorganize_error=True)
+        integrator = self.make_integrator(client, FakeScraper(failures={"https://example.com/bad"}))
+        note = (
+            "第一段 ![图1](https://example.com/1.png)\n\n"
+            "[好链接](https://example.com/good) [坏链接](https://example.com/bad)"
+        )
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(config, 'CACHE_ENABLED', True), \
+                mock.patch.object(config, 'CACHE_DIR', tmp):
+            article = integrator.process_markdown(note)
+            run_id = integrator.run_id
+            self.assertIn("第一段", article)
+            self.assertEqual(RunJournal.find_incomplete(note), run_id)
+
+            client.reorganize_error = False
+            integrator.scraper = FakeScraper()
+            integrator.process_markdown(note, run_id=run_id)
+
+            self.assertEqual(len(client.image_calls), 1)
+            self.assertEqual(len(client.summary_calls), 2)
+            self.assertEqual(client.reorganize_calls, 2)
+            self.assertTrue(RunJournal.load(run_id).completed)
+            self.assertIsNone(RunJournal.find_incomplete(note))
+
+            # 已完成的运行直接返回记录的文章
+            chunks = list(integrator.process_markdown_stream(note, run_id=run_id))
+            self.assertEqual(client.reorganize_calls, 2)
+            self.assertEqual(chunks, [RunJournal.load(run_id).article])
+
+    def test_long_note_reorganized_in_parallel_sections(self):
+        """测试长笔记分段并行重组,并按顺序拼接"""
+        delay = 0.2
+
+        class SectionClient(FakeClient):
+            def __init__(self):
+                super().__init__()
+                self.sections = []
+
+            def reorganize_article(self, original_text, images_desc, links_summary, tags=None,
+                                   front_matter=None, fallback=True, section=None):
+                time.sleep(delay)
+                self.sections.append((section, front_matter, tags))
+                return "\n\n".join(original_text)
+
+        client = SectionClient()
+        integrator = self.make_integrator(client)
+        note = "---\ntitle: 长文\n---\n" + "\n\n".join(
+            f"# 第{i}节\n\n" + f"第{i}节正文" * 100 for i in range(4)
+        ) + "\n\n#标签"
+
+        with mock.patch.object(config, 'REORGANIZE_SECTION_CHARS', 800):
+            start = time.monotonic()
+            chunks = list(integrator.process_markdown_stream(note))
+            elapsed = time.monotonic() - start
+
+        article = "".join(chunks)
+        self.assertLess(elapsed, 2 * delay)
+        self.assertEqual(len(client.sections), 4)
+        self.assertEqual(article.count("\n# "), 0)
+        self.assertLess(article.index("第0节"), article.index("第3节"))
+        by_index = {section[0]: (front_matter, tags) for section, front_matter, tags in client.sections}
+        self.assertEqual(by_index[1][0], "title: 长文")
+        self.assertIsNone(by_index[2][0])
+        self.assertEqual(by_index[4][1], ["标签"])
+        self.assertIsNone(by_index[1][1])
+
+    def test_resume_rejects_changed_note(self):
+        """测试笔记内容变化后不能按原运行 ID 恢复"""
+        integrator = self.make_integrator()
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(config, 'CACHE_ENABLED', True), \
+                mock.patch.object(config, 'CACHE_DIR', tmp):
+            integrator.process_markdown("原始内容")
+            with self.assertRaises(ValueError):
+                integrator.process_markdown("修改后的内容", run_id=integrator.run_id)
+
+    def test_invalid_run_id_rejected(self):
+        """测试不是自动生成格式的运行 ID (如路径穿越) 被拒绝,不读写日志目录之外的文件"""
+        integrator = self.make_integrator()
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(config, 'CACHE_ENABLED', True), \
+                mock.patch.object(config, 'CACHE_DIR', str(Path(tmp) / "cache")):
+            for run_id in ("../../escape", "/tmp/escape", "ABCDEF0123456789", "0123"):
+                with self.assertRaises(ValueError):
+                    integrator.process_markdown("内容", run_id=run_id)
+                with self.assertRaises(ValueError):
+                    RunJournal.load(run_id)
+            self.assertEqual(list(Path(tmp).glob("*escape*")), [])
+
+    def test_find_incomplete_by_note_and_model(self):
+        """测试按笔记内容和模型查找未完成的运行,只读取对应的一份运行日志"""
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(config, 'CACHE_DIR', tmp):
+            for i in range(5):
+                RunJournal.create(f"其他笔记 {i}")
+            run_id = RunJournal.create("笔记").run_id
+
+            with mock.patch.object(RunJournal, 'load', wraps=RunJournal.load) as load:
+                self.assertEqual(RunJournal.find_incomplete("笔记"), run_id)
+            self.assertEqual(load.call_count, 1)
+            with mock.patch.object(config, 'TEXT_MODEL', 'other-model'):
+                self.assertIsNone(RunJournal.find_incomplete("笔记"))
+            self.assertIsNone(RunJournal.find_incomplete("笔记", model="other-model+vision"))
+
+            RunJournal.load(run_id).record_article("文章")
+            self.assertIsNone(RunJournal.find_incomplete("笔记"))
+
+
+class TestAsyncContentIntegrator(unittest.TestCase):
+    """测试异步内容整合引擎"""
+
+    def setUp(self):
+        patcher = mock.patch.object(config, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def run_with_fakes(self, integrator, markdown_texts, client, scraper):
+        async with integrator:
+            integrator.ai_client = client
+            integrator.scraper = scraper
+            integrator.image_loader = None
+            return await integrator.process_many(markdown_texts)
+
+    def test_many_requests_in_flight(self):
+        """测试并发数不受线程数限制"""
+        delay = 0.2
+        note = "\n\n".join(f"[链接{i}](https://example.com/a{i})" for i in range(50))
+        note += "\n\n" + "\n\n".join(f"![图{i}](https://example.com/{i}.png)" for i in range(50))
+        client = FakeAsyncClient(delay)
+        integrator = AsyncContentIntegrator(api_key="test.key")
+
+        start = time.monotonic()
+        articles = asyncio.run(self.run_with_fakes(integrator, [note], client, FakeAsyncScraper(delay)))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(articles, ["50 图 50 链"])
+        self.assertGreater(client.max_in_flight, 10)
+        self.assertLess(elapsed, 5 * delay)
+        self.assertEqual(integrator.progress.processed_images, 50)
+        self.assertEqual(integrator.progress.processed_links, 50)
+
+    def test_process_many_keeps_order(self):
+        """测试批量处理结果顺序"""
+        notes = [
+            "![a](https://example.com/a.png)",
+            "[b](https://example.com/b) [c](https://example.com/c)",
+        ]
+        integrator = AsyncContentIntegrator(api_key="test.key")
+
+        articles = asyncio.run(self.run_with_fakes(integrator, notes, FakeAsyncClient(), FakeAsyncScraper()))
+
+        self.assertEqual(articles, ["1 图 0 链", "0 图 2 链"])
+
+    def test_failed_duplicate_not_reused_across_runs(self):
+        """测试上一次运行中失败的近似重复网页不会影响之后的运行"""
+        class FlakyClient(FakeAsyncClient):
+            calls = 0
+
+            async def summarize_text(self, text, context=None):
+                FlakyClient.calls += 1
+                if FlakyClient.calls == 1:
+                    raise RuntimeError("模型不可用")
+                return await super().summarize_text(text, context)
+
+            async def reorganize_article(self, original_text, images_desc, links_summary, **kwargs):
+                return " | ".join(link['summary'] for link in links_summary)
+
+        class SameScraper(FakeAsyncScraper):
+            async def fetch_content(self, url):
+                return REPRINTED_ARTICLE
+
+        with mock.patch.object(config, 'PAGE_DEDUP_ENABLED', True):
+            integrator = AsyncContentIntegrator(api_key="test.key")
+
+            async def run():
+                async with integrator:
+                    integrator.ai_client = FlakyClient()
+                    integrator.scraper = SameScraper()
+                    first = await integrator.process_many(["[a](https://a.example.com/post)"])
+                    second = await integrator.process_many(["[b](https://b.example.com/post)"])
+                    return first, second
+
+            first, second = asyncio.run(run())
+
+        self.assertEqual(first, [LINK_PROCESS_FAILED])
+        self.assertTrue(second[0].startswith("总结:"))
+
+    def test_cancelled_owner_releases_duplicates(self):
+        """测试负责总结的协程被取消后,等待其结果的近似重复链接按失败处理而不是一直等待"""
+        class SlowClient(FakeAsyncClient):
+            async def summarize_text(self, text, context=None):
+                await asyncio.sleep(10)
+
+        class SameScraper(FakeAsyncScraper):
+            async def fetch_content(self, url):
+                return REPRINTED_ARTICLE
+
+        with mock.patch.object(config, 'PAGE_DEDUP_ENABLED', True):
+            integrator = AsyncContentIntegrator(api_key="test.key")
+
+        async def run():
+            integrator.ai_client = SlowClient()
+            integrator.scraper = SameScraper()
+            owner = asyncio.create_task(integrator._process_single_link({'url': "https://a.example.com/post"}))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(integrator._process_single_link({'url': "https://b.example.com/post"}))
+            await asyncio.sleep(0.05)
+            owner.cancel()
+            return await asyncio.wait_for(waiter, timeout=2)
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result['summary'], LINK_PROCESS_FAILED)
+
+
+if __name__ == '__main__':
+    unittest.main()
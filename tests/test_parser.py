@@ -164,6 +164,51 @@ print("test")
         # 标签
         self.assertGreaterEqual(len(result.tags), 2)
 
+    def test_image_not_reported_as_link(self):
+        """测试没有图片扩展名的图片 URL 不会同时被当作链接"""
+        md = "![截图](https://img.example.com/abc?size=large) 以及 [文章](https://example.com/post)"
+        result = self.parser.parse(md)
+        self.assertEqual([img['url'] for img in result.images], ["https://img.example.com/abc?size=large"])
+        self.assertEqual([link['url'] for link in result.links], ["https://example.com/post"])
+
+    def test_linked_image(self):
+        """测试链接中的图片 (可点击的截图) 同时提取图片和链接,链接标题使用图片的 alt"""
+        md = "[![build](https://img.shields.io/badge.svg)](https://ci.example.com/job)"
+        result = self.parser.parse(md)
+        self.assertEqual([(img['url'], img['alt']) for img in result.images],
+                         [("https://img.shields.io/badge.svg", "build")])
+        self.assertEqual([(link['url'], link['title']) for link in result.links],
+                         [("https://ci.example.com/job", "build")])
+
+    def test_badges_in_sentence(self):
+        """测试句子中间的徽章不影响前后的图片和链接"""
+        md = (
+            "构建状态 [![build](https://img.shields.io/badge.svg)](https://ci.example.com/job) 正常,"
+            "覆盖率 [![coverage](https://img.shields.io/cov.svg)](https://cov.example.com) 达标,"
+            "详见 [文档](https://docs.example.com) 和 ![架构图](arch.png)"
+        )
+        result = self.parser.parse(md)
+        self.assertEqual([img['url'] for img in result.images],
+                         ["https://img.shields.io/badge.svg", "https://img.shields.io/cov.svg", "arch.png"])
+        self.assertEqual([link['url'] for link in result.links],
+                         ["https://ci.example.com/job", "https://cov.example.com", "https://docs.example.com"])
+
+    def test_duplicates_and_context(self):
+        """测试重复 URL 保留首次出现,上下文取周围原文并去掉 Markdown 语法"""
+        md = (
+            "第一段介绍 **缓存** 的 [原文](https://example.com/a) 。\n\n"
+            + "填充内容。" * 100
+            + "\n\n再次引用 [另一个标题](https://example.com/a) 和图片 ![图](https://example.com/x.png)"
+            + " ![图2](https://example.com/x.png)"
+        )
+        result = self.parser.parse(md)
+        self.assertEqual(len(result.links), 1)
+        self.assertEqual(result.links[0]['title'], "原文")
+        self.assertIn("第一段介绍 缓存 的 原文https:", result.links[0]['context'])
+        self.assertEqual(len(result.images), 1)
+        self.assertEqual(result.images[0]['alt'], "图")
+        self.assertLessEqual(len(result.images[0]['context']), 100)
+
 
 if __name__ == '__main__':
     unittest.main()
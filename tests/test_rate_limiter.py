@@ -0,0 +1,142 @@
+"""
+测试模型调用限流
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from src.rate_limiter import TokenBucket, AdaptiveConcurrency, RateLimiter, estimate_tokens
+
+
+class ThrottleError(Exception):
+    """模拟 429 错误"""
+    status_code = 429
+
+
+class TestTokenBucket(unittest.TestCase):
+    """测试令牌桶"""
+
+    def test_burst_then_wait(self):
+        """测试容量内立即放行,超出后按速率等待"""
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        self.assertEqual(bucket.reserve(1), 0.0)
+        self.assertEqual(bucket.reserve(1), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(1), 0.2, places=2)
+
+    def test_adjust_refunds_tokens(self):
+        """测试按实际用量归还令牌"""
+        bucket = TokenBucket(rate=1, capacity=100)
+        bucket.reserve(100)
+        bucket.adjust(60)
+
+        self.assertEqual(bucket.reserve(50), 0.0)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """测试 AIMD 并发控制"""
+
+    def test_throttle_halves_once_per_cooldown(self):
+        """测试同一批限流只减半一次"""
+        control = AdaptiveConcurrency(initial=16, maximum=32, cooldown=60)
+
+        self.assertTrue(control.on_throttle())
+        self.assertFalse(control.on_throttle())
+        self.assertEqual(control.limit, 8)
+
+    def test_success_ramps_up_to_maximum(self):
+        """测试成功时逐步增加并发上限"""
+        control = AdaptiveConcurrency(initial=2, maximum=4)
+        for _ in range(100):
+            control.on_success()
+
+        self.assertEqual(control.limit, 4)
+
+    def test_acquire_respects_limit(self):
+        """测试已满时不再放行"""
+        control = AdaptiveConcurrency(initial=1, maximum=1)
+
+        self.assertTrue(control.try_acquire())
+        self.assertFalse(control.try_acquire())
+        control.release()
+        self.assertTrue(control.try_acquire())
+
+
+class TestRateLimiter(unittest.TestCase):
+    """测试限流器"""
+
+    def test_request_rate(self):
+        """测试请求速率受限"""
+        limiter = RateLimiter(requests_per_second=20, max_concurrency=10, initial_concurrency=10)
+
+        start = time.monotonic()
+        for _ in range(25):
+            with limiter.request():
+                pass
+        elapsed = time.monotonic() - start
+
+        # 前 20 个来自突发容量,其余 5 个按 20/s 放行
+        self.assertGreater(elapsed, 0.2)
+
+    def test_throttle_reduces_concurrency(self):
+        """测试 429 错误触发退避,其他错误不影响并发上限"""
+        limiter = RateLimiter(requests_per_second=100, max_concurrency=8, initial_concurrency=8)
+
+        with self.assertRaises(ValueError):
+            with limiter.request():
+                raise ValueError("bad request")
+        self.assertEqual(limiter.concurrency.limit, 8)
+
+        with self.assertRaises(ThrottleError):
+            with limiter.request():
+                raise ThrottleError()
+        self.assertEqual(limiter.concurrency.limit, 4)
+        self.assertEqual(limiter.throttled, 1)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_concurrency_shared_across_threads_and_async(self):
+        """测试线程和协程共用同一个并发上限"""
+        limiter = RateLimiter(requests_per_second=1000, max_concurrency=3, initial_concurrency=3)
+        peak = []
+        lock = threading.Lock()
+
+        def record():
+            with lock:
+                peak.append(limiter.concurrency.in_flight)
+
+        def sync_call():
+            with limiter.request():
+                record()
+                time.sleep(0.05)
+
+        async def async_calls():
+            async def one():
+                async with limiter.request_async():
+                    record()
+                    await asyncio.sleep(0.05)
+            await asyncio.gather(*(one() for _ in range(5)))
+
+        threads = [threading.Thread(target=sync_call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        asyncio.run(async_calls())
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(len(peak), 10)
+
+    def test_estimate_tokens(self):
+        """测试 token 预估包含文本、图片和最大输出"""
+        messages = [{'role': 'user', 'content': [
+            {'type': 'text', 'text': "描述图片"},
+            {'type': 'image_url', 'image_url': {'url': "https://example.com/a.png"}}
+        ]}]
+
+        self.assertEqual(estimate_tokens(messages, 500), 4 + 1000 + 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
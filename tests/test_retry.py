@@ -0,0 +1,111 @@
+"""
+测试重试策略
+"""
+import asyncio
+import unittest
+from email.utils import formatdate
+import time
+
+import requests
+
+from src.retry import RetryPolicy, is_retryable, retry_after
+from src.zhipu_client import ZhipuHTTPError
+
+
+class TestClassification(unittest.TestCase):
+    """测试错误分类"""
+
+    def test_status_codes(self):
+        """测试按状态码区分可重试错误"""
+        self.assertTrue(is_retryable(ZhipuHTTPError(429, "")))
+        self.assertTrue(is_retryable(ZhipuHTTPError(503, "")))
+        self.assertFalse(is_retryable(ZhipuHTTPError(400, "")))
+        self.assertFalse(is_retryable(ZhipuHTTPError(401, "")))
+
+    def test_network_errors(self):
+        """测试网络异常可重试,其他异常不重试"""
+        self.assertTrue(is_retryable(requests.ConnectionError()))
+        self.assertTrue(is_retryable(requests.Timeout()))
+        self.assertFalse(is_retryable(ValueError("bad")))
+
+    def test_retry_after(self):
+        """测试解析秒数和 HTTP 日期两种 Retry-After"""
+        self.assertEqual(retry_after(ZhipuHTTPError(429, "", {'Retry-After': '3'})), 3.0)
+        date = formatdate(time.time() + 10, usegmt=True)
+        self.assertAlmostEqual(retry_after(ZhipuHTTPError(429, "", {'Retry-After': date})), 10, delta=1.5)
+        self.assertIsNone(retry_after(ZhipuHTTPError(429, "")))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """测试重试执行"""
+
+    def make_policy(self, **kwargs):
+        options = dict(deadline=10, max_retries=3, base_delay=0.01, max_delay=0.05)
+        options.update(kwargs)
+        return RetryPolicy(**options)
+
+    def test_retries_until_success(self):
+        """测试可重试错误重试后成功,并通知回调"""
+        policy = self.make_policy()
+        notified = []
+        policy.on_retry = lambda: notified.append(1)
+        attempts = []
+
+        def flaky(timeout):
+            attempts.append(timeout)
+            if len(attempts) < 3:
+                raise ZhipuHTTPError(503, "busy")
+            return "ok"
+
+        self.assertEqual(policy.call(flaky, "测试", timeout=5), "ok")
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(policy.retries, 2)
+        self.assertEqual(len(notified), 2)
+
+    def test_non_retryable_raises_immediately(self):
+        """测试不可重试错误直接抛出"""
+        policy = self.make_policy()
+        calls = []
+
+        def bad(timeout):
+            calls.append(timeout)
+            raise ZhipuHTTPError(400, "bad request")
+
+        with self.assertRaises(ZhipuHTTPError):
+            policy.call(bad, "测试", timeout=5)
+        self.assertEqual(len(calls), 1)
+
+    def test_deadline_budget(self):
+        """测试 Retry-After 超出时间预算时不再重试,单次超时不超过剩余预算"""
+        policy = self.make_policy(deadline=0.5)
+        timeouts = []
+
+        def throttled(timeout):
+            timeouts.append(timeout)
+            raise ZhipuHTTPError(429, "slow down", {'Retry-After': '5'})
+
+        start = time.monotonic()
+        with self.assertRaises(ZhipuHTTPError):
+            policy.call(throttled, "测试", timeout=30)
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(timeouts), 1)
+        self.assertLessEqual(timeouts[0], 0.5)
+
+    def test_async_retries(self):
+        """测试异步调用重试"""
+        policy = self.make_policy()
+        attempts = []
+
+        async def flaky(timeout):
+            attempts.append(timeout)
+            if len(attempts) == 1:
+                raise asyncio.TimeoutError()
+            return "ok"
+
+        self.assertEqual(asyncio.run(policy.call_async(flaky, "测试", timeout=5)), "ok")
+        self.assertEqual(policy.retries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
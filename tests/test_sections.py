@@ -0,0 +1,106 @@
+"""
+测试长笔记分段
+"""
+import unittest
+
+from src.parser import MarkdownParser
+from src.sections import split_sections, normalize_section, stitch_sections
+
+
+def make_note(sections: int, paragraph_chars: int) -> str:
+    """构造带标题、图片和链接的长笔记"""
+    parts = []
+    for i in range(sections):
+        parts.append(f"# 第{i}节")
+        parts.append(f"第{i}节正文" + "内容" * (paragraph_chars // 2))
+        parts.append(f"![图{i}](https://example.com/{i}.png)")
+        parts.append(f"参考 [链接{i}](https://example.com/post{i})")
+    return "\n\n".join(parts)
+
+
+class TestSplitSections(unittest.TestCase):
+    """测试分段"""
+
+    def setUp(self):
+        self.parser = MarkdownParser()
+
+    def split(self, markdown: str, max_chars: int):
+        parsed = self.parser.parse(markdown)
+        images = [{'url': img['url'], 'description': ''} for img in parsed.images]
+        links = [{'url': link['url'], 'title': '', 'summary': ''} for link in parsed.links]
+        return split_sections(parsed, images, links, max_chars)
+
+    def test_short_note_single_section(self):
+        """测试短笔记不分段"""
+        sections = self.split(make_note(3, 20), max_chars=4000)
+
+        self.assertEqual(len(sections), 1)
+        self.assertEqual(len(sections[0].images_desc), 3)
+        self.assertEqual(len(sections[0].links_summary), 3)
+
+    def test_items_follow_their_heading(self):
+        """测试图片和链接分配到所在标题的段"""
+        sections = self.split(make_note(4, 300), max_chars=400)
+
+        self.assertEqual(len(sections), 4)
+        for i, section in enumerate(sections):
+            self.assertEqual(section.text_blocks[0], f"# 第{i}节")
+            self.assertEqual([img['url'] for img in section.images_desc], [f"https://example.com/{i}.png"])
+            self.assertEqual([link['url'] for link in section.links_summary], [f"https://example.com/post{i}"])
+        self.assertTrue(sections[0].is_first)
+        self.assertTrue(sections[-1].is_last)
+
+    def test_formatted_headings_located(self):
+        """测试标题含加粗、行内代码和链接时图片和链接仍分配到所在段"""
+        headings = [
+            "# **加粗**的标题",
+            "# 使用 `asyncio.gather` 并发",
+            "# 参考 [官方文档](https://docs.python.org/3/) 的说明",
+            "配置说明\n========",
+        ]
+        parts = ["---\ntitle: 笔记\n---", "```python\n# 代码中的注释\n```"]
+        for i, heading in enumerate(headings):
+            parts.append(heading)
+            parts.append(f"第{i}节正文" + "内容" * 150)
+            parts.append(f"![图{i}](https://example.com/{i}.png)")
+        sections = self.split("\n\n".join(parts), max_chars=400)
+
+        self.assertEqual(len(sections), 4)
+        for i, section in enumerate(sections):
+            self.assertEqual([img['url'] for img in section.images_desc], [f"https://example.com/{i}.png"])
+        self.assertEqual([link['url'] for link in sections[2].links_summary], ["https://docs.python.org/3/"])
+
+    def test_small_headings_merged(self):
+        """测试相邻的小节合并到同一段"""
+        sections = self.split(make_note(4, 300), max_chars=800)
+
+        self.assertEqual(len(sections), 2)
+        self.assertEqual(len(sections[0].images_desc), 2)
+
+    def test_long_heading_split_by_blocks(self):
+        """测试单个标题下内容过长时继续按文本块切分"""
+        markdown = "# 标题\n\n" + "\n\n".join(f"段落{i}" + "字" * 200 for i in range(6))
+
+        sections = self.split(markdown, max_chars=500)
+
+        self.assertGreater(len(sections), 1)
+        self.assertEqual(sum(len(s.text_blocks) for s in sections), 7)
+
+
+class TestStitch(unittest.TestCase):
+    """测试拼接"""
+
+    def test_later_sections_normalized(self):
+        """测试后续段去掉 Front Matter 并降级一级标题,代码块保持不变"""
+        part = "---\ntitle: x\n---\n# 小节\n\n正文\n\n```bash\n# 注释\n```"
+
+        self.assertEqual(normalize_section(part, 1), part)
+        self.assertEqual(normalize_section(part, 2), "## 小节\n\n正文\n\n```bash\n# 注释\n```")
+
+    def test_stitch(self):
+        """测试按顺序拼接"""
+        self.assertEqual(stitch_sections(["# 标题\n\n甲\n", "# 乙"]), "# 标题\n\n甲\n\n## 乙")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+测试正文片段选择
+"""
+import unittest
+
+from src.selector import select_relevant, tokenize, estimate_text_tokens
+
+
+PAGE = "\n".join([
+    "首页 | 产品 | 文档 | 登录",
+    "本网站使用 Cookie 来改善您的浏览体验,继续浏览即表示同意。",
+] + [f"第{i}部分介绍了一些与主题无关的背景知识和历史沿革。" * 3 for i in range(20)] + [
+    "Python 的 asyncio 事件循环通过协程调度网络请求,信号量可以限制并发数量。",
+    "使用 aiohttp 时应当复用 ClientSession,避免每个请求都重新建立连接池。",
+] + [f"附录{i}: 版权声明与联系方式。" for i in range(10)])
+
+
+class TestSelector(unittest.TestCase):
+    """测试 BM25 段落选择"""
+
+    def test_tokenize_mixed_text(self):
+        """测试中英文混合分词"""
+        self.assertEqual(tokenize("用 asyncio 并发"), ["asyncio", "用", "并发"])
+
+    def test_short_content_unchanged(self):
+        """测试预算内的正文原样返回"""
+        self.assertEqual(select_relevant("短正文", "查询", 100), "短正文")
+
+    def test_relevant_paragraphs_selected(self):
+        """测试选出与上下文相关的段落并保持原文顺序"""
+        selected = select_relevant(PAGE, "asyncio 并发请求 aiohttp 连接池", 120)
+
+        self.assertIn("asyncio 事件循环", selected)
+        self.assertIn("复用 ClientSession", selected)
+        self.assertLess(selected.index("asyncio 事件循环"), selected.index("复用 ClientSession"))
+        self.assertNotIn("背景知识", selected)
+        self.assertLessEqual(estimate_text_tokens(selected), 120)
+
+    def test_remaining_budget_filled_with_leading_paragraphs(self):
+        """测试相关段落放完后用靠前的其余段落填满预算"""
+        selected = select_relevant(PAGE, "asyncio 并发请求 aiohttp 连接池", 120)
+
+        self.assertTrue(selected.startswith("首页"))
+        self.assertIn("附录0", selected)
+        self.assertGreaterEqual(estimate_text_tokens(selected), 110)
+        self.assertLessEqual(estimate_text_tokens(selected), 120)
+
+    def test_oversized_paragraph_truncated_by_tokens(self):
+        """测试单个段落超过预算时按 token 估算截取,英文不会被截得过短"""
+        english = "word " * 400
+        chinese = "这是一段很长的中文正文" * 40
+
+        for text in (english, chinese):
+            selected = select_relevant(text, "word 中文", 50)
+            self.assertTrue(selected.endswith("..."))
+            self.assertLessEqual(estimate_text_tokens(selected[:-3]), 50)
+            self.assertGreater(estimate_text_tokens(selected[:-3]), 45)
+        self.assertEqual(select_relevant(" \n \n  ", "查询", 0), "")
+
+    def test_unrelated_query_keeps_leading_paragraphs(self):
+        """测试查询与正文无关时退化为截取开头"""
+        selected = select_relevant(PAGE, "zzz", 60)
+
+        self.assertTrue(selected.startswith("首页"))
+
+
+if __name__ == '__main__':
+    unittest.main()
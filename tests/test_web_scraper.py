@@ -0,0 +1,493 @@
+"""
+测试网页内容抓取
+"""
+import os
+import time
+import asyncio
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import aiohttp
+
+from config import config
+from src.cache import DiskCache
+from src.extractor import ExtractionPool
+from src.web_scraper import (
+    WebScraper, AsyncWebScraper, DomainStrategies, BodyReader, UnsupportedContent,
+    parse_domain_ttls, canonicalize_url, extract_canonical_link, check_response_headers
+)
+
+PAGE_HTML = (
+    "<html><head><title>测试</title></head><body><article>"
+    + "<p>这是一段足够长的正文内容,用于测试网页抓取和正文提取。</p>" * 10
+    + "</article></body></html>"
+).encode('utf-8')
+
+
+GBK_PAGE_HTML = PAGE_HTML.decode('utf-8').encode('gbk')
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """返回固定页面,支持 ETag 条件请求"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, dict(self.headers)))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        # /gbk 只在响应头中声明 GBK 编码,页面本身没有 <meta charset>
+        body, charset = (GBK_PAGE_HTML, 'gbk') if self.path == '/gbk' else (PAGE_HTML, 'utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'text/html; charset={charset}')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """启动本地 HTTP 服务的测试基类"""
+
+    handler = PageHandler
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), cls.handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.handler.requests_seen = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, value in (('CACHE_ENABLED', False), ('JINA_READER_BASE', f"{self.base_url}/jina/")):
+            patcher = mock.patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_scraper(self, with_cache: bool = True) -> WebScraper:
+        scraper = WebScraper()
+        scraper.strategies = DomainStrategies()
+        scraper.extraction = ExtractionPool(0)
+        if with_cache:
+            scraper.page_cache = DiskCache(os.path.join(self.tmp.name, "pages.sqlite3"))
+        return scraper
+
+
+class TestPageCache(LocalServerTestCase):
+    """测试网页缓存与条件请求"""
+
+    def test_fresh_entry_served_from_cache(self):
+        """测试有效期内不发请求"""
+        scraper = self.make_scraper()
+        url = f"{self.base_url}/article"
+
+        first = scraper.fetch_content(url)
+        second = scraper.fetch_content(url)
+
+        self.assertIsNotNone(first)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.handler.requests_seen), 1)
+
+    def test_response_charset_used_for_extraction(self):
+        """测试按响应头 Content-Type 声明的字符集解码没有 <meta charset> 的网页 (同步和异步)"""
+        async def fetch_async(url):
+            async with aiohttp.ClientSession() as session:
+                scraper = AsyncWebScraper(session)
+                scraper.extraction = ExtractionPool(0)
+                scraper.page_cache = None
+                return await scraper._fetch_with_readability(url)
+
+        url = f"{self.base_url}/gbk"
+        for content in (self.make_scraper(with_cache=False)._fetch_with_readability(url),
+                        asyncio.run(fetch_async(url))):
+            self.assertIn("足够长的正文内容", content)
+
+    def test_stale_entry_revalidated_with_etag(self):
+        """测试过期条目发送条件请求,304 时沿用缓存正文"""
+        scraper = self.make_scraper()
+        scraper.domain_ttls = {'127.0.0.1': 0}
+        url = f"{self.base_url}/article"
+
+        first = scraper.fetch_content(url)
+        with mock.patch('src.extractor.extract_text') as extract:
+            second = scraper.fetch_content(url)
+
+        self.assertEqual(first, second)
+        extract.assert_not_called()
+        self.assertEqual(len(self.handler.requests_seen), 2)
+        self.assertEqual(self.handler.requests_seen[1][1].get('If-None-Match'), '"v1"')
+
+    def test_domain_ttls(self):
+        """测试按域名配置有效期 (最长后缀匹配)"""
+        scraper = self.make_scraper(with_cache=False)
+        scraper.default_ttl = 100
+        scraper.domain_ttls = parse_domain_ttls("example.com=10, docs.example.com=5, bad=x")
+
+        self.assertEqual(scraper._ttl_for("https://example.com/a"), 10)
+        self.assertEqual(scraper._ttl_for("https://www.example.com/a"), 10)
+        self.assertEqual(scraper._ttl_for("https://docs.example.com/a"), 5)
+        self.assertEqual(scraper._ttl_for("https://notexample.com/a"), 100)
+
+
+class TestCanonicalUrl(LocalServerTestCase):
+    """测试规范地址"""
+
+    def test_tracking_params_stripped(self):
+        """测试去掉跟踪参数、片段和默认端口,保留其他参数"""
+        self.assertEqual(
+            canonicalize_url("HTTPS://Blog.Example.com:443/post?id=3&utm_source=feed&fbclid=x#comments"),
+            "https://blog.example.com/post?id=3"
+        )
+        self.assertEqual(canonicalize_url("https://example.com/a?b=1&c=2"), "https://example.com/a?b=1&c=2")
+        self.assertEqual(canonicalize_url("assets/x.png"), "assets/x.png")
+
+    def test_extract_canonical_link(self):
+        """测试读取 rel=canonical (相对地址、属性顺序和引号不同)"""
+        amp = b'<head><link rel="amphtml" href="/amp"><link href="/post?utm_medium=amp" rel="canonical"></head>'
+
+        self.assertEqual(
+            extract_canonical_link(amp, "https://m.example.com/amp/post"),
+            "https://m.example.com/post"
+        )
+        self.assertIsNone(extract_canonical_link(b"<head><title>x</title></head>", "https://example.com"))
+
+    def test_variants_share_fetch_and_cache(self):
+        """测试跟踪参数不同的链接命中同一个缓存条目"""
+        scraper = self.make_scraper()
+
+        scraper.fetch_content(f"{self.base_url}/article?utm_source=a")
+        scraper.fetch_content(f"{self.base_url}/article?utm_source=b")
+
+        self.assertEqual([path for path, _ in self.handler.requests_seen], ["/article"])
+
+
+class FlakyHandler(PageHandler):
+    """前两次请求返回 503"""
+
+    def do_GET(self):
+        if len(self.requests_seen) < 2:
+            self.requests_seen.append((self.path, dict(self.headers)))
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+
+class TestRetry(LocalServerTestCase):
+    """测试抓取重试"""
+
+    handler = FlakyHandler
+
+    def test_transient_error_retried(self):
+        """测试服务端临时错误重试后抓取成功"""
+        scraper = self.make_scraper(with_cache=False)
+        scraper.retry_policy.base_delay = 0.01
+
+        content = scraper.fetch_content(f"{self.base_url}/page")
+
+        self.assertIn("足够长的正文", content)
+        self.assertEqual(len(self.handler.requests_seen), 3)
+        self.assertEqual(scraper.retry_policy.retries, 2)
+
+
+JINA_TEXT = "# 测试\n\n" + "这是 Jina AI Reader 返回的正文内容。" * 10
+
+
+class RaceHandler(PageHandler):
+    """/slow 延迟返回,/js 没有正文 (需要执行 JS),/jina/ 返回 Jina 正文"""
+
+    def do_GET(self):
+        if self.path.startswith('/jina/'):
+            self.requests_seen.append((self.path, dict(self.headers)))
+            body = JINA_TEXT.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == '/js':
+            self.requests_seen.append((self.path, dict(self.headers)))
+            body = b'<html><body><div id="app"></div></body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == '/slow':
+            time.sleep(1.5)
+        super().do_GET()
+
+
+class TestRace(LocalServerTestCase):
+    """测试 readability 与 Jina AI 竞速"""
+
+    handler = RaceHandler
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(config, 'JINA_RACE_DELAY', 0.2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_slow_page_won_by_jina(self):
+        """测试 readability 超过延迟后发出 Jina 请求,先返回的一方胜出并被记录"""
+        scraper = self.make_scraper(with_cache=False)
+
+        start = time.monotonic()
+        content = scraper.fetch_content(f"{self.base_url}/slow")
+
+        self.assertEqual(content, JINA_TEXT.strip())
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(scraper.strategies._counts['127.0.0.1'], {'jina': 1})
+
+    def test_readability_failure_starts_jina_immediately(self):
+        """测试 readability 失败后不等延迟直接请求 Jina"""
+        scraper = self.make_scraper(with_cache=False)
+
+        with mock.patch.object(config, 'JINA_RACE_DELAY', 10):
+            start = time.monotonic()
+            content = scraper.fetch_content(f"{self.base_url}/js")
+
+        self.assertEqual(content, JINA_TEXT.strip())
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_learned_domain_races_immediately(self):
+        """测试 Jina 胜出较多的域名同时发出请求,落败的 readability 不写入缓存"""
+        scraper = self.make_scraper()
+        scraper.strategies.record('127.0.0.1', 'jina')
+        scraper.strategies.record('127.0.0.1', 'jina')
+        url = f"{self.base_url}/slow"
+
+        with mock.patch.object(config, 'JINA_RACE_DELAY', 10):
+            start = time.monotonic()
+            content = scraper.fetch_content(url)
+            self.assertLess(time.monotonic() - start, 1.2)
+
+        self.assertEqual(content, JINA_TEXT.strip())
+        time.sleep(1.6)
+        self.assertEqual(scraper._cached_page(url)['strategy'], 'jina')
+
+    def test_async_race(self):
+        """测试异步抓取器竞速并取消落败的请求"""
+        async def run():
+            async with aiohttp.ClientSession() as session:
+                scraper = AsyncWebScraper(session)
+                scraper.strategies = DomainStrategies()
+                scraper.extraction = ExtractionPool(0)
+                scraper.page_cache = None
+                start = time.monotonic()
+                content = await scraper.fetch_content(f"{self.base_url}/slow")
+                return content, time.monotonic() - start
+
+        content, elapsed = asyncio.run(run())
+
+        self.assertEqual(content, JINA_TEXT.strip())
+        self.assertLess(elapsed, 1.2)
+
+
+class TestDomainStrategies(unittest.TestCase):
+    """测试按域名学习胜出策略"""
+
+    def test_learning_and_preferred_domains(self):
+        """测试 Jina 多次胜出后优先,配置的域名包括子域名"""
+        strategies = DomainStrategies(preferred=["spa.example.com", " "])
+
+        self.assertTrue(strategies.prefers_jina("spa.example.com"))
+        self.assertTrue(strategies.prefers_jina("www.spa.example.com"))
+        self.assertFalse(strategies.prefers_jina("example.com"))
+
+        strategies.record("example.com", "jina")
+        self.assertFalse(strategies.prefers_jina("example.com"))
+        strategies.record("example.com", "jina")
+        self.assertTrue(strategies.prefers_jina("example.com"))
+        for _ in range(3):
+            strategies.record("example.com", "readability")
+        self.assertFalse(strategies.prefers_jina("example.com"))
+
+    def test_counts_decay_and_persist(self):
+        """测试计数超过上限时减半,并保存在缓存中"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(os.path.join(tmp, "strategies.sqlite3"))
+            strategies = DomainStrategies(cache)
+            strategies.record("example.com", "readability")
+            for _ in range(DomainStrategies.MAX_COUNT + 1):
+                strategies.record("example.com", "jina")
+
+            reloaded = DomainStrategies(cache)
+            self.assertTrue(reloaded.prefers_jina("example.com"))
+            self.assertEqual(reloaded._load("example.com"), {'readability': 0, 'jina': 8})
+
+
+class StreamHandler(PageHandler):
+    """/video 声明很大的视频,/endless 不带长度持续输出 HTML,/jina/ 返回 Jina 正文"""
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, dict(self.headers)))
+        if self.path.startswith('/jina/'):
+            body = JINA_TEXT.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path == '/video':
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', str(200 * 1024 * 1024))
+            self.end_headers()
+            self.wfile.write(b'\0' * 1024)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        paragraph = "<p>这是一段足够长的正文内容,用于测试流式读取的上限。</p>".encode('utf-8')
+        try:
+            self.wfile.write(b"<html><body><article>")
+            for _ in range(20000):
+                self.wfile.write(paragraph)
+        except OSError:
+            pass
+
+
+class TestStreaming(LocalServerTestCase):
+    """测试流式下载、大小上限和内容类型检查"""
+
+    handler = StreamHandler
+
+    def test_non_html_skipped_before_download(self):
+        """测试视频等非 HTML 内容不交给 readability,由 Jina 接手"""
+        scraper = self.make_scraper(with_cache=False)
+        url = f"{self.base_url}/video"
+
+        self.assertIsNone(scraper._fetch_with_readability(url))
+        self.assertEqual(scraper.fetch_content(url), JINA_TEXT.strip())
+
+    def test_body_truncated_at_limit(self):
+        """测试没有 Content-Length 的网页读到上限后停止"""
+        scraper = self.make_scraper(with_cache=False)
+        scraper.max_bytes = 64 * 1024
+
+        status, body, _ = scraper._get(f"{self.base_url}/endless", scraper.headers, "测试")
+        content = scraper._fetch_with_readability(f"{self.base_url}/endless")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body), 64 * 1024)
+        self.assertIn("流式读取的上限", content)
+
+    def test_check_response_headers(self):
+        """测试响应头检查"""
+        check_response_headers({'Content-Type': 'text/html; charset=utf-8', 'Content-Length': '100'}, 1000)
+        check_response_headers({}, 1000)
+        check_response_headers({'Content-Type': 'text/plain'}, 1000, allowed_types=None)
+        with self.assertRaises(UnsupportedContent):
+            check_response_headers({'Content-Type': 'application/pdf'}, 1000)
+        with self.assertRaises(UnsupportedContent):
+            check_response_headers({'Content-Type': 'text/html', 'Content-Length': '1001'}, 1000)
+
+    def test_reader_stops_at_html_end(self):
+        """测试读到 </html> (包括跨越两段时) 即结束"""
+        reader = BodyReader("http://example.com", 1000)
+        self.assertFalse(reader.feed(b"<html><body>text</body></ht"))
+        self.assertTrue(reader.feed(b"ml>\n"))
+        self.assertFalse(reader.truncated)
+
+        text = BodyReader("http://example.com", 1000, stop_at_html_end=False)
+        self.assertFalse(text.feed(b"</html>"))
+
+
+class ConcurrencyHandler(PageHandler):
+    """记录每个主机 (Host 头) 同时进行中的请求数;/slow 开头的页面延迟返回"""
+
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+    order = []
+
+    def do_GET(self):
+        host = self.headers.get('Host', '').split(':')[0]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+            self.order.append(f"{host}{self.path}")
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.3)
+            super().do_GET()
+        finally:
+            with self.lock:
+                self.active[host] -= 1
+
+
+class TestFetchMultiple(LocalServerTestCase):
+    """测试并发批量抓取"""
+
+    handler = ConcurrencyHandler
+
+    def setUp(self):
+        super().setUp()
+        ConcurrencyHandler.active = {}
+        ConcurrencyHandler.peak = {}
+        ConcurrencyHandler.order = []
+        self.port = self.server.server_address[1]
+
+    def test_results_stream_in_completion_order(self):
+        """测试先完成的网页先返回,fetch_multiple 保持输入顺序"""
+        scraper = self.make_scraper(with_cache=False)
+        urls = [f"{self.base_url}/slow-a", f"{self.base_url}/fast"]
+
+        first_url, first_content = next(iter(scraper.iter_fetch(urls, max_workers=2)))
+        results = scraper.fetch_multiple(urls, max_workers=2)
+
+        self.assertEqual(first_url, urls[1])
+        self.assertIn("足够长的正文", first_content)
+        self.assertEqual(list(results), urls)
+        self.assertTrue(all(results.values()))
+
+    def test_per_host_fairness(self):
+        """测试每个主机的并发上限,且其他主机的链接不必排在最后"""
+        scraper = self.make_scraper(with_cache=False)
+        busy = [f"http://127.0.0.1:{self.port}/slow-{i}" for i in range(6)]
+        other = f"http://localhost:{self.port}/slow-other"
+
+        start = time.monotonic()
+        results = dict(scraper.iter_fetch(busy + [other], max_workers=3, max_per_host=2))
+
+        self.assertEqual(len(results), 7)
+        self.assertEqual(ConcurrencyHandler.peak['127.0.0.1'], 2)
+        self.assertLess(ConcurrencyHandler.order.index("localhost/slow-other"), 3)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_duplicates_fetched_once(self):
+        """测试规范地址相同的 URL 只抓取一次,结果分别返回"""
+        scraper = self.make_scraper(with_cache=False)
+        urls = [f"{self.base_url}/page?utm_source=a", f"{self.base_url}/page?utm_source=b"]
+
+        results = dict(scraper.iter_fetch(urls))
+
+        self.assertEqual(set(results), set(urls))
+        self.assertEqual(len(ConcurrencyHandler.order), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
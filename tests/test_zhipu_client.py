@@ -0,0 +1,172 @@
+"""
+测试智谱 AI 客户端封装
+"""
+import json
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from src.hedging import Hedger
+from src.retry import RetryPolicy
+from src.zhipu_client import ZhipuClient, parse_numbered_json
+
+
+def make_chunk(content):
+    """构造流式响应片段"""
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeCompletions:
+    """模拟 client.chat.completions"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.handler(**kwargs)
+
+
+def make_client(handler) -> ZhipuClient:
+    client = ZhipuClient(api_key="test.key")
+    completions = FakeCompletions(handler)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+class TestReorganizeStream(unittest.TestCase):
+    """测试流式重组"""
+
+    def test_stream_yields_chunks(self):
+        """测试逐段产出并去掉开头空行"""
+        client = make_client(lambda **kwargs: iter([
+            make_chunk("\n\n"), make_chunk("---\ntitle: x\n"), make_chunk(None), make_chunk("正文")
+        ]))
+
+        chunks = list(client.reorganize_article_stream(["原文"], [], []))
+
+        self.assertEqual(chunks, ["---\ntitle: x\n", "正文"])
+        self.assertTrue(client.client.chat.completions.calls[0]['stream'])
+
+    def test_stream_falls_back_to_original_text(self):
+        """测试请求失败时产出原始文本"""
+        def fail(**kwargs):
+            raise RuntimeError("boom")
+
+        client = make_client(fail)
+
+        chunks = list(client.reorganize_article_stream(["段落1", "段落2"], [], []))
+
+        self.assertEqual(chunks, ["段落1\n\n段落2"])
+
+
+class TestBatchSummaries(unittest.TestCase):
+    """测试批量总结"""
+
+    def test_parse_json_in_code_block(self):
+        """测试解析代码块中的 JSON,缺失和空白条目为 None"""
+        text = '```json\n{"1": "第一篇总结", "3": "  "}\n```'
+
+        self.assertEqual(parse_numbered_json(text, 3), ["第一篇总结", None, None])
+
+    def test_invalid_json(self):
+        """测试无法解析时全部为 None"""
+        self.assertEqual(parse_numbered_json("抱歉,我无法完成", 2), [None, None])
+
+    def test_summarize_batch_request(self):
+        """测试多段文本合并为一次请求"""
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"1": "甲", "2": "乙"}'))]
+        )
+        client = make_client(lambda **kwargs: response)
+
+        summaries = client.summarize_batch([("正文一", "上下文"), ("正文二", None)])
+
+        self.assertEqual(summaries, ["甲", "乙"])
+        calls = client.client.chat.completions.calls
+        self.assertEqual(len(calls), 1)
+        self.assertIn("### 网页 2", calls[0]['messages'][1]['content'])
+
+
+class TooLargeError(Exception):
+    """模拟 413 错误"""
+    status_code = 413
+
+
+class TestMultiImage(unittest.TestCase):
+    """测试多图分析"""
+
+    def test_oversized_group_split_and_shrunk(self):
+        """测试请求过大时拆分重试,并减小之后的分组大小"""
+        def handler(messages, **kwargs):
+            images = [part for part in messages[0]['content'] if part['type'] == 'image_url']
+            if len(images) > 2:
+                raise TooLargeError("request too large")
+            if len(images) == 1:
+                content = "单张描述"
+            else:
+                content = json.dumps({str(i): images[i - 1]['image_url']['url'] for i in range(1, len(images) + 1)})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        client = make_client(handler)
+        client.vision_group_size = 4
+        items = [(f"https://example.com/{i}.png", None) for i in range(4)]
+
+        descriptions = client.analyze_images(items)
+
+        self.assertEqual(descriptions, [url for url, _ in items])
+        self.assertEqual(client.vision_group_size, 2)
+        self.assertEqual(len(client.client.chat.completions.calls), 3)
+
+    def test_missing_entry_analyzed_alone(self):
+        """测试响应中缺少的图片单独重新分析"""
+        def handler(messages, **kwargs):
+            images = [part for part in messages[0]['content'] if part['type'] == 'image_url']
+            content = '{"1": "第一张"}' if len(images) > 1 else "第二张"
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        client = make_client(handler)
+
+        descriptions = client.analyze_images([("https://example.com/1.png", None), ("https://example.com/2.png", "看图")])
+
+        self.assertEqual(descriptions, ["第一张", "第二张"])
+
+
+
+class TestHedgedCompletion(unittest.TestCase):
+    """测试对冲只针对单次尝试"""
+
+    def test_hedge_wraps_single_attempt(self):
+        """测试一次尝试及其对冲副本都失败后只重试一次,而不是每个副本各自走完重试循环"""
+        lock = threading.Lock()
+
+        def handler(**kwargs):
+            with lock:
+                count = len(completions.calls)
+            if count == 1:
+                time.sleep(0.2)
+                raise TimeoutError("原始请求超时")
+            if count == 2:
+                raise TimeoutError("对冲请求超时")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="结果"))])
+
+        client = make_client(handler)
+        completions = client.client.chat.completions
+        client.retry_policy = RetryPolicy(deadline=30, max_retries=3, base_delay=0.01, max_delay=0.01)
+        client.hedger = Hedger(percentile=90, budget=1.0, min_samples=1, max_workers=4)
+        client.hedger.tracker("op").record(0.1)
+
+        result = client._complete_hedged("glm", [{"role": "user", "content": "x"}], 0.1, 10, "op")
+        time.sleep(0.4)  # 等待可能仍在后台进行的请求结束
+
+        self.assertEqual(result, "结果")
+        self.assertEqual(len(completions.calls), 3)
+        self.assertEqual(client.retry_policy.retries, 1)
+        self.assertEqual(client.hedger.hedges, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()